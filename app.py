@@ -244,7 +244,6 @@ try:
     from utils.storage_manager import StorageManager
     from utils.task_scheduler import WindowsTaskScheduler
     from utils.db import get_db, TenderProject, ProjectStatus, update_project, save_project, CompanyQualification, get_company_qualifications, add_company_qualification, update_company_qualification, delete_company_qualification, ClassACertificate, get_class_a_certificates, add_class_a_certificate, update_class_a_certificate, delete_class_a_certificate, ClassBRule, get_class_b_rules, add_class_b_rule, update_class_b_rule, delete_class_b_rule, extract
-    from spider.tender_spider import ZheJiangTenderSpider
     from spider import SpiderManager
     from utils.log import log
     
@@ -1221,47 +1220,7 @@ def _dict_to_project(project_dict):
 def get_available_platforms():
     """获取所有可用的爬虫平台列表（带缓存优化）"""
     try:
-        # 确保导入所有平台爬虫（触发注册）
-        try:
-            from spider.platforms.hangzhou import HangZhouTenderSpider
-        except Exception as e:
-            log.warning(f"导入杭州市爬虫失败: {str(e)}")
-        
-        try:
-            from spider.platforms.jiaxing import JiaXingTenderSpider
-        except Exception as e:
-            log.warning(f"导入嘉兴市爬虫失败: {str(e)}")
-        
-        try:
-            from spider.platforms.ningbo import NingBoTenderSpider
-        except Exception as e:
-            log.warning(f"导入宁波市爬虫失败: {str(e)}", exc_info=True)
-
-        try:
-            from spider.platforms.shaoxing import ShaoXingTenderSpider
-        except Exception as e:
-            log.warning(f"导入绍兴市爬虫失败: {str(e)}", exc_info=True)
-        
-        try:
-            from spider.platforms.huzhou import HuZhouTenderSpider
-        except Exception as e:
-            log.warning(f"导入湖州市爬虫失败: {str(e)}")
-        
-        try:
-            from spider.platforms.yiwu import YiWuTenderSpider
-        except Exception as e:
-            log.warning(f"导入义乌市爬虫失败: {str(e)}")
-
-        try:
-            from spider.platforms.lishui import LiShuiTenderSpider
-        except Exception as e:
-            log.warning(f"导入丽水市爬虫失败: {str(e)}")
-
-        try:
-            from spider.platforms.quzhou import QuZhouTenderSpider
-        except Exception as e:
-            log.warning(f"导入衢州市爬虫失败: {str(e)}")
-        
+        # 平台列表来自 SpiderManager 的入口表，不需要导入各平台模块
         platforms = SpiderManager.list_all_spider_info()
         log.debug(f"已注册的爬虫平台: {[p['code'] for p in platforms]}")
         return {info["code"]: info["name"] for info in platforms}
@@ -1719,6 +1678,15 @@ def render_sidebar():
             log.debug(f"获取存储空间信息失败（可忽略）：{str(e)}")
             storage_status = "✅ 存储空间正常"
         
+        # 熔断中的平台
+        try:
+            from spider.circuit_breaker import circuit_breakers, OPEN
+            open_platforms = [state["label"] for state in circuit_breakers.states() if state["state"] == OPEN]
+        except Exception as e:
+            log.debug(f"获取熔断状态失败（可忽略）：{str(e)}")
+            open_platforms = []
+        breaker_status = f"\n⛔ 熔断中：{'、'.join(open_platforms)}" if open_platforms else ""
+        
         with st.sidebar.container(border=True, height=200):
             st.markdown(
                 f"✅ 系统正常运行\n"
@@ -1727,6 +1695,7 @@ def render_sidebar():
                 f"🎯 当日推荐参与：{today_stats['qualified']}\n"
                 f"📈 当日通过率：{today_stats['pass_rate']}%\n"
                 f"💾 {storage_status}"
+                f"{breaker_status}"
             )
     else:
         st.sidebar.error("❌ 系统初始化失败")
@@ -2910,7 +2879,9 @@ def run_ai_analysis_with_progress():
                     safe_streamlit_update(status_text.warning, "⚠️ 分析已中断")
                     break
                 
-                project_requirements = ai_analyzer.extract_requirements(project.evaluation_content)
+                # 文件内容相同的项目已提取过时直接复用
+                from utils.db import get_reusable_requirements
+                project_requirements = get_reusable_requirements(db, project) or ai_analyzer.extract_requirements(project.evaluation_content)
                 
                 # 检查是否中断（在第二个AI操作前）
                 if not st.session_state.get('ai_analysis_running', False):
@@ -3466,8 +3437,9 @@ def _start_background_task(task_type, **kwargs):
                                             # 项目不是服务类，继续分析
                                             log.info(f"项目 {project.id} 不是服务类项目，继续分析")
                                         
-                                        # 1. 提取资质要求
-                                        requirements = analyzer.extract_requirements(project.evaluation_content)
+                                        # 1. 提取资质要求（文件内容相同的项目已提取过时直接复用）
+                                        from utils.db import get_reusable_requirements
+                                        requirements = get_reusable_requirements(db, project) or analyzer.extract_requirements(project.evaluation_content)
                                         # 2. 比对资质
                                         comparison, decision = analyzer.compare_qualifications(requirements)
                                         
@@ -3974,6 +3946,38 @@ def _is_task_likely_running():
         # 最外层异常处理，确保不会导致应用崩溃
         return False
 
+def _render_circuit_breaker_status():
+    """显示各平台熔断状态（熔断中的平台可手动解除）"""
+    try:
+        from spider.circuit_breaker import circuit_breakers, OPEN
+        states = circuit_breakers.states()
+    except Exception as e:
+        log.debug(f"获取熔断状态失败（可忽略）：{str(e)}")
+        return
+    if not states:
+        return
+
+    open_states = [state for state in states if state["state"] != "closed"]
+    title = f"🔌 平台熔断状态（{len(open_states)} 个平台异常）" if open_states else "🔌 平台熔断状态（全部正常）"
+    with st.expander(title, expanded=bool(open_states)):
+        st.dataframe(pd.DataFrame([
+            {
+                "平台": state["label"],
+                "状态": state["state_label"],
+                "近期请求数": state["requests"],
+                "失败率": f"{state['error_rate'] * 100:.0f}%",
+                "连续熔断次数": state["trips"],
+                "剩余熔断时间（秒）": state["retry_in"],
+                "更新时间": datetime.fromtimestamp(state["updated_at"]).strftime("%H:%M:%S"),
+            }
+            for state in states
+        ]), width='stretch', hide_index=True)
+        for state in states:
+            if state["state"] == OPEN and st.button(f"解除熔断：{state['label']}", key=f"reset_breaker_{state['name']}"):
+                circuit_breakers.reset(state["name"])
+                st.rerun()
+
+
 def render_process_execution():
     """渲染流程执行页面（重构版）"""
     st.title("⚙️ 流程执行 - 标书资质自动匹配系统")
@@ -4179,6 +4183,8 @@ def render_process_execution():
             crawl_days_before = st.number_input("爬取时间范围（天）", min_value=1, max_value=30,
                 value=st.session_state.get("crawl_days_before", 7), step=1)
             st.session_state["crawl_days_before"] = crawl_days_before
+
+        _render_circuit_breaker_status()
     
     # 执行按钮
     if st.button("▶️ 执行", type="primary", key="execute_process_button"):
@@ -4302,11 +4308,12 @@ def run_spider_with_progress():
                 return
         else:
             # 使用原有的ZheJiangTenderSpider（向后兼容）
+            from spider.tender_spider import ZheJiangTenderSpider
             spider = ZheJiangTenderSpider(daily_limit=spider_total, days_before=days_before)
         
-        # 创建session对象
-        import requests
-        session = requests.Session()
+        # 创建session对象（共享连接池）
+        from spider.http_client import http_client
+        session = http_client.session()
         # 检查spider是否有headers和cookies属性（不同平台可能不同）
         if hasattr(spider, 'headers'):
             session.headers.update(spider.headers)
@@ -4503,13 +4510,20 @@ def run_spider_with_progress():
                             "region": region_name,  # 使用API返回的districtName
                             "status": "DOWNLOADED"
                         }
-                        
+
+                        # 标题预筛：明显是服务类或不在业务范围内的公告不下载（以「已排除」状态入库）
+                        if not spider._prefilter_titles([project_data]):
+                            continue
+
                         status_text.markdown(f'<div class="status-message">📥 正在下载: {project_data["project_name"]}</div>', unsafe_allow_html=True)
                         
                         # 下载文件
                         try:
                             file_path, file_format = spider._download_document(project_id, project_data["project_name"], session)
                             if file_path:
+                                # 移入内容寻址存储，与其他平台发布的相同文件共用
+                                from utils import blob_store
+                                file_path, project_data["content_hash"] = blob_store.put(file_path)
                                 project_data["file_path"] = file_path
                                 project_data["file_format"] = file_format
                             
@@ -4883,7 +4897,8 @@ def run_full_process():
                         log.info(f"开始提取项目 {project.id} ({project.project_name[:50]}) 的资质要求")
                         
                         try:
-                            project_requirements = ai_analyzer.extract_requirements(project.evaluation_content)
+                            from utils.db import get_reusable_requirements
+                            project_requirements = get_reusable_requirements(db, project) or ai_analyzer.extract_requirements(project.evaluation_content)
                             extract_elapsed = time.time() - extract_start_time
                             log.info(f"项目 {project.id} 资质要求提取完成，耗时 {extract_elapsed:.2f} 秒")
                             
@@ -144,7 +144,7 @@ def run_full_process_cli(daily_limit=None, days_before=None, model_type=None, en
             
             try:
                 # 使用与流程控制相同的分析流程
-                from utils.db import get_db, TenderProject, ProjectStatus, update_project
+                from utils.db import get_db, TenderProject, ProjectStatus, update_project, get_reusable_requirements
                 analyzer = AIAnalyzer(model_type=model_type)
                 
                 db = next(get_db())
@@ -239,8 +239,8 @@ def run_full_process_cli(daily_limit=None, days_before=None, model_type=None, en
                             else:
                                 logger.info(f"资质关键词检查已禁用，跳过检查，继续分析项目 {project.id}")
                             
-                            # 1. 提取资质要求（与流程控制保持一致）
-                            project_requirements = analyzer.extract_requirements(project.evaluation_content)
+                            # 1. 提取资质要求（与流程控制保持一致；文件内容相同的项目已提取过时直接复用）
+                            project_requirements = get_reusable_requirements(db, project) or analyzer.extract_requirements(project.evaluation_content)
                             
                             # 2. 比对资质（与流程控制保持一致，使用AI进行详细比对）
                             comparison_result, final_decision = analyzer.compare_qualifications(project_requirements)
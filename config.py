@@ -53,11 +53,145 @@ for dir_path in [LOG_DIR, FILES_DIR, REPORT_DIR]:
 SPIDER_CONFIG = {
     "daily_limit": 4,  # 每日总爬取限制（每个分类平均150个）
     "zhejiang_max_pages": 35,
+    "zhejiang_list_concurrency": 4,  # 浙江省列表页并发请求数（同一主机同时进行的请求上限）
+    "download_workers": 3,  # 每个平台的文件下载并发数（平台配置 download_workers 可覆盖）
+    # 批量保存：下载完成的项目按批写库（一条 INSERT ... ON CONFLICT DO NOTHING，一次提交）
+    "bulk_save": {
+        "batch_size": 20,  # 攒够多少个项目保存一次
+        "max_delay": 5,  # 第一个待保存项目最多等待多少秒（避免下载很慢时迟迟不入库）
+    },
+    # 增量爬取水位：按（平台, 分类, 区域）记录已处理的最新发布时间，翻页到已处理区域即停止
+    "incremental": {
+        "enabled": os.getenv("SPIDER_INCREMENTAL", "true").lower() == "true",
+        "stop_after": 3,  # 连续遇到多少个已处理项目后停止翻页
+    },
+    # 项目去重索引：每个平台一个磁盘布隆过滤器，可能已存在的ID按列表页批量 IN 查询确认
+    "dedup": {
+        "index_dir": os.path.join(BASE_DIR, "dedup_index"),  # 过滤器文件目录
+        "capacity": 100000,  # 过滤器初始容量（平台记录数超过容量时自动重建扩容）
+        "error_rate": 0.001,  # 误判率（误判只会多一次数据库确认，不会漏爬）
+        "batch_size": 500,  # 每条 IN 查询最多包含的ID数
+    },
+    # 断点续传：未完成的下载保存为 .part 文件及清单，重试或下次运行时用 Range 请求继续
+    "resumable_download": {
+        "enabled": True,
+        "chunk_size": 65536,  # 分块大小（字节）
+        "chunk_timeout": 60,  # 超过该时间未收到数据视为超时（秒）
+        "manifest_flush_bytes": 1024 * 1024,  # 每下载多少字节更新一次清单
+    },
+    # 登录凭据缓存：Cookie、access_token、sid 连同过期时间保存到磁盘，跨运行复用，过期前后台刷新
+    "credential_cache": {
+        "enabled": os.getenv("SPIDER_CREDENTIAL_CACHE", "true").lower() == "true",
+        "cache_dir": os.path.join(BASE_DIR, "credential_cache"),  # 缓存文件目录
+        "default_ttl": 3600,  # 无法从凭据本身得到过期时间时的默认有效期（秒）
+        "ttl": {  # 各凭据的有效期（秒）
+            "zcy_login": 6 * 3600,  # 政采云登录 Cookie
+            "ningbo_access_token": 2 * 3600,  # 宁波平台 access_token（为 JWT 时以其 exp 为准）
+            "huzhou_sid": 1800,  # 湖州平台下载会话 sid
+            "lishui_sid": 1800,  # 丽水平台下载会话 sid
+        },
+        "refresh_before": 300,  # 剩余有效期少于该值时后台提前刷新（秒）
+    },
+    # 常驻 Node.js 执行进程（执行平台登录加密脚本，如宁波 login.js）
+    "js_worker": {
+        "node_path": os.getenv("SPIDER_NODE_PATH", "node"),  # node 可执行文件
+        "call_timeout": 30,  # 单次调用超时（秒）
+    },
+    # 验证码识别服务（湖州、丽水下载验证码）
+    "captcha": {
+        "processes": int(os.getenv("SPIDER_CAPTCHA_PROCESSES", "0")),  # 识别进程数（0表示在下载线程中识别）
+        "stats_interval": 50,  # 每识别多少张输出一次统计
+    },
+    # 无头浏览器池（湖州、丽水通过浏览器获取下载会话 sid，各平台共用）
+    "browser_pool": {
+        "size": int(os.getenv("SPIDER_BROWSER_POOL_SIZE", "2")),  # 最多同时启动的浏览器数量
+        "idle_timeout": 300,  # 空闲多少秒后关闭浏览器
+        "headless": True,
+        "acquire_timeout": 300,  # 浏览器全部被占用时最多等待多少秒
+    },
+    # 跨平台近似重复公告检测：同一采购在省级、市级平台以略有不同的标题发布时，只下载一次
+    "near_dup": {
+        "enabled": os.getenv("SPIDER_NEAR_DUP", "true").lower() == "true",
+        "date_window_days": 3,  # 发布日期相差不超过该天数才可能是同一公告
+        "max_hamming": 12,  # 标题 SimHash 的最大汉明距离（初筛）
+        "min_similarity": 0.8,  # 标题 MinHash 估算的最小 Jaccard 相似度
+        "num_perm": 64,  # MinHash 哈希函数个数（修改后已有签名失效）
+        "budget_tolerance": 0.01,  # 双方都有预算金额时允许的相对误差
+        "backfill_days": 30,  # 比较范围：最近多少天入库的项目（首次启用时为这些项目补齐签名）
+    },
+    # 列表阶段标题预筛：明显是服务类或不在业务范围内的公告不下载（以「已排除」状态入库）
+    "title_prefilter": {
+        "enabled": os.getenv("SPIDER_TITLE_PREFILTER", "true").lower() == "true",
+        "fields": ["project_name", "purchaser", "notice_type"],  # 参与打分的列表字段（缺少的字段忽略）
+        # 保留词：命中即下载（优先于排除词）
+        "include_keywords": ["设备", "货物", "施工", "供货", "采购及安装", "系统集成"],
+        # 服务类关键词（与服务类判断提示词中的典型服务类项目一致）
+        "service_keywords": [
+            "物业管理", "物业服务", "保洁服务", "保安服务", "安保服务", "食堂", "餐饮服务", "绿化养护",
+            "审计服务", "法律服务", "法律顾问", "咨询服务", "造价咨询", "监理服务", "评估服务", "培训服务",
+            "运维服务", "运营服务", "维保服务", "管理服务", "劳务派遣", "保险服务", "租赁服务", "印刷服务",
+        ],
+        # 不在业务范围内的公告类型（没有招标文件可下载）
+        "exclude_keywords": [
+            "中标结果", "成交结果", "中标公告", "成交公告", "结果公告", "终止公告", "废标公告", "流标公告",
+            "合同公告", "验收公告", "采购意向",
+        ],
+        # 本地文本分类模型（joblib 文件，见 spider.title_prefilter.train_classifier；文件不存在时不使用）
+        "model_path": os.getenv("SPIDER_TITLE_MODEL", os.path.join(BASE_DIR, "models", "title_classifier.joblib")),
+        "threshold": 0.9,  # 模型判断不相关的概率不低于该值时跳过
+        "irrelevant_label": 1,  # 模型中「不相关」类别的标签
+    },
+    # 按历史推荐率分配爬取配额（total_limit 在平台之间、浙江省配额在各列表流之间）
+    "budget_planner": {
+        "enabled": os.getenv("SPIDER_BUDGET_PLANNER", "true").lower() == "true",
+        "lookback_days": 90,  # 统计最近多少天入库项目的推荐率
+        "prior_weight": 10,  # 平滑强度：样本少的来源向上一级（平台/全局）推荐率靠拢
+        "min_yield": 0.02,  # 推荐率下限，没有推荐记录的来源仍分到少量配额
+    },
+    # 按平台熔断：滚动窗口内失败率过高时暂停该平台的请求，到期后放行试探请求
+    "circuit_breaker": {
+        "enabled": os.getenv("SPIDER_CIRCUIT_BREAKER", "true").lower() == "true",
+        "window_seconds": 120,  # 统计失败率的滚动窗口（秒）
+        "min_requests": 6,  # 窗口内至少多少次请求才判断是否熔断
+        "error_rate": 0.5,  # 失败率（5xx、429、超时、连接错误）达到该值时熔断
+        "open_seconds": 30,  # 首次熔断时长（秒），连续熔断时加倍
+        "max_open_seconds": 600,  # 最长熔断时长（秒）
+        "probe_timeout": 60,  # 试探请求超过该时间没有结果时允许再次试探（秒）
+        "state_file": os.path.join(LOG_DIR, "circuit_breaker_state.json"),  # 状态文件（供界面展示）
+    },
+    # HTTP 录制/回放（离线基准测试）：record 联网并录制请求/响应，replay 从归档回放，不访问网络
+    "http_fixtures": {
+        "mode": os.getenv("SPIDER_HTTP_FIXTURES", "off"),  # off / record / replay
+        "archive": os.getenv("SPIDER_HTTP_FIXTURES_ARCHIVE", os.path.join(BASE_DIR, "http_fixtures", "fixtures.zip")),
+        "latency": 0.05,  # 回放时每个请求注入的延迟（秒）
+        "recorded_latency": False,  # 为True时按录制时的实际耗时注入延迟（忽略 latency）
+        "rate_limit": False,  # 回放时是否仍按主机令牌桶限速
+        "ignore_params": ["_", "t", "timestamp", "_t", "r", "rnd"],  # 匹配请求时忽略的参数（时间戳、随机数）
+    },
+    # 共享 HTTP 连接池（spider/http_client.py，所有平台的会话复用同一组长连接）
+    "http_client": {
+        "pool_connections": 32,  # 最多保持连接池的主机数
+        "pool_maxsize": int(os.getenv("SPIDER_HTTP_POOL_MAXSIZE", "16")),  # 每个主机最多保持的连接数（不小于下载并发数）
+        "connect_retries": 2,  # 建立连接失败时的重试次数（请求尚未发出）
+        "retry_backoff": 0.5,  # 连接重试的退避系数（秒）
+        "timeout": None,  # 默认超时（秒，或 [连接超时, 读取超时]），None时使用 anti_crawl.timeout
+    },
     "files_dir": FILES_DIR,  # 使用绝对路径
     "anti_crawl": {
         "request_interval": 2,
         "retry_times": 3,
-        "timeout": 15  # 增加超时时间以适应文件下载
+        "timeout": 15,  # 增加超时时间以适应文件下载
+        # 按主机令牌桶限速（平台可在 PLATFORM_CONFIG["rate_limit"] 中覆盖）
+        "rate_limit": {
+            "requests_per_second": 1.0,  # 稳定状态下每个主机每秒请求数
+            "burst": 3,  # 允许的突发请求数
+        },
+    },
+    # 多平台并发爬取配置（SpiderManager.run_all_spiders 使用）
+    "concurrency": {
+        "enabled": os.getenv("SPIDER_CONCURRENT", "false").lower() == "true",  # 是否并发运行各平台爬虫
+        "executor": os.getenv("SPIDER_EXECUTOR", "thread"),  # thread：线程池 / process：进程池
+        "max_workers": int(os.getenv("SPIDER_MAX_WORKERS", "4")),  # 同时运行的平台数量
     }
 }
 
@@ -75,7 +209,33 @@ PARSE_CONFIG = {
     "support_formats": ["pdf", "docx", "doc"],  # 支持的文件格式
     "ocr_lang": "chi_sim",  # OCR识别语言（中文）
     "tesseract_path": r"E:\标书ai匹配系统ByJohnjincaaa\a\Tesseract-OCR\Tesseract-OCR\tesseract.exe",
-    'poppler_path': r'E:\标书ai匹配系统ByJohnjincaaa\a\Release-24.02.0-0\poppler-24.02.0\Library\bin'
+    'poppler_path': r'E:\标书ai匹配系统ByJohnjincaaa\a\Release-24.02.0-0\poppler-24.02.0\Library\bin',
+    # 并行解析进程数（0表示按CPU核数，1表示逐个解析；Windows下为0时逐个解析，Word COM不支持多进程同时操作）
+    "workers": int(os.getenv("PARSE_WORKERS", "0")),
+    # 解析工作进程限制（超时沿用 FileParser.parse_timeout_seconds，超过限制时终止工作进程）
+    "worker_memory_mb": int(os.getenv("PARSE_WORKER_MEMORY_MB", "2048")),  # 工作进程（含LibreOffice等子进程）常驻内存上限，0表示不限制
+    "worker_address_space_mb": int(os.getenv("PARSE_WORKER_ADDRESS_SPACE_MB", "8192")),  # 工作进程地址空间上限（仅Unix），0表示不限制
+    "max_tasks_per_worker": 50,  # 每个工作进程解析多少个文件后重建（避免内存泄漏累积），0表示不限制
+    "worker_poll_interval": 0.5,  # 检查超时和内存的间隔（秒）
+    # PDF文本提取（parser/pdf_backend.py）
+    "pdf": {
+        "backend": os.getenv("PARSE_PDF_BACKEND", "pymupdf"),  # 首选后端：pymupdf / pypdf2（失败时使用另一个）
+        "parallel_min_pages": 200,  # 页数不少于该值时按页码范围多进程并行提取（进程启动有开销，小文档不并行）
+        "page_workers": 0,  # 并行提取进程数（0表示CPU核数平分给各解析进程、至少2个，1表示不并行）
+        # 逐页OCR：只对文本层缺失的页（扫描页）做OCR，结果按页码顺序合并到文本中
+        "page_ocr": os.getenv("PARSE_PDF_PAGE_OCR", "true").lower() == "true",
+        "ocr_min_text_chars": 20,  # 文本层字符数（去除空白）少于该值的页视为扫描页
+        "ocr_image_coverage": 0.6,  # 图片覆盖页面面积不低于该比例…
+        "ocr_image_page_max_chars": 200,  # …且字符数少于该值的页也视为扫描页（扫描件上只有页眉、页码等）
+        "ocr_dpi": 200,  # OCR前渲染页面的分辨率
+    },
+    # 解析结果缓存：按（文件内容SHA-256, 格式, 解析器版本, 解析选项）缓存压缩后的解析文本
+    "cache": {
+        "enabled": os.getenv("PARSE_CACHE", "true").lower() == "true",
+        "cache_dir": os.path.join(BASE_DIR, "parse_cache"),
+        "max_size_mb": 2048,  # 缓存总大小上限，超过时删除最久未使用的条目
+        "compress_level": 6,  # zlib 压缩级别（1-9）
+    },
 }
 
 # 存储与清理配置
@@ -86,7 +246,12 @@ STORAGE_CONFIG = {
     "cleanup_schedule": "daily",           # 清理频率：daily/weekly/monthly
     "cleanup_time": "02:00",               # 清理执行时间（24小时制 HH:MM）
     "disk_warning_threshold": 80.0,        # 磁盘使用率告警阈值（%）
-    "disk_critical_threshold": 90.0        # 磁盘使用率严重告警阈值（%）
+    "disk_critical_threshold": 90.0,       # 磁盘使用率严重告警阈值（%）
+    # 内容寻址存储：下载的标书文件按 SHA-256 保存，内容相同的项目共用一份文件及解析/AI提取结果
+    "blob_store": {
+        "enabled": True,
+        "blob_dir": os.path.join(FILES_DIR, "blobs"),
+    },
 }
 
 # AI配置 - 支持本地和云模型两套流程
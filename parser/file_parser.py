@@ -1,4 +1,6 @@
+import io
 import os
+import re
 import logging
 import zipfile
 import shutil
@@ -8,9 +10,13 @@ import win32com.client  # 用于处理.doc文件
 import pythoncom
 from sqlalchemy.orm import Session
 from utils.db import get_db, update_project, TenderProject
+from utils.blob_store import is_blob
+from parser.parse_worker import ParseWorkerPool, OK, TIMEOUT
+from parser.parse_cache import parse_cache
+from parser import pdf_backend
 import time
 import platform
-import threading
+from collections import deque
 from functools import wraps
 
 # 新增：用于处理rar文件和xlsx文件
@@ -34,13 +40,7 @@ except ImportError:
 
 import psutil
 
-# 可选依赖：PDF和OCR相关（如果未安装，相应功能将不可用）
-try:
-    import PyPDF2
-    PYPDF2_AVAILABLE = True
-except ImportError:
-    PYPDF2_AVAILABLE = False
-
+# 可选依赖：OCR相关（如果未安装，相应功能将不可用；PDF文本提取库见 parser.pdf_backend）
 try:
     from PIL import Image
     PIL_AVAILABLE = True
@@ -60,6 +60,10 @@ except ImportError:
     PDF2IMAGE_AVAILABLE = False
 
 
+# 解析器版本（修改解析逻辑、使已缓存的解析结果失效时递增，见 parser.parse_cache）
+PARSER_VERSION = 3
+
+
 class FileParser:
     """文件解析器（修复版）"""
 
@@ -73,6 +77,11 @@ class FileParser:
         self.max_file_size_mb = 50  # 最大文件大小（MB），超过此大小会警告
         self.parse_timeout_seconds = 300  # 单个文件解析超时时间（5分钟）
         self.ocr_timeout_seconds = 600  # OCR 解析超时时间（10分钟）
+        # 是否在解析过程中直接写库（并行解析的工作进程中为False，由主进程统一写库）
+        self.write_db = True
+        # 不写库时，压缩包解压后的新文件路径 {项目ID: 新文件路径}
+        self.file_path_updates = {}
+        self._truncated = False
         
         # 检查Word COM组件是否可用（云端环境检测）
         self._word_com_available = self._check_word_com_availability()
@@ -489,16 +498,15 @@ class FileParser:
                 
                 if all_content:
                     # 解析成功后删除原zip文件，只保留解压后的文件夹
+                    # （内容寻址存储中的压缩包可能被其他项目共用，保留不删除）
                     try:
-                        os.remove(file_path)
-                        self.logger.info(f"解析完成后删除原zip文件：{file_path}")
+                        if not is_blob(file_path):
+                            os.remove(file_path)
+                            self.logger.info(f"解析完成后删除原zip文件：{file_path}")
                         
                         # 更新数据库中的file_path字段
                         if project_id:
                             try:
-                                # 获取数据库会话
-                                db: Session = next(get_db())
-                                
                                 # 确定新的文件路径
                                 if tender_files:
                                     if len(tender_files) == 1:
@@ -511,9 +519,15 @@ class FileParser:
                                     # 如果没有找到招标文件，指向解压目录
                                     new_file_path = os.path.splitext(file_path)[0]
                                 
-                                # 更新数据库
-                                update_project(db, project_id, {"file_path": new_file_path})
-                                self.logger.info(f"更新项目文件路径：{project_id} -> {new_file_path}")
+                                if not self.write_db:
+                                    # 并行解析的工作进程不写库，由主进程随解析结果一并更新
+                                    self.file_path_updates[project_id] = new_file_path
+                                else:
+                                    # 获取数据库会话
+                                    db: Session = next(get_db())
+                                    # 更新数据库
+                                    update_project(db, project_id, {"file_path": new_file_path})
+                                    self.logger.info(f"更新项目文件路径：{project_id} -> {new_file_path}")
                             except Exception as db_e:
                                 self.logger.error(f"更新项目文件路径失败：{project_id}，错误：{str(db_e)}")
                     except Exception as e:
@@ -534,7 +548,21 @@ class FileParser:
                 self.logger.warning(f"文件过小（{file_size}字节），可能为空或损坏: {file_path}")
                 # 对于小文件，尝试解析，但添加警告
 
-            # 6. 根据格式解析
+            # 6. 根据格式解析（先查解析缓存：内容、格式、解析器版本和解析选项都相同时直接使用）
+            cache_key = None
+            if parse_cache.enabled:
+                try:
+                    cache_key = parse_cache.key(parse_cache.content_hash(file_path), file_ext, PARSER_VERSION,
+                                                self._parse_options())
+                    cached = parse_cache.get(cache_key)
+                except OSError as e:
+                    self.logger.warning(f"读取解析缓存失败：{str(e)}")
+                    cached = None
+                if cached:
+                    self.logger.info(f"命中解析缓存，内容长度: {len(cached)} 字符")
+                    return cached
+            # 解析因超时只得到部分内容时置为True（部分内容不缓存）
+            self._truncated = False
             if file_ext == 'pdf':
                 result = self._parse_pdf(file_path)
             elif file_ext == 'docx' or file_ext == 'docm':
@@ -554,6 +582,8 @@ class FileParser:
             if result:
                 if result.strip():
                     self.logger.info(f"文件解析成功，内容长度: {len(result)} 字符")
+                    if cache_key and not self._truncated:
+                        parse_cache.put(cache_key, result)
                     return result
                 else:
                     self.logger.warning(f"文件解析后内容为空: {file_path}")
@@ -570,6 +600,31 @@ class FileParser:
         finally:
             self.logger.info(f"========== 文件解析结束 ==========")
 
+    def _parse_options(self):
+        """影响解析结果的选项（参与解析缓存键，选项变化后缓存自动失效）"""
+        return {
+            "word_com": bool(self._word_com_available),
+            "ocr": PIL_AVAILABLE and PYTESSERACT_AVAILABLE and PDF2IMAGE_AVAILABLE,
+            # 不同后端提取的文本（换行、空白）不完全相同
+            "pdf_backend": next((backend.name for backend in pdf_backend.backend_order()), None),
+            "pdf_page_ocr": self._page_ocr_options(),
+        }
+
+    @staticmethod
+    def _page_ocr_options():
+        """逐页OCR的配置（未启用或OCR不可用时为None）"""
+        from config import PARSE_CONFIG
+
+        config = PARSE_CONFIG.get("pdf", {})
+        if not config.get("page_ocr", True) or not PIL_AVAILABLE or not PYTESSERACT_AVAILABLE:
+            return None
+        if not (pdf_backend.PYMUPDF_AVAILABLE or PDF2IMAGE_AVAILABLE):
+            return None
+        options = {name: config.get(name) for name in
+                   ("ocr_min_text_chars", "ocr_image_coverage", "ocr_image_page_max_chars", "ocr_dpi")}
+        options["ocr_lang"] = PARSE_CONFIG.get("ocr_lang", "chi_sim")
+        return options
+
     def _parse_doc_with_libreoffice(self, file_path):
         """使用LibreOffice命令行工具将DOC转换为DOCX，然后解析（备用方案）"""
         try:
@@ -1688,7 +1743,7 @@ class FileParser:
             return None
 
     def _parse_pdf(self, file_path):
-        """解析PDF文件（增强版：添加进度和超时控制）"""
+        """解析PDF文件（增强版：添加进度和超时控制，文本提取后端见 parser.pdf_backend）"""
         start_time = time.time()
         
         try:
@@ -1700,33 +1755,36 @@ class FileParser:
             self.logger.info(f"开始解析PDF文件：{file_path}（大小：{file_size_mb:.2f}MB）")
             
             # 普通PDF解析
-            if not PYPDF2_AVAILABLE:
-                self.logger.error("PyPDF2未安装，无法解析PDF文件。请安装：pip install PyPDF2")
+            if not pdf_backend.backend_order():
+                self.logger.error("PyMuPDF和PyPDF2均未安装，无法解析PDF文件。请安装：pip install PyMuPDF")
                 return None
             
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                total_pages = len(reader.pages)
-                self.logger.info(f"PDF文件共 {total_pages} 页")
-                
-                text = []
-                for i, page in enumerate(reader.pages, 1):
-                    # 每10页输出一次进度
-                    if i % 10 == 0 or i == total_pages:
-                        self.logger.debug(f"PDF解析进度：{i}/{total_pages} 页")
-                    
-                    page_text = page.extract_text()
-                    if page_text:
-                        text.append(page_text.strip())
-                    
-                    # 检查超时
-                    if time.time() - start_time > self.parse_timeout_seconds:
-                        self.logger.error(f"PDF解析超时，已解析 {i}/{total_pages} 页")
-                        break
-                
-                elapsed = time.time() - start_time
-                self.logger.info(f"PDF文件解析完成，耗时：{elapsed:.2f}秒")
-                return '\n'.join(text)
+            pages, backend_name, total_pages = pdf_backend.extract_text(
+                file_path, deadline=start_time + self.parse_timeout_seconds)
+            if len(pages) < total_pages:
+                self.logger.error(f"PDF解析超时，已解析 {len(pages)}/{total_pages} 页")
+                self._truncated = True
+            
+            # 文本层缺失的页（扫描页）逐页OCR，按页码顺序合并回原位置：
+            # 文本层为空的页用OCR结果替换，有少量真实文本（标题、代理机构等）的图片页把OCR结果补充在其后
+            scanned = pdf_backend.classify_pages(file_path, pages)
+            if scanned:
+                if self._page_ocr_options() is None:
+                    self.logger.warning(f"PDF中有 {len(scanned)} 页文本层缺失（疑似扫描页），逐页OCR未启用或不可用，跳过")
+                else:
+                    self.logger.info(f"PDF中有 {len(scanned)}/{len(pages)} 页文本层缺失，开始逐页OCR...")
+                    for index, page_text in self._ocr_pdf_pages(file_path, scanned).items():
+                        if not page_text.strip():
+                            continue
+                        if pdf_backend.has_text_layer(pages[index]):
+                            pages[index] = f"{pages[index].rstrip()}\n{page_text.strip()}"
+                        else:
+                            pages[index] = page_text
+            
+            text = [page_text.strip() for page_text in pages if page_text and page_text.strip()]
+            elapsed = time.time() - start_time
+            self.logger.info(f"PDF文件解析完成（{backend_name}，共 {total_pages} 页），耗时：{elapsed:.2f}秒")
+            return '\n'.join(text)
 
         except Exception as e:
             self.logger.warning(f"普通PDF解析失败，尝试OCR：{str(e)}")
@@ -1737,8 +1795,11 @@ class FileParser:
                 return None
             
             try:
+                from config import PARSE_CONFIG
+
                 self.logger.info("开始OCR解析PDF（此过程可能较慢）...")
                 ocr_start = time.time()
+                ocr_lang = PARSE_CONFIG.get("ocr_lang", "chi_sim")
                 
                 # 转换PDF为图片（限制页数，避免过慢）
                 images = pdf2image.convert_from_path(file_path)
@@ -1752,13 +1813,14 @@ class FileParser:
                         elapsed = time.time() - ocr_start
                         self.logger.info(f"OCR进度：{i}/{total_pages} 页，已耗时：{elapsed:.2f}秒")
                     
-                    page_text = pytesseract.image_to_string(image)
+                    page_text = pytesseract.image_to_string(image, lang=ocr_lang)
                     if page_text:
                         text.append(page_text.strip())
                     
                     # 检查OCR超时
                     if time.time() - ocr_start > self.ocr_timeout_seconds:
                         self.logger.error(f"OCR解析超时，已处理 {i}/{total_pages} 页")
+                        self._truncated = True
                         break
                 
                 elapsed = time.time() - ocr_start
@@ -1769,6 +1831,42 @@ class FileParser:
                 self.logger.error(f"PDF OCR解析失败：{str(ocr_error)}")
                 return None
 
+    def _ocr_pdf_pages(self, file_path, indices):
+        """
+        逐页渲染并OCR指定的页（PyMuPDF 渲染，未安装时使用 pdf2image）
+
+        Args:
+            indices: 页码列表（从0开始）
+
+        Returns:
+            dict: 页码 -> OCR文本（超时后未处理的页不包含在内）
+        """
+        from config import PARSE_CONFIG
+
+        dpi = PARSE_CONFIG.get("pdf", {}).get("ocr_dpi", 200)
+        ocr_lang = PARSE_CONFIG.get("ocr_lang", "chi_sim")
+        ocr_start = time.time()
+        results = {}
+        for i, index in enumerate(indices, 1):
+            if time.time() - ocr_start > self.ocr_timeout_seconds:
+                self.logger.error(f"OCR解析超时，已处理 {i - 1}/{len(indices)} 页")
+                self._truncated = True
+                break
+            try:
+                if pdf_backend.PYMUPDF_AVAILABLE:
+                    image = Image.open(io.BytesIO(pdf_backend.render_page(file_path, index, dpi)))
+                else:
+                    image = pdf2image.convert_from_path(file_path, dpi=dpi, first_page=index + 1,
+                                                        last_page=index + 1)[0]
+                results[index] = pytesseract.image_to_string(image, lang=ocr_lang) or ""
+            except Exception as e:
+                self.logger.warning(f"第 {index + 1} 页OCR失败：{str(e)}")
+            # 每5页输出一次进度
+            if i % 5 == 0 or i == len(indices):
+                elapsed = time.time() - ocr_start
+                self.logger.info(f"OCR进度：{i}/{len(indices)} 页，已耗时：{elapsed:.2f}秒")
+        return results
+
     def _parse_txt(self, file_path):
         """解析TXT文件"""
         try:
@@ -1852,23 +1950,211 @@ class FileParser:
             self.logger.error(traceback.format_exc())
             return None
 
-    
 
-    def run(self, project_ids=None):
+    def _next_fail_count(self, previous_msg, current_msg, compare_base=True):
+        """根据上次的 error_msg 计算本次是第几次解析失败
+        
+        Args:
+            previous_msg: 项目上次的错误信息
+            current_msg: 本次的错误信息
+            compare_base: 上次没有失败计数时，是否按错误类型判断重复失败
+        """
+        if not previous_msg:
+            return 1
+        match = re.search(r'\[解析失败(\d+)次\]', previous_msg)
+        if match:
+            return int(match.group(1)) + 1  # 增加失败次数
+        if compare_base:
+            # 如果没有失败计数，检查是否是相同类型的错误（去掉失败次数标记）
+            base_error = re.sub(r'\[解析失败\d+次\].*', '', previous_msg).strip()
+            current_base_error = re.sub(r'\[解析失败\d+次\].*', '', current_msg).strip()
+            if base_error == current_base_error or current_base_error in base_error:
+                return 2  # 相同错误，设为2次（下次就是3次）
+        return 1  # 不同错误，重新计数
+
+    def _mark_parse_failure(self, db, project, error_msg, parse_fail_count):
+        """记录解析失败：失败3次及以上标记为跳过，否则重置为DOWNLOADED等待重试"""
+        from utils.db import ProjectStatus
+
+        if parse_fail_count >= 3:
+            error_msg = f"{error_msg} [解析失败{parse_fail_count}次] [跳过-多次失败]"
+            self.logger.warning(f"⚠️ 项目 {project.project_name}（ID：{project.id}）已失败{parse_fail_count}次，标记为跳过，不再尝试解析")
+            update_project(db, project.id, {
+                "status": ProjectStatus.ERROR,
+                "error_msg": error_msg
+            })
+        else:
+            error_msg = f"{error_msg} [解析失败{parse_fail_count}次]"
+            # 自动重试：重置状态为DOWNLOADED，让它重新进入解析流程
+            self.logger.info(f"🔄 项目 {project.project_name}（ID：{project.id}）解析失败第{parse_fail_count}次，自动重置状态准备重试")
+            update_project(db, project.id, {
+                "status": ProjectStatus.DOWNLOADED,  # 重置为DOWNLOADED状态，下次解析时会重新处理
+                "error_msg": error_msg,
+                "evaluation_content": None  # 清空之前可能的部分解析内容
+            })
+        self.logger.error(f"❌ 解析失败：{project.project_name}（{error_msg}）")
+
+    def _prepare_parse(self, db, project):
+        """解析前检查项目文件（文件路径、内容相同项目复用、文件是否存在、大小、格式）
+        
+        Returns:
+            tuple: (outcome, file_path)，outcome 为 "parse"（需要解析）、"reused"（复用解析结果）、
+                   "skipped"（文件路径为空）或 "error"（文件不存在、损坏或格式不支持）
+        """
+        from utils.db import ProjectStatus, find_same_content_project
+        from config import FILES_DIR
+
+        # 检查文件路径
+        file_path = project.file_path
+        if not file_path:
+            update_project(db, project.id, {
+                "status": ProjectStatus.ERROR,
+                "error_msg": "文件路径为空，可能是下载失败"
+            })
+            self.logger.warning(f"跳过项目 {project.project_name}：文件路径为空")
+            return "skipped", None
+
+        # 文件内容相同的项目已解析过时直接复用解析结果
+        donor = find_same_content_project(db, project, "evaluation_content")
+        if donor:
+            update_project(db, project.id, {
+                "evaluation_content": donor.evaluation_content,
+                "file_path": donor.file_path,
+                "status": ProjectStatus.PARSED,
+                "error_msg": None
+            })
+            self.logger.info(f"✅ 文件内容与项目 {donor.id} 相同，复用解析结果：{project.project_name}")
+            return "reused", file_path
+
+        # 处理相对路径
+        if not os.path.isabs(file_path):
+            file_path = os.path.join(FILES_DIR, file_path)
+
+        # 检查文件是否存在
+        if not os.path.exists(file_path):
+            update_project(db, project.id, {
+                "status": ProjectStatus.ERROR,
+                "error_msg": f"文件不存在：{file_path}"
+            })
+            self.logger.warning(f"跳过项目 {project.project_name}：文件不存在")
+            return "error", file_path
+
+        # 检查文件大小，小文件可能是空文件或损坏文件
+        file_size = os.path.getsize(file_path)
+        # 降低阈值到2KB，并添加文件头检查，避免误判有效文件
+        if file_size < 2048:  # 小于2KB的文件，很可能是空文件或损坏文件
+            # 对于非常小的文件，检查文件头是否有效
+            is_valid_file = False
+            try:
+                with open(file_path, 'rb') as f:
+                    header = f.read(8)
+                    # 检查是否是有效的Word文档（OLE2格式）
+                    if header[:8] == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1':
+                        is_valid_file = True
+                    # 检查是否是有效的DOCX/ZIP格式
+                    elif header[:2] == b'PK':
+                        is_valid_file = True
+                    # 检查是否是PDF格式
+                    elif header[:4] == b'%PDF':
+                        is_valid_file = True
+            except:
+                pass
+
+            if not is_valid_file:
+                update_project(db, project.id, {
+                    "status": ProjectStatus.ERROR,
+                    "error_msg": f"文件过小（{file_size}字节），可能是空文件或损坏文件"
+                })
+                self.logger.warning(f"跳过项目 {project.project_name}：文件过小（{file_size}字节）且文件头无效")
+                return "error", file_path
+            else:
+                self.logger.info(f"文件较小（{file_size}字节），但文件头有效，继续解析：{project.project_name}")
+
+        # 检查文件扩展名
+        file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+        if file_ext not in self.supported_formats:
+            # 检查是否是压缩文件
+            if file_ext not in self.archive_formats:
+                update_project(db, project.id, {
+                    "status": ProjectStatus.ERROR,
+                    "error_msg": f"不支持的文件格式：{file_ext}"
+                })
+                self.logger.warning(f"跳过项目 {project.project_name}：不支持的文件格式 {file_ext}")
+                return "error", file_path
+
+        self.logger.info(f"开始解析文件：{file_path}（大小：{file_size}字节）")
+        return "parse", file_path
+
+    def _record_parse_result(self, db, project, file_path, content, parse_error=None, timeout_occurred=False,
+                             new_file_path=None):
+        """记录一个文件的解析结果（完成时保存内容，超时或异常时更新失败次数）
+        
+        Args:
+            new_file_path: 压缩包解压后的新文件路径（工作进程不写库，由主进程一并更新）
+        
+        Returns:
+            bool: 是否解析成功
+        """
+        from utils.db import ProjectStatus
+
+        # 如果超时，更新错误信息并继续处理下一个文件
+        if timeout_occurred:
+            error_msg = f"文件解析超时（超过{self.parse_timeout_seconds}秒）"
+            self._mark_parse_failure(db, project, error_msg,
+                                     self._next_fail_count(project.error_msg, error_msg, compare_base=False))
+            return False
+
+        # 如果解析异常（非超时），也更新错误信息
+        if parse_error:
+            error_msg = f"解析异常：{str(parse_error)[:200]}"
+            self._mark_parse_failure(db, project, error_msg, self._next_fail_count(project.error_msg, str(parse_error)))
+            return False
+
+        # 没有超时和异常即视为解析完成（与逐个解析时一致，内容为空也记为已解析）
+        if content:
+            self.logger.info(f"解析成功，内容长度：{len(content)}字符")
+        else:
+            self.logger.warning(f"解析完成但内容为空：{project.project_name}，文件路径：{file_path}")
+        # 修复字段名错误（evaluation_content而非content）
+        updates = {
+            "evaluation_content": content,
+            "status": ProjectStatus.PARSED
+        }
+        if new_file_path:
+            updates["file_path"] = new_file_path
+            self.logger.info(f"更新项目文件路径：{project.id} -> {new_file_path}")
+        update_project(db, project.id, updates)
+        return True
+
+    def _record_unexpected_error(self, db, project, e):
+        """记录解析流程中未预料的异常（同样计入失败次数）"""
+        import traceback
+
+        base_error_msg = f"{str(e)} \n {traceback.format_exc()[:500]}"  # 增加堆栈信息
+        # 检查失败次数：通过error_msg中的失败计数来判断
+        parse_fail_count = 1
+        if project.error_msg:
+            match = re.search(r'\[解析失败(\d+)次\]', project.error_msg)
+            # 如果error_msg相似（包含相同的错误类型），说明是重复失败
+            if str(e) in project.error_msg or project.error_msg in str(e):
+                parse_fail_count = (int(match.group(1)) if match else 0) + 1
+        self._mark_parse_failure(db, project, base_error_msg, parse_fail_count)
+        self.logger.error(f"❌ 处理项目失败 {project.project_name}：{str(e)}")
+
+    def run(self, project_ids=None, workers=None):
         """批量解析文件（增强版，支持zip文件，添加进程清理）
         
         Args:
             project_ids: 可选，指定要解析的项目ID列表，若为None则解析所有待处理项目
+            workers: 并行解析进程数（None时使用 PARSE_CONFIG["workers"]，1表示逐个解析）
         """
-        from utils.db import get_db, TenderProject, update_project, ProjectStatus
-        from config import FILES_DIR
-        import traceback  # 新增
+        from utils.db import get_db, TenderProject, ProjectStatus
+        from sqlalchemy import or_
 
         # === 关键修复：开始前清理所有Word进程 ===
         self._kill_word_processes()
 
         db = next(get_db())
-        from sqlalchemy import or_
         # 构建查询
         # 排除已经标记为多次失败的项目（error_msg中包含"[跳过-多次失败]"标记）
         query = db.query(TenderProject).filter(
@@ -1888,327 +2174,153 @@ class FileParser:
 
         self.logger.info(f"待解析项目数：{len(projects)}")
         
+        workers = min(parse_workers() if workers is None else max(int(workers), 1), max(len(projects), 1))
         total_start_time = time.time()
+        if workers > 1:
+            self.logger.info(f"使用 {workers} 个进程并行解析")
+        processed_count, success_count, error_count = self._run_workers(db, projects, workers, total_start_time)
+
+        # === 关键修复：最后清理一次 ===
+        self._kill_word_processes()
+        parse_cache.prune()
+
+        db.close()
+        total_elapsed = time.time() - total_start_time
+        self.logger.info("=" * 60)
+        self.logger.info(f"文件解析完成！")
+        self.logger.info(f"总计：{processed_count} 个，成功：{success_count} 个，失败：{error_count} 个")
+        self.logger.info(f"总耗时：{total_elapsed:.2f}秒，平均：{total_elapsed/processed_count if processed_count > 0 else 0:.2f}秒/个")
+
+    def _log_progress(self, project, total, processed_count, success_count, error_count, total_start_time):
+        elapsed = time.time() - total_start_time
+        avg_time = elapsed / processed_count if processed_count > 0 else 0
+        remaining = total - processed_count
+        estimated_remaining_time = avg_time * remaining if remaining > 0 else 0
+        self.logger.info(f"✅ 解析成功：{project.project_name}（成功：{success_count}，失败：{error_count}，预计剩余：{estimated_remaining_time:.0f}秒）")
+
+    def _run_workers(self, db, projects, workers, total_start_time):
+        """在隔离的工作进程中解析项目（workers 为1时逐个解析）
+        
+        工作进程不访问数据库；解析结果回到主进程，由主进程统一写库（失败次数、自动重试等记录方式不变）。
+        超过 parse_timeout_seconds 或内存超过上限的解析直接终止工作进程（见 parser.parse_worker），
+        不会在后台残留；工作进程异常退出只影响它正在解析的文件。
+        内容相同（content_hash 相同）的项目不同时解析，等前一个解析完成后直接复用结果。
+        
+        Returns:
+            tuple: (处理数, 成功数, 失败数)
+        """
         processed_count = 0
         success_count = 0
         error_count = 0
+        queue = deque(projects)
+        deferred = {}  # content_hash -> 等待同内容项目解析完成的项目
+        running_hashes = set()
+        pool = ParseWorkerPool(workers, self.parse_timeout_seconds)
 
-        for idx, project in enumerate(projects, 1):
-            try:
-                self.logger.info(f"[{idx}/{len(projects)}] 开始解析项目：{project.project_name}（ID：{project.id}）")
-                processed_count += 1
-
-                # === 关键修复：每2个文件清理一次进程 ===
-                if idx > 1 and idx % 2 == 0:
-                    self.logger.info(f"清理Word进程（已处理 {idx} 个文件）...")
-                    self._kill_word_processes()
-                    time.sleep(0.5)
+        try:
+            while queue or pool.running:
+                # 补充任务：同时进行的解析不超过进程数
+                while queue and pool.has_capacity():
+                    project = queue.popleft()
+                    if project.content_hash and project.content_hash in running_hashes:
+                        deferred.setdefault(project.content_hash, []).append(project)
+                        continue
+                    processed_count += 1
+                    self.logger.info(f"[{processed_count}/{len(projects)}] 开始解析项目：{project.project_name}（ID：{project.id}）")
 
-                # 检查文件路径
-                file_path = project.file_path
-                if not file_path:
-                    update_project(db, project.id, {
-                        "status": ProjectStatus.ERROR,
-                        "error_msg": "文件路径为空，可能是下载失败"
-                    })
-                    self.logger.warning(f"跳过项目 {project.project_name}：文件路径为空")
-                    continue
+                    # === 关键修复：逐个解析时每2个文件清理一次Word进程（并行时会影响其他进程正在使用的Word） ===
+                    if workers == 1 and processed_count > 1 and processed_count % 2 == 0:
+                        self.logger.info(f"清理Word进程（已处理 {processed_count} 个文件）...")
+                        self._kill_word_processes()
+                        time.sleep(0.5)
 
-                # 处理相对路径
-                if not os.path.isabs(file_path):
-                    file_path = os.path.join(FILES_DIR, file_path)
-
-                # 检查文件是否存在
-                if not os.path.exists(file_path):
-                    update_project(db, project.id, {
-                        "status": ProjectStatus.ERROR,
-                        "error_msg": f"文件不存在：{file_path}"
-                    })
-                    self.logger.warning(f"跳过项目 {project.project_name}：文件不存在")
-                    error_count += 1
-                    continue
-                
-                # 检查文件大小，小文件可能是空文件或损坏文件
-                file_size = os.path.getsize(file_path)
-                # 降低阈值到2KB，并添加文件头检查，避免误判有效文件
-                if file_size < 2048:  # 小于2KB的文件，很可能是空文件或损坏文件
-                    # 对于非常小的文件，检查文件头是否有效
-                    is_valid_file = False
                     try:
-                        with open(file_path, 'rb') as f:
-                            header = f.read(8)
-                            # 检查是否是有效的Word文档（OLE2格式）
-                            if header[:8] == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1':
-                                is_valid_file = True
-                            # 检查是否是有效的DOCX/ZIP格式
-                            elif header[:2] == b'PK':
-                                is_valid_file = True
-                            # 检查是否是PDF格式
-                            elif header[:4] == b'%PDF':
-                                is_valid_file = True
-                    except:
-                        pass
-                    
-                    if not is_valid_file:
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.ERROR,
-                            "error_msg": f"文件过小（{file_size}字节），可能是空文件或损坏文件"
-                        })
-                        self.logger.warning(f"跳过项目 {project.project_name}：文件过小（{file_size}字节）且文件头无效")
+                        outcome, file_path = self._prepare_parse(db, project)
+                    except Exception as e:
                         error_count += 1
+                        self._record_unexpected_error(db, project, e)
                         continue
-                    else:
-                        self.logger.info(f"文件较小（{file_size}字节），但文件头有效，继续解析：{project.project_name}")
-                
-                # 检查文件扩展名
-                file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
-                if file_ext not in self.supported_formats:
-                    # 检查是否是压缩文件
-                    if file_ext not in self.archive_formats:
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.ERROR,
-                            "error_msg": f"不支持的文件格式：{file_ext}"
-                        })
-                        self.logger.warning(f"跳过项目 {project.project_name}：不支持的文件格式 {file_ext}")
+                    if outcome == "reused":
+                        success_count += 1
+                    elif outcome == "error":
                         error_count += 1
-                        continue
-                
-                # 解析文件（添加超时保护，使用线程实现真正的超时机制）
-                self.logger.info(f"开始解析文件：{file_path}（大小：{file_size}字节）")
-                parse_start_time = time.time()
-                
-                # 使用超时机制，防止单个文件解析卡住
-                content = None
-                parse_error = None
-                timeout_occurred = False
-                
-                def parse_with_timeout():
-                    """在单独线程中执行解析，支持超时中断"""
-                    nonlocal content, parse_error
+                    elif outcome == "parse":
+                        pool.submit((project, file_path), file_path, project.id)
+                        if project.content_hash:
+                            running_hashes.add(project.content_hash)
+
+                for result in pool.poll():
+                    project, file_path = result["task"]
+                    # 同内容的项目重新排队，检查时会直接复用本次解析结果
+                    running_hashes.discard(project.content_hash)
+                    queue.extendleft(reversed(deferred.pop(project.content_hash, [])))
+
+                    status = result["status"]
+                    parse_error = None
+                    if status == TIMEOUT:
+                        self.logger.error(f"⏱️ 文件解析超时（超过{self.parse_timeout_seconds}秒），已终止解析进程：{file_path}")
+                    elif status != OK:
+                        parse_error = RuntimeError(result["error"])
+                        self.logger.error(f"文件解析异常，耗时 {result['elapsed']:.2f}秒：{result['error']}")
+                    elif result["elapsed"] > 300:
+                        # 如果解析时间超过5分钟，记录警告
+                        self.logger.warning(f"⚠️ 文件解析耗时较长：{result['elapsed']:.2f}秒，文件：{file_path}")
+                    if status != OK and workers == 1:
+                        # 清理可能的残留进程
+                        self._kill_word_processes()
+
                     try:
-                        content = self.parse_file(file_path, project.id)
-                    except Exception as e:
-                        parse_error = e
-                
-                # 创建解析线程
-                parse_thread = threading.Thread(target=parse_with_timeout, daemon=True)
-                parse_thread.start()
-                
-                # 等待解析完成或超时
-                parse_thread.join(timeout=self.parse_timeout_seconds)
-                
-                parse_elapsed = time.time() - parse_start_time
-                
-                # 检查是否超时
-                if parse_thread.is_alive():
-                    timeout_occurred = True
-                    self.logger.error(f"⏱️ 文件解析超时（超过{self.parse_timeout_seconds}秒），强制中断：{file_path}")
-                    # 清理可能的残留进程
-                    self._kill_word_processes()
-                    # 等待一小段时间让线程有机会退出
-                    time.sleep(1)
-                    content = None
-                    parse_error = TimeoutError(f"文件解析超时（超过{self.parse_timeout_seconds}秒）")
-                elif parse_error:
-                    self.logger.error(f"文件解析异常，耗时 {parse_elapsed:.2f}秒：{str(parse_error)}")
-                    # 清理可能的残留进程
-                    self._kill_word_processes()
-                    content = None
-                elif parse_elapsed > 300:
-                    # 如果解析时间超过5分钟，记录警告
-                    self.logger.warning(f"⚠️ 文件解析耗时较长：{parse_elapsed:.2f}秒，文件：{file_path}")
-                
-                # 如果超时，更新错误信息并继续处理下一个文件
-                if timeout_occurred:
-                    # 检查失败次数
-                    parse_fail_count = 0
-                    import re
-                    if project.error_msg:
-                        match = re.search(r'\[解析失败(\d+)次\]', project.error_msg)
-                        if match:
-                            parse_fail_count = int(match.group(1)) + 1
+                        if self._record_parse_result(db, project, file_path, result["content"], parse_error,
+                                                     timeout_occurred=status == TIMEOUT,
+                                                     new_file_path=result["file_path"]):
+                            success_count += 1
+                            self._log_progress(project, len(projects), processed_count, success_count,
+                                               error_count, total_start_time)
                         else:
-                            parse_fail_count = 1
-                    else:
-                        parse_fail_count = 1
-                    
-                    error_msg = f"文件解析超时（超过{self.parse_timeout_seconds}秒）"
-                    if parse_fail_count >= 3:
-                        error_msg = f"{error_msg} [解析失败{parse_fail_count}次] [跳过-多次失败]"
-                        self.logger.warning(f"⚠️ 项目 {project.project_name}（ID：{project.id}）已失败{parse_fail_count}次，标记为跳过")
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.ERROR,
-                            "error_msg": error_msg
-                        })
-                    else:
-                        error_msg = f"{error_msg} [解析失败{parse_fail_count}次]"
-                        # 自动重试：重置状态为DOWNLOADED，让它重新进入解析流程
-                        self.logger.info(f"🔄 项目 {project.project_name}（ID：{project.id}）解析失败第{parse_fail_count}次，自动重置状态准备重试")
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.DOWNLOADED,  # 重置为DOWNLOADED状态，下次解析时会重新处理
-                            "error_msg": error_msg,
-                            "evaluation_content": None  # 清空之前可能的部分解析内容
-                        })
-                    error_count += 1
-                    self.logger.error(f"❌ 解析失败：{project.project_name}（{error_msg}）")
-                    continue  # 跳过当前文件，继续处理下一个
-                
-                # 如果解析异常（非超时），也更新错误信息
-                if parse_error and not timeout_occurred:
-                    # 检查失败次数
-                    parse_fail_count = 0
-                    import re
-                    if project.error_msg:
-                        match = re.search(r'\[解析失败(\d+)次\]', project.error_msg)
-                        if match:
-                            parse_fail_count = int(match.group(1)) + 1
-                        else:
-                            base_error = re.sub(r'\[解析失败\d+次\].*', '', project.error_msg).strip()
-                            current_base_error = re.sub(r'\[解析失败\d+次\].*', '', str(parse_error)).strip()
-                            if base_error == current_base_error or current_base_error in base_error:
-                                parse_fail_count = 2
-                            else:
-                                parse_fail_count = 1
-                    else:
-                        parse_fail_count = 1
-                    
-                    error_msg = f"解析异常：{str(parse_error)[:200]}"
-                    if parse_fail_count >= 3:
-                        error_msg = f"{error_msg} [解析失败{parse_fail_count}次] [跳过-多次失败]"
-                        self.logger.warning(f"⚠️ 项目 {project.project_name}（ID：{project.id}）已失败{parse_fail_count}次，标记为跳过")
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.ERROR,
-                            "error_msg": error_msg
-                        })
-                    else:
-                        error_msg = f"{error_msg} [解析失败{parse_fail_count}次]"
-                        # 自动重试：重置状态为DOWNLOADED，让它重新进入解析流程
-                        self.logger.info(f"🔄 项目 {project.project_name}（ID：{project.id}）解析失败第{parse_fail_count}次，自动重置状态准备重试")
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.DOWNLOADED,  # 重置为DOWNLOADED状态，下次解析时会重新处理
-                            "error_msg": error_msg,
-                            "evaluation_content": None  # 清空之前可能的部分解析内容
-                        })
-                    error_count += 1
-                    self.logger.error(f"❌ 解析失败：{project.project_name}（{error_msg}）")
-                    continue  # 跳过当前文件，继续处理下一个
-                
-                # 详细记录解析结果（只有在没有超时和异常的情况下才处理）
-                if not timeout_occurred and not parse_error:
-                    if content:
-                        content_length = len(content) if content else 0
-                        self.logger.info(f"解析成功，内容长度：{content_length}字符")
-                    # 修复字段名错误（evaluation_content而非content）
-                    update_project(db, project.id, {
-                        "evaluation_content": content,
-                        "status": ProjectStatus.PARSED
-                    })
-                    success_count += 1
-                    elapsed = time.time() - total_start_time
-                    avg_time = elapsed / processed_count if processed_count > 0 else 0
-                    remaining = len(projects) - processed_count
-                    estimated_remaining_time = avg_time * remaining if remaining > 0 else 0
-                    self.logger.info(f"✅ 解析成功：{project.project_name}（成功：{success_count}，失败：{error_count}，预计剩余：{estimated_remaining_time:.0f}秒）")
-                else:
-                    self.logger.error(f"❌ 解析失败：{project.project_name}（内容为空），文件路径：{file_path}")
-                    # 检查文件是否存在
-                    if not os.path.exists(file_path):
-                        error_msg = f"文件不存在：{file_path}"
-                    else:
-                        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                        error_msg = f"解析内容为空（文件大小：{file_size}字节）"
-                    
-                    # 检查失败次数：通过error_msg中的失败计数来判断
-                    parse_fail_count = 0
-                    import re
-                    if project.error_msg:
-                        # 检查error_msg中是否包含失败计数标记
-                        match = re.search(r'\[解析失败(\d+)次\]', project.error_msg)
-                        if match:
-                            parse_fail_count = int(match.group(1)) + 1  # 增加失败次数
-                        else:
-                            # 如果没有失败计数，检查是否是相同类型的错误
-                            # 提取错误类型（去掉失败次数标记）
-                            base_error = re.sub(r'\[解析失败\d+次\].*', '', project.error_msg).strip()
-                            current_base_error = re.sub(r'\[解析失败\d+次\].*', '', error_msg).strip()
-                            if base_error == current_base_error or current_base_error in base_error:
-                                parse_fail_count = 2  # 相同错误，设为2次（下次就是3次）
-                            else:
-                                parse_fail_count = 1  # 不同错误，重新计数
-                    else:
-                        parse_fail_count = 1
-                    
-                    # 如果失败次数达到3次，标记为跳过
-                    if parse_fail_count >= 3:
-                        error_msg = f"{error_msg} [解析失败{parse_fail_count}次] [跳过-多次失败]"
-                        self.logger.warning(f"⚠️ 项目 {project.project_name}（ID：{project.id}）已失败{parse_fail_count}次，标记为跳过，不再尝试解析")
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.ERROR,
-                            "error_msg": error_msg
-                        })
-                    else:
-                        error_msg = f"{error_msg} [解析失败{parse_fail_count}次]"
-                        # 自动重试：重置状态为DOWNLOADED，让它重新进入解析流程
-                        self.logger.info(f"🔄 项目 {project.project_name}（ID：{project.id}）解析失败第{parse_fail_count}次，自动重置状态准备重试")
-                        update_project(db, project.id, {
-                            "status": ProjectStatus.DOWNLOADED,  # 重置为DOWNLOADED状态，下次解析时会重新处理
-                            "error_msg": error_msg,
-                            "evaluation_content": None  # 清空之前可能的部分解析内容
-                        })
-                    error_count += 1
-                    self.logger.error(f"❌ 解析失败：{project.project_name}（{error_msg}）")
+                            error_count += 1
+                    except Exception as e:
+                        error_count += 1
+                        self._record_unexpected_error(db, project, e)
+        finally:
+            pool.close()
 
-            except Exception as e:
-                error_count += 1
-                base_error_msg = f"{str(e)} \n {traceback.format_exc()[:500]}"  # 增加堆栈信息
-                
-                # 检查失败次数：通过error_msg中的失败计数来判断
-                parse_fail_count = 0
-                if project.error_msg:
-                    # 检查error_msg中是否包含失败计数标记
-                    import re
-                    match = re.search(r'\[解析失败(\d+)次\]', project.error_msg)
-                    if match:
-                        parse_fail_count = int(match.group(1))
-                    # 如果error_msg相似（包含相同的错误类型），说明是重复失败
-                    if project.error_msg and (str(e) in project.error_msg or project.error_msg in str(e)):
-                        parse_fail_count += 1
-                    else:
-                        parse_fail_count = 1
-                else:
-                    parse_fail_count = 1
-                
-                # 如果失败次数达到3次，标记为跳过
-                if parse_fail_count >= 3:
-                    error_msg = f"{base_error_msg} [解析失败{parse_fail_count}次] [跳过-多次失败]"
-                    self.logger.warning(f"⚠️ 项目 {project.project_name}（ID：{project.id}）已失败{parse_fail_count}次，标记为跳过，不再尝试解析")
-                    update_project(db, project.id, {
-                        "status": ProjectStatus.ERROR,
-                        "error_msg": error_msg
-                    })
-                else:
-                    error_msg = f"{base_error_msg} [解析失败{parse_fail_count}次]"
-                    # 自动重试：重置状态为DOWNLOADED，让它重新进入解析流程
-                    self.logger.info(f"🔄 项目 {project.project_name}（ID：{project.id}）解析失败第{parse_fail_count}次，自动重置状态准备重试")
-                    update_project(db, project.id, {
-                        "status": ProjectStatus.DOWNLOADED,  # 重置为DOWNLOADED状态，下次解析时会重新处理
-                        "error_msg": error_msg,
-                        "evaluation_content": None  # 清空之前可能的部分解析内容
-                    })
-                self.logger.error(f"❌ 处理项目失败 {project.project_name}：{str(e)}")
-                
-                # === 关键修复：出错时也清理进程 ===
-                self._kill_word_processes()
-                time.sleep(0.5)
-                continue
+        return processed_count, success_count, error_count
 
-        # === 关键修复：最后清理一次 ===
-        self._kill_word_processes()
 
-        db.close()
-        total_elapsed = time.time() - total_start_time
-        self.logger.info("=" * 60)
-        self.logger.info(f"文件解析完成！")
-        self.logger.info(f"总计：{processed_count} 个，成功：{success_count} 个，失败：{error_count} 个")
-        self.logger.info(f"总耗时：{total_elapsed:.2f}秒，平均：{total_elapsed/processed_count if processed_count > 0 else 0:.2f}秒/个")
-        self.logger.info("=" * 60)
\ No newline at end of file
+def parse_workers():
+    """并行解析进程数（PARSE_CONFIG["workers"]，0表示按CPU核数）
+    
+    Windows下默认逐个解析：DOC文件通过Word COM解析，Word不支持多进程同时操作。
+    """
+    from config import PARSE_CONFIG
+
+    workers = int(PARSE_CONFIG.get("workers", 0) or 0)
+    if workers > 0:
+        return workers
+    if platform.system() == "Windows":
+        return 1
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# 工作进程中的解析器（每个工作进程创建一次）
+_worker_parser = None
+
+
+def _init_parse_worker():
+    global _worker_parser
+    _worker_parser = FileParser()
+    # 工作进程不写库：压缩包解压后的新文件路径随解析结果返回，由主进程写库
+    _worker_parser.write_db = False
+
+
+def _parse_in_worker(file_path, project_id):
+    """在工作进程中解析单个文件
+    
+    Returns:
+        tuple: (解析内容, 压缩包解压后的新文件路径或None)
+    """
+    content = _worker_parser.parse_file(file_path, project_id)
+    return content, _worker_parser.file_path_updates.pop(project_id, None)
@@ -0,0 +1,142 @@
+"""解析结果缓存
+
+完整流程最多运行三轮，被重置为 DOWNLOADED 的项目每轮都从头解析（evaluation_content 已被清空，
+无法按 content_hash 从其他项目复用）；本地重复上传的同一文件也会再解析一次。
+DOC 文件经 LibreOffice 转换解析一次可能需要几分钟，这里把解析出的文本压缩保存到磁盘：
+- 缓存键为（文件内容 SHA-256, 文件格式, 解析器版本, 解析选项），解析逻辑或选项变化后自动失效
+  （修改解析逻辑时递增 file_parser.PARSER_VERSION）；
+- 文本用 zlib 压缩保存为 <cache_dir>/<键前两位>/<键>.z，先写临时文件再重命名，
+  多个解析进程同时读写也不会读到不完整的文件；
+- 只缓存解析成功（非空）的结果，解析失败的文件下次仍会重新解析；
+- 命中时更新文件修改时间，缓存总大小超过 max_size_mb 时按修改时间删除最久未使用的条目。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zlib
+
+from utils.blob_store import hash_file, is_blob
+
+logger = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """解析结果磁盘缓存（多进程安全）"""
+
+    def __init__(self, cache_dir=None, enabled=None, max_size_mb=None, compress_level=None):
+        from config import PARSE_CONFIG
+
+        config = PARSE_CONFIG.get("cache", {})
+        self.enabled = config.get("enabled", True) if enabled is None else enabled
+        self.cache_dir = os.path.abspath(cache_dir or config.get("cache_dir", "parse_cache"))
+        self.max_size_mb = config.get("max_size_mb", 2048) if max_size_mb is None else max_size_mb
+        self.compress_level = config.get("compress_level", 6) if compress_level is None else compress_level
+
+    @staticmethod
+    def content_hash(file_path):
+        """文件内容的 SHA-256（内容寻址存储中的文件直接取文件名）"""
+        if is_blob(file_path):
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            if len(name) == 64:
+                return name
+        return hash_file(file_path)
+
+    @staticmethod
+    def key(sha256, file_format, parser_version, options=None):
+        """缓存键：（内容哈希, 格式, 解析器版本, 解析选项）的 SHA-256"""
+        raw = json.dumps([sha256, file_format, str(parser_version), options or {}], sort_keys=True,
+                         ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.z")
+
+    def get(self, key):
+        """
+        读取缓存的解析文本
+
+        Returns:
+            str 或 None: 未命中或缓存损坏时返回None
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+        except (OSError, zlib.error, UnicodeDecodeError) as e:
+            logger.warning(f"解析缓存读取失败（将重新解析）：{path}，{str(e)}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key, text):
+        """保存解析文本（空文本不缓存）"""
+        if not self.enabled or not text or not text.strip():
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = zlib.compress(text.encode("utf-8"), self.compress_level)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+            logger.debug(f"解析结果已缓存：{path}（{len(text)}字符 -> {len(data)}字节）")
+        except OSError as e:
+            logger.warning(f"保存解析缓存失败：{str(e)}")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def prune(self):
+        """缓存总大小超过 max_size_mb 时删除最久未使用的条目
+
+        Returns:
+            int: 删除的条目数
+        """
+        if not self.enabled or not self.max_size_mb or not os.path.isdir(self.cache_dir):
+            return 0
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        limit = self.max_size_mb * 1024 * 1024
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"解析缓存超过 {self.max_size_mb}MB，已删除 {removed} 个最久未使用的条目")
+        return removed
+
+
+# 全局解析缓存
+parse_cache = ParseCache()
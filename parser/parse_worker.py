@@ -0,0 +1,258 @@
+"""隔离的解析工作进程
+
+原先单个文件解析超过 parse_timeout_seconds 时只是记录超时并继续，解析线程无法终止，
+仍在后台消耗 CPU 和内存，异常的 PDF 越多，残留的线程越多；并行解析使用的进程池也无法
+单独终止卡住的工作进程。这里每个工作进程通过各自的管道接收任务，由主进程监控：
+- 超过解析超时时间时终止工作进程（连同其启动的 LibreOffice 等子进程）；
+- 工作进程（含子进程）的常驻内存（RSS）超过 memory_limit_mb 时终止；
+- 工作进程内通过 resource 限制地址空间（RLIMIT_AS，Linux 不支持按 RSS 限制），
+  失控的内存分配直接在工作进程内失败，不会拖垮主进程（Windows 下只依靠主进程监控）；
+- 工作进程异常退出只影响它正在解析的文件，下一个任务自动启动新的工作进程；
+- 每个工作进程解析 max_tasks_per_worker 个文件后退出重建，避免解析库的内存泄漏累积。
+
+使用示例:
+    pool = ParseWorkerPool(size=4, timeout=300)
+    pool.submit(project, file_path, project.id)
+    for result in pool.poll():
+        result["task"], result["status"], result["content"]
+    pool.close()
+"""
+
+import logging
+import multiprocessing
+import time
+from multiprocessing.connection import wait as wait_connections
+
+import psutil
+
+try:
+    import resource  # Unix 资源限制（Windows 不可用）
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 解析结果状态
+OK = "ok"  # 解析完成（内容可能为空）
+ERROR = "error"  # 解析抛出异常
+TIMEOUT = "timeout"  # 超时，工作进程已终止
+MEMORY = "memory"  # 内存超过上限，工作进程已终止
+CRASHED = "crashed"  # 工作进程异常退出
+
+
+def _limit_address_space(limit_mb):
+    """限制当前进程的地址空间（超过时内存分配失败，抛出 MemoryError）"""
+    if not RESOURCE_AVAILABLE or not limit_mb:
+        return
+    try:
+        limit = int(limit_mb) * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"设置解析进程地址空间上限失败：{str(e)}")
+
+
+def _worker_main(conn, address_space_mb):
+    """工作进程主循环：接收 (文件路径, 项目ID)，返回 (状态, 内容, 新文件路径, 错误信息)，收到 None 时退出"""
+    from parser.file_parser import _init_parse_worker, _parse_in_worker
+
+    _limit_address_space(address_space_mb)
+    _init_parse_worker()
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        file_path, project_id = task
+        try:
+            content, new_file_path = _parse_in_worker(file_path, project_id)
+            reply = (OK, content, new_file_path, None)
+        except MemoryError:
+            reply = (MEMORY, None, None, "解析内存超过地址空间上限")
+        except Exception as e:
+            reply = (ERROR, None, None, str(e) or type(e).__name__)
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            break
+    conn.close()
+
+
+class ParseWorker:
+    """单个解析工作进程"""
+
+    def __init__(self, address_space_mb=0):
+        self.conn, child_conn = multiprocessing.Pipe()
+        # 不设为守护进程：解析过程中可能还要启动子进程（守护进程不允许创建子进程）
+        self.process = multiprocessing.Process(target=_worker_main, args=(child_conn, address_space_mb),
+                                               name="parse-worker")
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.started = None
+        self.tasks_done = 0
+
+    @property
+    def busy(self):
+        return self.task is not None
+
+    def submit(self, task, file_path, project_id):
+        self.conn.send((file_path, project_id))
+        self.task = task
+        self.started = time.time()
+
+    def finish(self):
+        """当前任务结束，返回任务"""
+        task, self.task, self.started = self.task, None, None
+        self.tasks_done += 1
+        return task
+
+    def rss_mb(self):
+        """工作进程及其子进程的常驻内存（MB）"""
+        try:
+            process = psutil.Process(self.process.pid)
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            return rss / 1024 / 1024
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0
+
+    def kill(self):
+        """终止工作进程及其子进程"""
+        try:
+            children = psutil.Process(self.process.pid).children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            children = []
+        for child in children:
+            try:
+                child.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+    def stop(self):
+        """空闲时正常退出（超时未退出时终止）"""
+        try:
+            self.conn.send(None)
+        except (EOFError, OSError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class ParseWorkerPool:
+    """可终止的解析工作进程池（只在创建它的线程中使用）"""
+
+    def __init__(self, size, timeout, memory_limit_mb=None, address_space_mb=None, max_tasks_per_worker=None,
+                 poll_interval=None):
+        """
+        Args:
+            size: 工作进程数
+            timeout: 单个文件的解析超时（秒），超过时终止工作进程
+            memory_limit_mb: 工作进程（含子进程）常驻内存上限（MB，0表示不限制，None时使用配置）
+            address_space_mb: 工作进程地址空间上限（MB，0表示不限制，None时使用配置）
+            max_tasks_per_worker: 每个工作进程最多解析的文件数（0表示不限制，None时使用配置）
+            poll_interval: 检查超时和内存的间隔（秒）
+        """
+        from config import PARSE_CONFIG
+
+        self.size = max(int(size), 1)
+        self.timeout = timeout
+        self.memory_limit_mb = PARSE_CONFIG.get("worker_memory_mb", 0) if memory_limit_mb is None else memory_limit_mb
+        self.address_space_mb = (PARSE_CONFIG.get("worker_address_space_mb", 0)
+                                 if address_space_mb is None else address_space_mb)
+        self.max_tasks_per_worker = (PARSE_CONFIG.get("max_tasks_per_worker", 0)
+                                     if max_tasks_per_worker is None else max_tasks_per_worker)
+        self.poll_interval = poll_interval or PARSE_CONFIG.get("worker_poll_interval", 0.5)
+        self._workers = []
+
+    @property
+    def running(self):
+        """正在解析的任务数"""
+        return sum(1 for worker in self._workers if worker.busy)
+
+    def has_capacity(self):
+        return self.running < self.size
+
+    def submit(self, task, file_path, project_id):
+        """
+        提交解析任务（需有空闲进程，见 has_capacity）
+
+        Args:
+            task: 调用方的任务对象（随结果返回）
+        """
+        worker = next((worker for worker in self._workers if not worker.busy), None)
+        if worker is None:
+            worker = ParseWorker(self.address_space_mb)
+            self._workers.append(worker)
+        worker.submit(task, file_path, project_id)
+
+    def poll(self):
+        """
+        等待任务结束（最多 poll_interval 秒），检查超时和内存
+
+        Returns:
+            list: 结束的任务 [{"task", "status", "content", "file_path", "error", "elapsed"}]
+        """
+        busy = [worker for worker in self._workers if worker.busy]
+        if not busy:
+            return []
+        wait_connections([worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                         timeout=self.poll_interval)
+        results = []
+        now = time.time()
+        for worker in busy:
+            elapsed = now - worker.started
+            status, content, file_path, error = None, None, None, None
+            if worker.conn.poll():
+                try:
+                    status, content, file_path, error = worker.conn.recv()
+                except (EOFError, OSError):
+                    status = CRASHED
+            elif not worker.process.is_alive():
+                status = CRASHED
+            elif self.timeout and elapsed > self.timeout:
+                status = TIMEOUT
+            elif self.memory_limit_mb:
+                rss_mb = worker.rss_mb()
+                if rss_mb > self.memory_limit_mb:
+                    status, error = MEMORY, f"解析内存 {rss_mb:.0f}MB 超过上限 {self.memory_limit_mb}MB"
+            if status is None:
+                continue
+            if status == CRASHED:
+                error = f"解析进程异常退出（退出码：{worker.process.exitcode}）"
+            results.append({"task": worker.finish(), "status": status, "content": content, "file_path": file_path,
+                            "error": error, "elapsed": elapsed})
+            if status in (OK, ERROR) and worker.process.is_alive():
+                if self.max_tasks_per_worker and worker.tasks_done >= self.max_tasks_per_worker:
+                    self._workers.remove(worker)
+                    worker.stop()
+                continue
+            # 超时、超内存、异常退出的工作进程终止后丢弃，下一个任务启动新的工作进程
+            self._workers.remove(worker)
+            worker.kill()
+        return results
+
+    def close(self):
+        """结束所有工作进程（正在解析的直接终止）"""
+        for worker in self._workers:
+            if worker.busy:
+                worker.kill()
+            else:
+                worker.stop()
+        self._workers = []
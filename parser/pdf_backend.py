@@ -0,0 +1,271 @@
+"""PDF 文本提取后端
+
+原先 PDF 只用 PyPDF2 逐页 extract_text()，大型标书 PDF 提取很慢，是解析耗时的主要部分。
+这里把文本提取做成可替换的后端：
+- pymupdf：PyMuPDF（fitz，MuPDF 的 C 实现），默认使用，速度比 PyPDF2 快一个数量级以上；
+- pypdf2：PyPDF2（纯 Python），PyMuPDF 未安装或无法打开文件时使用；
+- 后端按 PARSE_CONFIG["pdf"]["backend"] 指定的顺序依次尝试，前一个打开或提取失败时换下一个；
+- 页数不少于 parallel_min_pages 的文档按页码范围分成多段，在多个进程中并行提取，
+  结果按页码顺序合并；
+- 文本层缺失的页（扫描页）由 classify_pages 按每页文本层字符数和图片覆盖率识别，
+  只对这些页做 OCR（见 FileParser._parse_pdf），render_page 把单页渲染为 PNG；
+  文本层为空的页用 OCR 结果替换，有少量文本层的图片页把 OCR 结果补充在文本层之后。
+"""
+
+import logging
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pymupdf as fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    try:
+        import fitz  # PyMuPDF 1.24 之前的模块名
+        PYMUPDF_AVAILABLE = True
+    except ImportError:
+        PYMUPDF_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class PdfBackend:
+    """PDF 文本提取后端（子类实现 page_count 和 extract_pages）"""
+
+    name = ""
+    available = False
+
+    def page_count(self, file_path):
+        raise NotImplementedError
+
+    def extract_pages(self, file_path, start, end, deadline=None):
+        """
+        提取 [start, end) 页的文本
+
+        Args:
+            deadline: 截止时刻（time.time()），到达后停止提取
+
+        Returns:
+            list: 各页文本（到达截止时刻时只包含已提取的页）
+        """
+        raise NotImplementedError
+
+
+class PyMuPDFBackend(PdfBackend):
+    name = "pymupdf"
+    available = PYMUPDF_AVAILABLE
+
+    def page_count(self, file_path):
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+
+    def extract_pages(self, file_path, start, end, deadline=None):
+        pages = []
+        with fitz.open(file_path) as doc:
+            for index in range(start, min(end, doc.page_count)):
+                if deadline and time.time() > deadline:
+                    break
+                pages.append(doc.load_page(index).get_text("text") or "")
+        return pages
+
+
+class PyPDF2Backend(PdfBackend):
+    name = "pypdf2"
+    available = PYPDF2_AVAILABLE
+
+    def page_count(self, file_path):
+        with open(file_path, "rb") as f:
+            return len(PyPDF2.PdfReader(f).pages)
+
+    def extract_pages(self, file_path, start, end, deadline=None):
+        pages = []
+        with open(file_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            for index in range(start, min(end, len(reader.pages))):
+                if deadline and time.time() > deadline:
+                    break
+                pages.append(reader.pages[index].extract_text() or "")
+        return pages
+
+
+# 可用的后端（名称 -> 后端）
+BACKENDS = {backend.name: backend for backend in (PyMuPDFBackend(), PyPDF2Backend())}
+
+
+def _config():
+    from config import PARSE_CONFIG
+
+    return PARSE_CONFIG.get("pdf", {})
+
+
+def backend_order(preferred=None):
+    """
+    按优先顺序返回已安装的后端
+
+    Args:
+        preferred: 首选后端名称（None时使用配置，其余已安装的后端作为备用）
+    """
+    preferred = preferred or _config().get("backend", "pymupdf")
+    names = [preferred] + [name for name in BACKENDS if name != preferred]
+    return [BACKENDS[name] for name in names if name in BACKENDS and BACKENDS[name].available]
+
+
+def _extract_range(backend_name, file_path, start, end, deadline):
+    """在工作进程中提取一段页码范围的文本"""
+    return BACKENDS[backend_name].extract_pages(file_path, start, end, deadline)
+
+
+def _page_workers():
+    """
+    并行提取的进程数
+
+    page_workers 为0时按 CPU 核数平分给各解析进程（PARSE_CONFIG["workers"]），至少2个：
+    默认解析进程数就是 CPU 核数，平分后只有1个，大文档将无法并行提取
+    （是否并行另由 parallel_min_pages 控制，小文档不会多开进程）。
+    """
+    from config import PARSE_CONFIG
+
+    workers = int(_config().get("page_workers", 0) or 0)
+    if workers > 0:
+        return workers
+    cpu_count = os.cpu_count() or 1
+    parse_workers = int(PARSE_CONFIG.get("workers", 0) or 0)
+    if parse_workers <= 0:
+        # 与 file_parser.parse_workers 一致：Windows 下逐个解析（Word COM 不支持多进程）
+        parse_workers = 1 if platform.system() == "Windows" else cpu_count
+    return max(cpu_count // parse_workers, 2)
+
+
+def _extract_parallel(backend, file_path, total_pages, workers, deadline):
+    """按页码范围分段，在多个进程中并行提取（结果按页码顺序合并）"""
+    chunk = max(-(-total_pages // (workers * 2)), 1)  # 每个进程约两段，段数多一些以平衡各段耗时
+    ranges = [(start, min(start + chunk, total_pages)) for start in range(0, total_pages, chunk)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(_extract_range, backend.name, file_path, start, end, deadline)
+                   for start, end in ranges]
+        pages = []
+        for (start, end), future in zip(ranges, futures):
+            range_pages = future.result()
+            pages.extend(range_pages)
+            if len(range_pages) < end - start:
+                # 该段因超时未提取完，之后各段的页不再合并（返回的始终是从第1页开始的连续页）
+                break
+    return pages
+
+
+def extract_text(file_path, backend=None, deadline=None, page_workers=None):
+    """
+    提取 PDF 各页文本
+
+    Args:
+        backend: 首选后端名称（None时使用配置）
+        deadline: 截止时刻（time.time()），到达后停止提取，返回已提取的页
+        page_workers: 并行提取的进程数（None时使用配置）
+
+    Returns:
+        tuple: (各页文本列表, 使用的后端名称, 总页数)；已提取的页数少于总页数表示因超时被截断
+
+    Raises:
+        RuntimeError: 没有可用的后端，或所有后端都无法提取
+    """
+    backends = backend_order(backend)
+    if not backends:
+        raise RuntimeError("没有可用的PDF解析库，请安装：pip install PyMuPDF（或 PyPDF2）")
+    config = _config()
+    errors = []
+    for candidate in backends:
+        try:
+            total_pages = candidate.page_count(file_path)
+            workers = _page_workers() if page_workers is None else page_workers
+            if workers > 1 and total_pages >= config.get("parallel_min_pages", 200):
+                logger.info(f"PDF共 {total_pages} 页，使用 {workers} 个进程按页码范围并行提取（{candidate.name}）")
+                pages = _extract_parallel(candidate, file_path, total_pages, workers, deadline)
+            else:
+                pages = candidate.extract_pages(file_path, 0, total_pages, deadline)
+            return pages, candidate.name, total_pages
+        except Exception as e:
+            logger.warning(f"PDF文本提取失败（{candidate.name}）：{str(e)}")
+            errors.append(f"{candidate.name}: {str(e)}")
+    raise RuntimeError("；".join(errors))
+
+
+def _image_coverage(page):
+    """页面被图片覆盖的面积比例（各图片区域裁剪到页面内后相加，最大为1）"""
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        covered += abs(bbox)
+    return min(covered / page_area, 1.0)
+
+
+def text_layer_chars(page_text):
+    """文本层字符数（去除空白）"""
+    return len("".join((page_text or "").split()))
+
+
+def has_text_layer(page_text):
+    """文本层是否可用（字符数不少于 ocr_min_text_chars）；不可用的页 OCR 结果直接替换文本层"""
+    return text_layer_chars(page_text) >= _config().get("ocr_min_text_chars", 20)
+
+
+def classify_pages(file_path, pages):
+    """
+    找出文本层不可用、需要 OCR 的页（扫描页）
+
+    判定规则（阈值见 PARSE_CONFIG["pdf"]）：
+    - 文本层字符数（去除空白）少于 ocr_min_text_chars；
+    - 或图片覆盖率不低于 ocr_image_coverage 且字符数少于 ocr_image_page_max_chars
+      （整页扫描件上只有页眉、页码等少量文字）。
+    未安装 PyMuPDF 时无法计算图片覆盖率，只按字符数判定。
+
+    Args:
+        pages: extract_text 返回的各页文本（只判定这些页）
+
+    第二类页面有真实的文本层（如标题、代理机构），OCR 结果应补充在文本层之后而不是替换它，
+    见 has_text_layer。
+
+    Returns:
+        list: 需要 OCR 的页码（从0开始）
+    """
+    config = _config()
+    min_chars = config.get("ocr_min_text_chars", 20)
+    image_max_chars = config.get("ocr_image_page_max_chars", 200)
+    coverage_threshold = config.get("ocr_image_coverage", 0.6)
+    char_counts = [text_layer_chars(page_text) for page_text in pages]
+    scanned = [index for index, chars in enumerate(char_counts) if chars < min_chars]
+    candidates = [index for index, chars in enumerate(char_counts) if min_chars <= chars < image_max_chars]
+    if candidates and PYMUPDF_AVAILABLE:
+        try:
+            with fitz.open(file_path) as doc:
+                scanned += [index for index in candidates
+                            if _image_coverage(doc.load_page(index)) >= coverage_threshold]
+        except Exception as e:
+            logger.warning(f"计算PDF图片覆盖率失败，只按文本层字符数判定扫描页：{str(e)}")
+    return sorted(scanned)
+
+
+def render_page(file_path, index, dpi=200):
+    """
+    把一页渲染为 PNG（用于 OCR）
+
+    Returns:
+        bytes: PNG 数据
+
+    Raises:
+        RuntimeError: 未安装 PyMuPDF
+    """
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("未安装PyMuPDF，无法渲染PDF页面")
+    with fitz.open(file_path) as doc:
+        return doc.load_page(index).get_pixmap(dpi=dpi).tobytes("png")
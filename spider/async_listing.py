@@ -0,0 +1,104 @@
+"""异步列表页抓取引擎
+
+把「分类 × 区域」等多个列表流的翻页请求放到同一个事件循环里并发执行：
+- 每个列表流内部仍按页顺序翻页（保留「遇到早于时间范围的项目即停止」的逻辑）；
+- 不同列表流之间并发，按主机限制同时进行的请求数，避免触发反爬；
+- 安装了 aiohttp 时使用异步 HTTP 客户端，否则回退为线程池中执行 requests 请求。
+"""
+
+import asyncio
+
+from utils.log import log
+
+try:
+    import aiohttp  # type: ignore
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
+try:
+    from .http_fixtures import http_fixtures
+except ImportError:
+    from spider.http_fixtures import http_fixtures
+
+
+class AsyncListingEngine:
+    """异步列表页抓取引擎
+
+    使用示例:
+        engine = AsyncListingEngine(max_per_host=4, page_interval=2, max_pages=35)
+        engine.run(streams, fetch_page, handle_page)
+
+    其中:
+        streams: 列表流（dict）列表，"host" 字段用于按主机限流
+        fetch_page: async fetch_page(client, stream, page_no) -> 响应数据或None
+            client 为 aiohttp.ClientSession，未安装 aiohttp 时为 None
+        handle_page: handle_page(stream, page_no, result) -> bool，返回True表示该列表流停止翻页
+    """
+
+    def __init__(self, max_per_host=4, page_interval=0, max_pages=35, timeout=15):
+        """
+        初始化引擎
+
+        Args:
+            max_per_host: 每个主机同时进行的最大请求数
+            page_interval: 同一列表流相邻两页之间的间隔（秒）
+            max_pages: 每个列表流最多翻页数
+            timeout: 请求超时时间（秒，仅 aiohttp 客户端使用）
+        """
+        self.max_per_host = max(int(max_per_host), 1)
+        self.page_interval = page_interval
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self._semaphores = {}
+
+    def run(self, streams, fetch_page, handle_page):
+        """
+        并发抓取所有列表流（阻塞直到全部完成）
+
+        Args:
+            streams: 列表流列表
+            fetch_page: 异步页面获取函数
+            handle_page: 页面处理函数
+        """
+        if not streams:
+            return
+        asyncio.run(self._run(streams, fetch_page, handle_page))
+
+    async def _run(self, streams, fetch_page, handle_page):
+        # 信号量需要在事件循环内创建
+        self._semaphores = {}
+        # HTTP 录制/回放只作用于 requests，开启时不使用 aiohttp
+        if AIOHTTP_AVAILABLE and not http_fixtures.active:
+            client_timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with aiohttp.ClientSession(timeout=client_timeout) as client:
+                await self._gather(client, streams, fetch_page, handle_page)
+        else:
+            log.debug("未安装 aiohttp，列表页请求将在线程池中执行")
+            await self._gather(None, streams, fetch_page, handle_page)
+
+    async def _gather(self, client, streams, fetch_page, handle_page):
+        results = await asyncio.gather(
+            *(self._walk_stream(client, stream, fetch_page, handle_page) for stream in streams),
+            return_exceptions=True,
+        )
+        for stream, result in zip(streams, results):
+            if isinstance(result, Exception):
+                log.error(f"列表流 {stream.get('label', '')} 抓取异常: {str(result)}")
+
+    async def _walk_stream(self, client, stream, fetch_page, handle_page):
+        """按页顺序抓取单个列表流，直到 handle_page 要求停止或达到最大页数"""
+        host = stream.get("host", "")
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+
+        for page_no in range(1, self.max_pages + 1):
+            # 反爬控制：第一页不等待
+            if page_no > 1 and self.page_interval:
+                await asyncio.sleep(self.page_interval)
+
+            async with semaphore:
+                result = await fetch_page(client, stream, page_no)
+
+            if handle_page(stream, page_no, result):
+                break
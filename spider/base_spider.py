@@ -3,11 +3,26 @@
 提供所有爬虫需要实现的统一接口和通用功能
 """
 
+import os
+import time
 from abc import ABC, abstractmethod
-from utils.db import get_db, TenderProject
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.db import get_db, save_projects_bulk, get_crawl_watermarks, save_crawl_watermark, ProjectStatus
+from utils import blob_store
 from utils.log import log
 from config import SPIDER_CONFIG
 
+try:
+    from .watermark import StreamWatermark
+    from .dedup import DedupIndex
+    from .near_dup import NearDupIndex
+    from .title_prefilter import title_prefilter, PREFILTER_PREFIX
+except ImportError:
+    from spider.watermark import StreamWatermark
+    from spider.dedup import DedupIndex
+    from spider.near_dup import NearDupIndex
+    from spider.title_prefilter import title_prefilter, PREFILTER_PREFIX
+
 
 class BaseSpider(ABC):
     """爬虫基础类
@@ -30,6 +45,9 @@ class BaseSpider(ABC):
             daily_limit: 每日爬取限制数量（None时使用全局配置）
             days_before: 爬取最近N天内的文件（None表示只爬取当日）
             **kwargs: 其他平台特定参数（兼容性参数，可忽略）
+                quota: 跨平台共享配额（CrawlQuota），并发运行时由 SpiderManager 传入
+                budget: 预算规划器（CrawlBudgetPlanner），并发运行时由 SpiderManager 传入
+                incremental: 是否启用增量爬取水位（None时使用全局配置）
         """
         self.db = next(get_db())
         # 每日总爬取限制：优先使用传入的 daily_limit，否则回退到配置
@@ -41,6 +59,30 @@ class BaseSpider(ABC):
         self.crawled_count = 0
         # 重试次数
         self.max_retries = SPIDER_CONFIG["anti_crawl"].get("retry_times", 3)
+        # 跨平台共享配额（None表示不与其他平台共享，仅受 daily_limit 限制）
+        self.quota = kwargs.get("quota")
+        # 按历史推荐率分配的平台额度（None表示只受 daily_limit 限制）
+        self.budget = kwargs.get("budget")
+        # 文件下载并发数（子类可根据平台配置覆盖）
+        self.download_workers = SPIDER_CONFIG.get("download_workers", 3)
+        # 批量保存：下载完成的项目攒够 batch_size 个或等待超过 max_delay 秒时一次写库
+        bulk_save_config = SPIDER_CONFIG.get("bulk_save", {})
+        self.save_batch_size = max(int(bulk_save_config.get("batch_size", 20)), 1)
+        self.save_max_delay = bulk_save_config.get("max_delay", 5)
+        # 增量爬取：按列表流（分类/区域）记录水位，翻页到已处理区域即停止
+        incremental_config = SPIDER_CONFIG.get("incremental", {})
+        incremental = kwargs.get("incremental")
+        self.incremental = incremental_config.get("enabled", False) if incremental is None else incremental
+        self.watermark_stop_after = incremental_config.get("stop_after", 3)
+        self._stored_watermarks = None
+        self._watermarks = {}
+        # 本次成功入库的项目ID（用于计算新水位）
+        self._saved_project_ids = set()
+        # 项目去重索引（首次使用时加载）
+        self._dedup = None
+        # 跨平台近似重复检测（首次使用时加载）
+        self.near_dup_enabled = SPIDER_CONFIG.get("near_dup", {}).get("enabled", False)
+        self._near_dup = None
     
     @abstractmethod
     def run(self):
@@ -67,6 +109,70 @@ class BaseSpider(ABC):
             "code": self.PLATFORM_CODE
         }
     
+    @property
+    def dedup(self):
+        """平台去重索引（布隆过滤器 + 批量 IN 查询确认）"""
+        if self._dedup is None:
+            self._dedup = DedupIndex(self.db, self.PLATFORM_NAME, self.PLATFORM_CODE)
+        return self._dedup
+    
+    @property
+    def near_dup(self):
+        """跨平台近似重复检测索引（SimHash/MinHash 签名）"""
+        if self._near_dup is None:
+            self._near_dup = NearDupIndex(self.db, self.PLATFORM_NAME)
+        return self._near_dup
+    
+    def _filter_near_duplicates(self, page_projects):
+        """
+        剔除与其他平台已入库项目近似重复的公告（关联到已有项目，不再下载）
+        
+        检测失败时不剔除任何项目（宁可重复下载，也不漏爬）
+        """
+        if not self.near_dup_enabled or not page_projects:
+            return page_projects
+        try:
+            return self.near_dup.filter_page(page_projects)
+        except Exception as e:
+            log.warning(f"{self.PLATFORM_NAME}近似重复检测失败（本页不做检测）: {str(e)}")
+            return page_projects
+    
+    def _prefilter_titles(self, page_projects):
+        """
+        标题预筛：明显是服务类或不在业务范围内的公告不下载，以「已排除」状态入库
+        
+        预筛失败时不剔除任何项目（宁可多下载，也不漏爬）
+        
+        Returns:
+            list: 需要下载的项目数据列表（保持列表页顺序）
+        """
+        if not title_prefilter.enabled or not page_projects:
+            return page_projects
+        try:
+            kept, skipped = title_prefilter.split(page_projects)
+        except Exception as e:
+            log.warning(f"{self.PLATFORM_NAME}标题预筛失败（本页不做预筛）: {str(e)}")
+            return page_projects
+        if not skipped:
+            return kept
+        excluded = []
+        for project_data, reason in skipped:
+            log.info(f"标题预筛跳过: {project_data.get('project_name', '')[:50]}（{reason}）")
+            excluded.append({
+                **project_data,
+                "crawl_source": project_data.get("crawl_source") or self.PLATFORM_CODE,
+                "status": ProjectStatus.EXCLUDED,
+                "error_msg": f"{PREFILTER_PREFIX}：{reason}",
+            })
+        try:
+            # 记录排除结果，之后的运行按ID去重直接跳过
+            for saved_project in save_projects_bulk(self.db, excluded):
+                self.dedup.add(saved_project.project_id)
+        except Exception as e:
+            log.warning(f"{self.PLATFORM_NAME}保存预筛排除项目失败: {str(e)}")
+        log.info(f"{self.PLATFORM_NAME}标题预筛：本页 {len(page_projects)} 个新项目，跳过 {len(skipped)} 个")
+        return kept
+    
     def _is_duplicate(self, project_id):
         """
         检查项目是否已存在（通用方法）
@@ -79,9 +185,280 @@ class BaseSpider(ABC):
         """
         if not project_id:
             return False
-        return self.db.query(TenderProject).filter(
-            TenderProject.project_id == project_id
-        ).first() is not None
+        return self.dedup.exists(project_id)
+    
+    def _filter_new_projects(self, page_projects, processed_ids):
+        """
+        过滤出一个列表页中需要下载的新项目（一次批量查询确认，剔除标题预筛排除的和跨平台近似重复的公告）
+        
+        Args:
+            page_projects: 列表页解析出的项目数据列表
+            processed_ids: 本次运行已处理的项目ID集合（会加入本页的新项目）
+            
+        Returns:
+            list: 新项目数据列表（保持列表页顺序）
+        """
+        pending = [p for p in page_projects if p.get("project_id") not in processed_ids]
+        new_ids = self.dedup.filter_new(p.get("project_id") for p in pending)
+        new_projects = []
+        for project_data in pending:
+            project_id = project_data.get("project_id")
+            if project_id not in new_ids or project_id in processed_ids:
+                log.debug(f"项目已存在，跳过: {project_id}")
+                continue
+            processed_ids.add(project_id)
+            new_projects.append(project_data)
+        return self._filter_near_duplicates(self._prefilter_titles(new_projects))
+    
+    def _acquire_quota(self):
+        """
+        申请一个共享配额名额（在下载文件前调用）
+
+        Returns:
+            bool: True表示可以继续爬取，False表示总配额已用完
+        """
+        if self.quota is None:
+            return True
+        return self.quota.try_acquire()
+
+    def _release_quota(self):
+        """归还共享配额名额（项目被跳过或处理失败时调用）"""
+        if self.quota is not None:
+            self.quota.release()
+
+    def _crawl_limit(self):
+        """
+        本平台当前可爬取的数量上限
+
+        有预算规划器时取规划的平台额度（其他平台提前结束后额度会增加，运行中需重新读取）
+        """
+        if self.budget is None:
+            return self.daily_limit
+        return min(self.daily_limit, self.budget.limit(self.PLATFORM_CODE))
+
+    def _quota_exhausted(self):
+        """
+        检查共享配额是否已用完
+
+        Returns:
+            bool: True表示已用完
+        """
+        return self.quota is not None and self.quota.exhausted()
+
+    def _get_watermark(self, category="", district=""):
+        """
+        获取列表流的爬取水位（在主线程中调用）
+        
+        Args:
+            category: 分类代码（单列表平台为空）
+            district: 区域代码（单列表平台为空）
+            
+        Returns:
+            StreamWatermark: 水位对象，未启用增量爬取时返回不会停止翻页的空水位
+        """
+        stream_key = f"{category}:{district}" if category or district else ""
+        watermark = self._watermarks.get(stream_key)
+        if watermark is not None:
+            return watermark
+        
+        timestamp, seen_ids, partial = None, set(), None
+        if self.incremental:
+            if self._stored_watermarks is None:
+                try:
+                    self._stored_watermarks = get_crawl_watermarks(self.db, self.PLATFORM_CODE)
+                except Exception as e:
+                    log.error(f"{self.PLATFORM_NAME}读取爬取水位失败，本次全量爬取: {str(e)}")
+                    self._stored_watermarks = {}
+            timestamp, seen_ids, partial = self._stored_watermarks.get(stream_key, (None, set(), None))
+        
+        watermark = StreamWatermark(stream_key, timestamp, seen_ids, stop_after=self.watermark_stop_after,
+                                    partial=partial)
+        self._watermarks[stream_key] = watermark
+        return watermark
+    
+    def _commit_watermarks(self):
+        """保存本次推进的爬取水位（在 run() 结束、关闭数据库前调用）"""
+        if not self.incremental:
+            return
+        for stream_key, watermark in self._watermarks.items():
+            advanced = watermark.advance(self._saved_project_ids)
+            if advanced is None:
+                continue
+            timestamp, seen_ids, partial = advanced
+            try:
+                save_crawl_watermark(self.db, self.PLATFORM_CODE, stream_key, timestamp, seen_ids, partial)
+            except Exception:
+                # 水位保存失败只影响下次的增量范围，不影响本次结果
+                continue
+    
+    def _run_pipeline(self, candidates, download, require_file=False, max_workers=None):
+        """
+        列表发现与文件下载解耦的爬取流水线（生产者/消费者）
+        
+        主线程按需从 candidates 拉取候选项目（生产者），提交给有界下载线程池（消费者）；
+        下载完成的文件在下载线程中移入内容寻址存储（见 _download_and_store），
+        项目回到主线程按批保存（见 _flush_saves），保证数据库会话只在单线程中使用。
+        达到 daily_limit（或预算规划的平台额度，见 _crawl_limit）或共享配额用完后停止拉取，
+        等待已提交的下载完成后退出。
+        
+        Args:
+            candidates: 候选项目（project_data）迭代器，通常为逐页请求列表的生成器
+            download: 下载函数 download(project_data) -> (file_path, file_format)，在下载线程中执行
+            require_file: True表示没有文件的项目不保存、不计入配额
+            max_workers: 下载并发数（None时使用 self.download_workers）
+            
+        Returns:
+            list: 保存成功的项目列表
+        """
+        max_workers = max(int(max_workers or self.download_workers), 1)
+        candidates = iter(candidates)
+        projects = []
+        in_flight = {}
+        # 下载完成、等待批量保存的项目数据
+        pending = []
+        pending_since = None
+        exhausted = False
+        
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{self.PLATFORM_CODE}-download")
+        try:
+            while True:
+                # 生产：在下载槽位和配额允许的范围内拉取候选项目
+                while (not exhausted and len(in_flight) < max_workers
+                       and len(projects) + len(pending) + len(in_flight) < self._crawl_limit()):
+                    try:
+                        project_data = next(candidates, None)
+                    except Exception as e:
+                        log.error(f"{self.PLATFORM_NAME}获取候选项目失败: {str(e)}", exc_info=True)
+                        project_data = None
+                    if project_data is None:
+                        exhausted = True
+                        break
+                    # 申请跨平台共享配额，总配额用完则停止
+                    if not self._acquire_quota():
+                        log.info(f"共享配额已用完，{self.PLATFORM_NAME}停止爬取")
+                        exhausted = True
+                        break
+                    in_flight[pool.submit(self._download_and_store, download, project_data)] = project_data
+                
+                if not in_flight:
+                    if not pending:
+                        break
+                    # 没有进行中的下载：保存剩余项目（已存在的项目不计入配额，可能还能继续拉取）
+                    projects.extend(self._flush_saves(pending))
+                    pending, pending_since = [], None
+                    continue
+                
+                # 消费：收集已完成下载的项目，攒够一批或等待过久时一次写库（单线程写库）
+                timeout = None
+                if pending:
+                    timeout = max(pending_since + self.save_max_delay - time.monotonic(), 0)
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    project_data = self._collect_downloaded(future, in_flight.pop(future), require_file)
+                    if project_data is None:
+                        self._release_quota()
+                        continue
+                    if not pending:
+                        pending_since = time.monotonic()
+                    pending.append(project_data)
+                if pending and (len(pending) >= self.save_batch_size
+                                or time.monotonic() - pending_since >= self.save_max_delay):
+                    projects.extend(self._flush_saves(pending))
+                    pending, pending_since = [], None
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            # 异常退出时收集剩余的下载结果：已下载的文件照常保存，未开始（被取消）或失败的归还配额
+            for future, project_data in in_flight.items():
+                if not future.cancelled():
+                    project_data = self._collect_downloaded(future, project_data, require_file)
+                    if project_data is not None:
+                        pending.append(project_data)
+                        continue
+                self._release_quota()
+            in_flight.clear()
+            if pending:
+                # 异常退出时也保存已下载完成的项目
+                projects.extend(self._flush_saves(pending))
+            if hasattr(candidates, "close"):
+                candidates.close()
+            if self._dedup is not None:
+                self._dedup.save()
+        
+        self.crawled_count = len(projects)
+        return projects
+    
+    def _download_and_store(self, download, project_data):
+        """
+        下载文件并移入内容寻址存储（在下载线程中执行）
+        
+        Returns:
+            tuple: (file_path, file_format, content_hash)
+        """
+        file_path, file_format = download(project_data)
+        content_hash = None
+        if file_path and os.path.isfile(file_path):
+            try:
+                file_path, content_hash = blob_store.put(file_path)
+            except Exception as e:
+                # 存储失败时保留原文件路径，只是无法与其他项目共用文件
+                log.warning(f"文件存入内容寻址存储失败: {file_path}, 错误: {str(e)}")
+        return file_path, file_format, content_hash
+    
+    def _collect_downloaded(self, future, project_data, require_file=False):
+        """
+        取得下载结果并填入项目数据（在主线程中调用）
+        
+        Returns:
+            dict 或 None: 待保存的项目数据，None表示项目被跳过
+        """
+        project_id = project_data.get("project_id")
+        try:
+            file_path, file_format, content_hash = future.result()
+        except Exception as e:
+            log.error(f"下载项目文件失败[{project_id}]: {str(e)}", exc_info=True)
+            file_path, file_format, content_hash = None, None, None
+        
+        if not file_path:
+            if require_file:
+                log.debug(f"项目 {project_id} 无法获取文件，跳过保存（不计入配额）")
+                return None
+        else:
+            project_data["file_path"] = file_path
+            project_data["file_format"] = file_format
+            project_data["content_hash"] = content_hash
+        return project_data
+    
+    def _flush_saves(self, pending):
+        """
+        批量保存项目（在主线程中调用，一次 INSERT 和一次提交）
+        
+        已存在或保存失败的项目归还共享配额。
+        
+        Returns:
+            list: 新保存的项目（TenderProject）
+        """
+        for project_data in pending:
+            # 记录来源，供预算规划器按来源统计推荐率
+            project_data.setdefault("crawl_source", self.PLATFORM_CODE)
+        try:
+            saved_projects = save_projects_bulk(self.db, pending)
+        except Exception as e:
+            log.error(f"{self.PLATFORM_NAME}批量保存 {len(pending)} 个项目失败: {str(e)}")
+            saved_projects = []
+        for _ in range(len(pending) - len(saved_projects)):
+            self._release_quota()
+        
+        data_by_id = {str(project_data.get("project_id")): project_data for project_data in pending}
+        for saved_project in saved_projects:
+            project_id = str(saved_project.project_id)
+            log.debug(f"已爬取项目: {saved_project.project_name[:50]}...")
+            # 同步去重索引
+            self.dedup.add(saved_project.project_id)
+            self._saved_project_ids.add(project_id)
+        if self.near_dup_enabled:
+            # 本批项目的签名一次提交
+            self.near_dup.add_many(saved_projects, data_by_id)
+        return saved_projects
     
     def _check_platform_config(self):
         """
@@ -0,0 +1,206 @@
+"""无头浏览器池
+
+湖州、丽水平台的下载会话 sid 只能通过浏览器获取，原先每次都新启动一个 Chromium，
+冷启动耗时占了获取 sid 的大部分时间，多平台并发爬取时更是成倍增加。浏览器池统一管理：
+- 最多保持 size 个已启动的浏览器（每个使用独立端口和用户目录，互不共享 Cookie），各平台共用；
+- 借出前清空 Cookie，保证每次拿到的都是全新会话；
+- 空闲超过 idle_timeout 秒的浏览器由后台回收线程自动关闭（有空闲浏览器时才运行）；
+- 使用中抛出异常或健康检查失败的浏览器直接丢弃，下次借用时重新启动（崩溃恢复）。
+
+使用示例:
+    with browser_pool.page() as page:
+        page.get(url)
+        cookies = page.cookies()
+"""
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.log import log
+from config import SPIDER_CONFIG
+
+try:
+    from DrissionPage import ChromiumPage, ChromiumOptions
+    DRISSIONPAGE_AVAILABLE = True
+except ImportError:
+    DRISSIONPAGE_AVAILABLE = False
+
+
+class BrowserPool:
+    """DrissionPage 浏览器池（线程安全）"""
+
+    def __init__(self, size=None, idle_timeout=None, headless=None, acquire_timeout=None):
+        """
+        Args:
+            size: 最多同时启动的浏览器数量
+            idle_timeout: 空闲多少秒后关闭浏览器
+            headless: 是否无头模式
+            acquire_timeout: 浏览器全部被占用时最多等待多少秒
+        """
+        config = SPIDER_CONFIG.get("browser_pool", {})
+        self.size = max(int(size or config.get("size", 2)), 1)
+        self.idle_timeout = idle_timeout or config.get("idle_timeout", 300)
+        self.headless = config.get("headless", True) if headless is None else headless
+        self.acquire_timeout = acquire_timeout or config.get("acquire_timeout", 300)
+        # 空闲浏览器 [(page, 归还时间)]，最近归还的在末尾
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # 空闲浏览器回收线程（没有空闲浏览器时退出，下次归还时重新启动）
+        self._reaper = None
+
+    def _launch(self):
+        options = ChromiumOptions()
+        if self.headless:
+            options.headless()
+        # 每个浏览器使用独立端口和临时用户目录，避免多个实例连接到同一个浏览器
+        options.auto_port()
+        started = time.time()
+        page = ChromiumPage(options)
+        log.info(f"浏览器已启动（耗时 {time.time() - started:.1f} 秒）")
+        return page
+
+    @staticmethod
+    def _quit(page):
+        try:
+            page.quit()
+        except Exception as e:
+            log.debug(f"关闭浏览器失败（可忽略）: {str(e)}")
+
+    @staticmethod
+    def _healthy(page):
+        """检查浏览器是否仍可用，并清空 Cookie 准备新会话"""
+        try:
+            page.run_js("return 1;")
+        except Exception:
+            return False
+        try:
+            page.set.cookies.clear()
+        except Exception as e:
+            log.debug(f"清空浏览器Cookie失败（可忽略）: {str(e)}")
+        return True
+
+    def _evict_idle(self):
+        """关闭空闲过久的浏览器（调用方持有锁）"""
+        now = time.time()
+        expired = [page for page, released in self._idle if now - released > self.idle_timeout]
+        if expired:
+            self._idle = [(page, released) for page, released in self._idle if now - released <= self.idle_timeout]
+            self._total -= len(expired)
+            log.debug(f"关闭 {len(expired)} 个空闲浏览器")
+        return expired
+
+    def _start_reaper(self):
+        """启动空闲浏览器回收线程（调用方持有锁）"""
+        if self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap, name="browser-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        """等到最早归还的浏览器空闲超时后关闭它，直到没有空闲浏览器"""
+        while True:
+            with self._cond:
+                if self._closed or not self._idle:
+                    self._reaper = None
+                    return
+                expired = self._evict_idle()
+                if not expired:
+                    oldest = min(released for _, released in self._idle)
+                    # 借用和归还会 notify，醒来后重新计算
+                    self._cond.wait(max(oldest + self.idle_timeout - time.time(), 0) + 0.1)
+            for stale in expired:
+                self._quit(stale)
+
+    def _acquire(self):
+        deadline = time.time() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("浏览器池已关闭")
+                expired = self._evict_idle()
+                if self._idle:
+                    page = self._idle.pop()[0]
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    page = None
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待可用浏览器超时（{self.acquire_timeout}秒）")
+                self._cond.wait(remaining)
+        for stale in expired:
+            self._quit(stale)
+
+        if page is not None and not self._healthy(page):
+            log.warning("浏览器已失效，重新启动")
+            self._quit(page)
+            page = None
+        if page is None:
+            try:
+                page = self._launch()
+            except Exception:
+                self._discard(None)
+                raise
+        return page
+
+    def _release(self, page):
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                page_to_quit = page
+            else:
+                self._idle.append((page, time.time()))
+                page_to_quit = None
+                self._start_reaper()
+            self._cond.notify()
+        if page_to_quit is not None:
+            self._quit(page_to_quit)
+
+    def _discard(self, page):
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+        if page is not None:
+            self._quit(page)
+
+    @contextmanager
+    def page(self):
+        """
+        借用一个浏览器页面（with 块结束后归还）
+
+        with 块中抛出异常时认为浏览器状态不可靠，关闭后丢弃。
+
+        Raises:
+            RuntimeError: DrissionPage 未安装
+            TimeoutError: 等待可用浏览器超时
+        """
+        if not DRISSIONPAGE_AVAILABLE:
+            raise RuntimeError("DrissionPage未安装，无法使用浏览器。请安装: pip install DrissionPage")
+        page = self._acquire()
+        try:
+            yield page
+        except BaseException:
+            self._discard(page)
+            raise
+        else:
+            self._release(page)
+
+    def close(self):
+        """关闭所有空闲浏览器，使用中的浏览器归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for page, _ in idle:
+            self._quit(page)
+
+
+# 全局共享浏览器池（首次借用时启动浏览器）
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
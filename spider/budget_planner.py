@@ -0,0 +1,221 @@
+"""按历史推荐率分配爬取配额
+
+原先 total_limit 按平台顺序依次分配（排在前面的平台先用完配额），浙江省政府采购网的
+24 个列表流也是按固定顺序下载，配额经常被推荐率低的来源占满，推荐率高的来源反而分不到。
+预算规划器按来源的历史推荐率（已判定项目中 final_decision 为「推荐参与」的比例）分配配额：
+- 推荐率按 全局 → 平台 → 站点（区域）→ 来源 逐级平滑，样本少的来源向上一级靠拢，
+  新来源不会因为没有历史而分不到配额；推荐率有下限 min_yield，低推荐率来源仍保留少量探索配额；
+- 配额按推荐率比例分配，已知可爬数量（capacity）的来源分到的配额不超过可爬数量，多出部分
+  重新分给其他来源；
+- 来源提前爬完（实际数量少于分配额度）时调用 finish()，剩余配额按推荐率重新分给尚未结束的来源。
+
+项目保存时在 crawl_source 字段记录来源（平台代码，浙江省按 平台代码:分类:区域），
+之后的统计可以精确到列表流；之前的项目按 site_name 统计到平台和站点。
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from utils.db import get_db, TenderProject
+from utils.log import log
+from config import SPIDER_CONFIG
+
+try:
+    from .near_dup import platform_of
+except ImportError:
+    from spider.near_dup import platform_of
+
+RECOMMENDED = "推荐参与"
+UNDECIDED = "未判定"
+
+
+def allocate(total, weights, capacities=None):
+    """
+    按权重比例分配整数配额（最大余数法），不超过各来源的可爬数量
+
+    Args:
+        total: 总配额
+        weights: {来源: 权重}，权重需大于0
+        capacities: {来源: 可爬数量}，未列出的来源不限
+
+    Returns:
+        dict: {来源: 分配数量}
+    """
+    capacities = capacities or {}
+    allocation = {key: 0 for key in weights}
+    active = [key for key in weights if capacities.get(key) is None or capacities[key] > 0]
+    remaining = max(int(total), 0)
+    while remaining > 0 and active:
+        weight_sum = sum(weights[key] for key in active)
+        shares = {key: remaining * weights[key] / weight_sum for key in active}
+        # 份额超过可爬数量的来源取满，剩余配额在其他来源之间重新分配
+        capped = [key for key in active
+                  if capacities.get(key) is not None and allocation[key] + shares[key] >= capacities[key]]
+        if capped:
+            for key in capped:
+                remaining -= capacities[key] - allocation[key]
+                allocation[key] = capacities[key]
+                active.remove(key)
+            continue
+        floors = {key: int(shares[key]) for key in active}
+        for key in active:
+            allocation[key] += floors[key]
+        left = remaining - sum(floors.values())
+        for key in sorted(active, key=lambda k: (shares[k] - floors[k], weights[k]), reverse=True)[:left]:
+            allocation[key] += 1
+        remaining = 0
+    return allocation
+
+
+class YieldStats:
+    """历史推荐率统计（逐级平滑）"""
+
+    def __init__(self, rows, prior_weight=10):
+        """
+        Args:
+            rows: [(site_name, crawl_source, 已判定数量, 推荐参与数量)]
+            prior_weight: 平滑强度（相当于多少个按上一级推荐率计的虚拟样本）
+        """
+        self.prior_weight = prior_weight
+        self._platforms = {}
+        self._sites = {}
+        self._sources = {}
+        judged = hits = 0
+        for site_name, crawl_source, count, recommended in rows:
+            count, recommended = int(count or 0), int(recommended or 0)
+            judged += count
+            hits += recommended
+            for index, key in ((self._platforms, platform_of(site_name)), (self._sites, site_name),
+                               (self._sources, crawl_source)):
+                if key:
+                    counts = index.setdefault(key, [0, 0])
+                    counts[0] += count
+                    counts[1] += recommended
+        self.judged = judged
+        # 没有任何历史时各来源推荐率相同（按比例平均分配）
+        self.global_rate = hits / judged if judged else 0.5
+
+    def _smooth(self, counts, prior):
+        count, recommended = counts or (0, 0)
+        return (recommended + self.prior_weight * prior) / (count + self.prior_weight)
+
+    def platform(self, platform_name):
+        """平台推荐率"""
+        return self._smooth(self._platforms.get(platform_of(platform_name)), self.global_rate)
+
+    def site(self, site_name):
+        """站点（平台名称-区域）推荐率"""
+        return self._smooth(self._sites.get(site_name), self.platform(site_name))
+
+    def source(self, crawl_source, site_name):
+        """来源（列表流）推荐率，以站点推荐率为先验"""
+        return self._smooth(self._sources.get(crawl_source), self.site(site_name))
+
+
+def load_yield_stats(db=None, lookback_days=None, prior_weight=None):
+    """
+    统计最近 lookback_days 天入库项目的推荐率
+
+    Args:
+        db: 数据库会话（None时新建并在统计后关闭）
+
+    Returns:
+        YieldStats
+    """
+    config = SPIDER_CONFIG.get("budget_planner", {})
+    lookback_days = lookback_days or config.get("lookback_days", 90)
+    prior_weight = config.get("prior_weight", 10) if prior_weight is None else prior_weight
+    own_session = db is None
+    if own_session:
+        db = next(get_db())
+    try:
+        recommended = func.sum(case((TenderProject.final_decision == RECOMMENDED, 1), else_=0))
+        rows = (
+            db.query(TenderProject.site_name, TenderProject.crawl_source, func.count(TenderProject.id), recommended)
+            .filter(
+                TenderProject.create_time >= datetime.now() - timedelta(days=lookback_days),
+                TenderProject.final_decision.isnot(None),
+                TenderProject.final_decision != UNDECIDED,
+            )
+            .group_by(TenderProject.site_name, TenderProject.crawl_source)
+            .all()
+        )
+    finally:
+        if own_session:
+            db.close()
+    return YieldStats(rows, prior_weight)
+
+
+class CrawlBudgetPlanner:
+    """按推荐率在来源之间分配配额（线程安全）
+
+    使用示例:
+        planner = CrawlBudgetPlanner(20, {"hangzhou": 0.3, "ningbo": 0.1})
+        for key in planner.order():
+            used = crawl(key, limit=planner.limit(key))
+            planner.finish(key, used)  # 少于额度时剩余配额分给其他来源
+    """
+
+    def __init__(self, total_limit, yields, capacities=None, min_yield=None):
+        """
+        Args:
+            total_limit: 总配额
+            yields: {来源: 推荐率}
+            capacities: {来源: 可爬数量}（未知时不传）
+            min_yield: 推荐率下限（None时使用配置）
+        """
+        config = SPIDER_CONFIG.get("budget_planner", {})
+        min_yield = config.get("min_yield", 0.02) if min_yield is None else min_yield
+        self.total_limit = max(int(total_limit), 0)
+        self.yields = {key: max(value, min_yield, 1e-6) for key, value in yields.items()}
+        self._capacities = dict(capacities or {})
+        self._finished = {}
+        self._lock = threading.Lock()
+        self._plan = allocate(self.total_limit, self.yields, self._capacities)
+
+    def order(self):
+        """来源按推荐率从高到低排序（推荐率相同时保持传入顺序）"""
+        return sorted(self.yields, key=lambda key: -self.yields[key])
+
+    def limit(self, key):
+        """来源当前的配额"""
+        with self._lock:
+            return self._plan.get(key, 0)
+
+    def plan(self):
+        """当前分配结果 {来源: 配额}"""
+        with self._lock:
+            return dict(self._plan)
+
+    def finish(self, key, used):
+        """
+        记录来源已结束及实际爬取数量，少于配额时把剩余配额重新分给尚未结束的来源
+
+        Args:
+            key: 来源
+            used: 实际爬取数量
+        """
+        with self._lock:
+            if key in self._finished:
+                return
+            planned = self._plan.get(key, 0)
+            self._finished[key] = used
+            if used >= planned:
+                self._plan[key] = used
+                return
+            active = {k: y for k, y in self.yields.items() if k not in self._finished}
+            remaining = max(self.total_limit - sum(self._finished.values()), 0)
+            self._plan = {**self._finished, **allocate(remaining, active, self._capacities)}
+            plan = {k: self._plan[k] for k in active}
+        if plan:
+            log.info(f"来源 {key} 只使用了 {used}/{planned} 个配额，剩余配额重新分配: {plan}")
+
+    def describe(self, labels=None):
+        """分配结果说明（日志用）"""
+        labels = labels or {}
+        plan = self.plan()
+        return "，".join(
+            f"{labels.get(key, key)}={plan.get(key, 0)}（推荐率{self.yields[key]:.0%}）" for key in self.order()
+        )
@@ -0,0 +1,151 @@
+"""验证码识别服务
+
+湖州、丽水平台每次下载都要识别一次验证码，原先每次调用都新建 ddddocr.DdddOcr()，
+重新加载 ONNX 模型需要数百毫秒和数十MB内存。这里统一提供共享的识别服务：
+- 模型每个进程只加载一次（线程共享同一个识别器）；
+- 可选使用小型进程池并行识别（SPIDER_CONFIG["captcha"]["processes"] > 0 时启用）；
+- solve(images) 批量识别，solve_one(image) 识别单张；
+- 记录识别耗时、识别成功率，以及服务器校验结果（report()）计算的通过率。
+"""
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.log import log
+from config import SPIDER_CONFIG
+
+try:
+    import ddddocr
+    DDDDOCR_AVAILABLE = True
+except ImportError:
+    DDDDOCR_AVAILABLE = False
+
+# 进程内共享的识别器（主进程和进程池的每个工作进程各一个）
+_ocr = None
+_ocr_lock = threading.Lock()
+
+
+def _get_ocr():
+    global _ocr
+    if _ocr is None:
+        with _ocr_lock:
+            if _ocr is None:
+                try:
+                    _ocr = ddddocr.DdddOcr(show_ad=False)
+                except TypeError:
+                    # 旧版本 ddddocr 没有 show_ad 参数
+                    _ocr = ddddocr.DdddOcr()
+    return _ocr
+
+
+def _classify(image_bytes):
+    """识别单张验证码（进程池中执行时也使用该函数），返回清理空白后的文本"""
+    text = _get_ocr().classification(image_bytes)
+    return "".join((text or "").split())
+
+
+class CaptchaSolver:
+    """共享验证码识别服务
+
+    使用示例:
+        code = captcha_solver.solve_one(image_bytes)
+        ...
+        captcha_solver.report(download_ok)  # 记录服务器校验结果
+    """
+
+    def __init__(self, processes=None):
+        """
+        Args:
+            processes: 识别进程数（0表示在调用线程中识别，None时使用配置）
+        """
+        config = SPIDER_CONFIG.get("captcha", {})
+        self.processes = config.get("processes", 0) if processes is None else processes
+        self.stats_interval = config.get("stats_interval", 50)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._stats = {"solved": 0, "failed": 0, "total_seconds": 0.0, "accepted": 0, "rejected": 0}
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_get_ocr)
+            return self._pool
+
+    def solve(self, images):
+        """
+        批量识别验证码
+
+        Args:
+            images: 验证码图片字节串列表
+
+        Returns:
+            list: 与 images 一一对应的识别结果，识别失败的位置为None
+        """
+        if not DDDDOCR_AVAILABLE:
+            raise RuntimeError("ddddocr未安装，无法识别验证码。请安装: pip install ddddocr")
+        images = list(images)
+        started = time.perf_counter()
+        if self.processes > 0 and len(images) > 0:
+            futures = [self._executor().submit(_classify, image) for image in images]
+            results = [self._result(future.result) for future in futures]
+        else:
+            results = [self._result(_classify, image) for image in images]
+        self._record(results, time.perf_counter() - started)
+        return results
+
+    def solve_one(self, image):
+        """识别单张验证码，失败返回None"""
+        return self.solve([image])[0]
+
+    @staticmethod
+    def _result(func, *args):
+        try:
+            return func(*args) or None
+        except Exception as e:
+            log.warning(f"验证码识别失败: {str(e)}")
+            return None
+
+    def _record(self, results, seconds):
+        with self._lock:
+            solved = sum(1 for result in results if result)
+            self._stats["solved"] += solved
+            self._stats["failed"] += len(results) - solved
+            self._stats["total_seconds"] += seconds
+            total = self._stats["solved"] + self._stats["failed"]
+        if self.stats_interval and total and total % self.stats_interval == 0:
+            log.info(f"验证码识别统计: {self.stats()}")
+
+    def report(self, accepted):
+        """记录识别结果是否通过服务器校验（用于统计通过率）"""
+        with self._lock:
+            self._stats["accepted" if accepted else "rejected"] += 1
+
+    def stats(self):
+        """
+        识别统计
+
+        Returns:
+            dict: 识别次数、平均耗时（毫秒）、识别成功率、服务器校验通过率
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats["solved"] + stats["failed"]
+        checked = stats["accepted"] + stats["rejected"]
+        return {
+            "total": total,
+            "avg_ms": round(stats["total_seconds"] * 1000 / total, 1) if total else 0.0,
+            "solve_rate": round(stats["solved"] / total, 3) if total else 0.0,
+            "accept_rate": round(stats["accepted"] / checked, 3) if checked else None,
+        }
+
+    def close(self):
+        """关闭识别进程池"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 全局共享识别服务
+captcha_solver = CaptchaSolver()
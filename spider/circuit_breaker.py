@@ -0,0 +1,282 @@
+"""按平台熔断
+
+平台开始返回 5xx 或超时时，爬虫仍会逐页请求，每次请求都经过 max_retries 次指数退避重试，
+一个已经宕机的网站可能耗掉一次运行十几分钟。熔断器按平台统计滚动时间窗口内的失败率：
+- closed（正常）：记录每次请求结果，窗口内请求数达到 min_requests 且失败率达到 error_rate 时熔断；
+- open（熔断）：请求直接抛出 CircuitOpenError（不访问网络），rate_limiter.backoff() 也不再等待，
+  重试循环会立即结束；
+- half_open（试探）：熔断时间到后放行一个试探请求，成功则恢复，失败则再次熔断，
+  熔断时间按 open_seconds × 2^(连续熔断次数-1) 增长，最长 max_open_seconds（自适应退避）。
+
+平台的主机由 rate_limiter.configure_platform() 注册，未注册的主机按主机单独熔断。
+状态变化时写入 state_file，界面通过 circuit_breakers.states() 展示（包括其他进程中的爬虫）。
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+
+from utils.log import log
+from config import SPIDER_CONFIG
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_LABELS = {CLOSED: "正常", OPEN: "熔断中", HALF_OPEN: "试探恢复中"}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """平台已熔断，请求未发出（继承 ConnectionError，沿用各处的连接错误处理）"""
+
+
+def _host_of(url_or_host):
+    if url_or_host and "://" in url_or_host:
+        return urlparse(url_or_host).netloc
+    return url_or_host or ""
+
+
+class CircuitBreaker:
+    """单个平台的熔断器（线程安全）"""
+
+    def __init__(self, name, label=None, window_seconds=120, min_requests=6, error_rate=0.5,
+                 open_seconds=30, max_open_seconds=600, probe_timeout=60, on_change=None):
+        """
+        Args:
+            name: 熔断器标识（平台代码或主机名）
+            label: 展示名称
+            window_seconds: 统计失败率的滚动窗口（秒）
+            min_requests: 窗口内至少多少次请求才判断是否熔断
+            error_rate: 熔断的失败率阈值
+            open_seconds: 首次熔断时长（秒）
+            max_open_seconds: 最长熔断时长（秒）
+            probe_timeout: 试探请求超过该时间没有结果时允许再次试探（秒）
+            on_change: 状态变化回调 on_change(breaker)
+        """
+        self.name = name
+        self.label = label or name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe_timeout = probe_timeout
+        self.on_change = on_change
+        self.state = CLOSED
+        self.trips = 0  # 连续熔断次数（试探成功后清零）
+        self.opened_until = 0.0
+        self.updated_at = time.time()
+        self._results = deque()  # [(时间, 是否成功)]
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._results and now - self._results[0][0] > self.window_seconds:
+            self._results.popleft()
+
+    def _set_state(self, state, now):
+        self.state = state
+        self.updated_at = time.time()
+        if state == OPEN:
+            self.trips += 1
+            duration = min(self.open_seconds * 2 ** (self.trips - 1), self.max_open_seconds)
+            self.opened_until = now + duration
+            log.warning(f"平台 {self.label} 熔断 {duration:.0f} 秒（第{self.trips}次），期间请求直接失败")
+        elif state == CLOSED:
+            self.trips = 0
+            self._results.clear()
+            log.info(f"平台 {self.label} 已恢复，解除熔断")
+        self._probe_started = None
+
+    def allow(self):
+        """是否允许发出请求（熔断时间到后转为试探状态并放行一个试探请求）"""
+        changed = False
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self.opened_until:
+                    return False
+                self._set_state(HALF_OPEN, now)
+                changed = True
+            if self.state == HALF_OPEN:
+                if self._probe_started is not None and now - self._probe_started < self.probe_timeout:
+                    allowed = False
+                else:
+                    self._probe_started = now
+                    allowed = True
+            else:
+                allowed = True
+        if changed and self.on_change:
+            self.on_change(self)
+        return allowed
+
+    def record(self, success):
+        """记录一次请求结果"""
+        changed = False
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._set_state(CLOSED if success else OPEN, now)
+                changed = True
+            elif self.state == CLOSED:
+                self._results.append((now, success))
+                self._prune(now)
+                failures = sum(1 for _, ok in self._results if not ok)
+                if len(self._results) >= self.min_requests and failures / len(self._results) >= self.error_rate:
+                    self._set_state(OPEN, now)
+                    changed = True
+        if changed and self.on_change:
+            self.on_change(self)
+
+    def is_open(self):
+        with self._lock:
+            return self.state == OPEN and time.monotonic() < self.opened_until
+
+    def reset(self):
+        """手动解除熔断"""
+        with self._lock:
+            self._set_state(CLOSED, time.monotonic())
+        if self.on_change:
+            self.on_change(self)
+
+    def snapshot(self):
+        """当前状态（供界面展示）"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            total = len(self._results)
+            failures = sum(1 for _, ok in self._results if not ok)
+            return {
+                "name": self.name,
+                "label": self.label,
+                "state": self.state,
+                "state_label": STATE_LABELS[self.state],
+                "requests": total,
+                "error_rate": round(failures / total, 3) if total else 0.0,
+                "trips": self.trips,
+                "retry_in": max(round(self.opened_until - now), 0) if self.state == OPEN else 0,
+                "updated_at": self.updated_at,
+            }
+
+
+class CircuitBreakerRegistry:
+    """按平台管理熔断器"""
+
+    def __init__(self):
+        config = SPIDER_CONFIG.get("circuit_breaker", {})
+        self.enabled = config.get("enabled", True)
+        self.state_file = config.get("state_file")
+        self._settings = {
+            key: config[key]
+            for key in ("window_seconds", "min_requests", "error_rate", "open_seconds", "max_open_seconds", "probe_timeout")
+            if key in config
+        }
+        self._breakers = {}
+        self._hosts = {}  # {主机: 熔断器标识}
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+    def register_platform(self, name, hosts, label=None):
+        """
+        注册平台的主机（同一平台的所有主机共用一个熔断器）
+
+        Args:
+            name: 平台代码
+            hosts: 平台的主机名列表
+            label: 平台名称（展示用）
+        """
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, label, on_change=self._save, **self._settings)
+            for host in hosts:
+                self._hosts[host] = name
+
+    def breaker(self, url_or_host):
+        """获取主机所属平台的熔断器（未注册的主机按主机单独熔断）"""
+        host = _host_of(url_or_host)
+        with self._lock:
+            name = self._hosts.get(host, host)
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, on_change=self._save, **self._settings)
+                self._breakers[name] = breaker
+            return breaker
+
+    def before_request(self, url_or_host):
+        """
+        请求前检查熔断状态
+
+        Raises:
+            CircuitOpenError: 平台已熔断
+        """
+        if not self.enabled or not url_or_host:
+            return
+        breaker = self.breaker(url_or_host)
+        if not breaker.allow():
+            raise CircuitOpenError(f"平台 {breaker.label} 已熔断，跳过请求: {url_or_host}")
+
+    def record(self, url_or_host, success):
+        """记录请求结果"""
+        if self.enabled and url_or_host:
+            self.breaker(url_or_host).record(success)
+
+    def is_open(self, url_or_host):
+        """平台是否处于熔断中（重试等待可以直接跳过）"""
+        return self.enabled and bool(url_or_host) and self.breaker(url_or_host).is_open()
+
+    def reset(self, name):
+        """手动解除熔断"""
+        with self._lock:
+            breaker = self._breakers.get(name)
+        if breaker is not None:
+            breaker.reset()
+
+    def _save(self, _breaker=None):
+        """状态变化时写入状态文件（供其他进程中的界面读取）"""
+        if not self.state_file:
+            return
+        with self._lock:
+            breakers = list(self._breakers.values())
+        states = {breaker.name: breaker.snapshot() for breaker in breakers}
+        with self._file_lock:
+            try:
+                states = {**self._read_file(), **states}
+                os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+                tmp_path = f"{self.state_file}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(states, f, ensure_ascii=False)
+                os.replace(tmp_path, self.state_file)
+            except Exception as e:
+                log.debug(f"保存熔断状态失败（可忽略）: {str(e)}")
+
+    def _read_file(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def states(self):
+        """
+        所有熔断器的状态（本进程的实时状态，加上状态文件中其他进程记录的较新状态）
+
+        Returns:
+            list[dict]: 按名称排序的状态列表
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        states = self._read_file() if self.state_file else {}
+        for breaker in breakers:
+            snapshot = breaker.snapshot()
+            if snapshot["updated_at"] >= states.get(breaker.name, {}).get("updated_at", 0):
+                states[breaker.name] = snapshot
+        return [states[name] for name in sorted(states)]
+
+
+# 全局熔断器（所有平台共享）
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,71 @@
+"""跨平台共享爬取配额
+
+多个平台爬虫并发运行时，通过一个原子计数器分配 total_limit，
+各平台在下载文件前先申请名额，保证合计数量不会超出总限制。
+
+计数器基于 multiprocessing.Value，既可在线程池中共享，
+也可以通过进程池的 initializer 传递给子进程共享。
+"""
+
+import multiprocessing
+
+
+class CrawlQuota:
+    """共享爬取配额（线程/进程安全）
+
+    使用示例:
+        quota = CrawlQuota(total_limit=20)
+        if quota.try_acquire():
+            ...  # 下载并保存项目
+        else:
+            ...  # 配额已用完，停止爬取
+    """
+
+    def __init__(self, total_limit=None, counter=None):
+        """
+        初始化配额
+
+        Args:
+            total_limit: 总配额（None表示不限制，仅计数）
+            counter: 已有的共享计数器（multiprocessing.Value），None时新建
+        """
+        self.total_limit = total_limit
+        self._counter = counter if counter is not None else multiprocessing.Value("i", 0)
+
+    def try_acquire(self, n=1):
+        """
+        申请 n 个名额
+
+        Returns:
+            bool: True表示申请成功，False表示配额不足
+        """
+        with self._counter.get_lock():
+            if self.total_limit is not None and self._counter.value + n > self.total_limit:
+                return False
+            self._counter.value += n
+            return True
+
+    def release(self, n=1):
+        """归还 n 个名额（项目被跳过或下载失败时调用）"""
+        with self._counter.get_lock():
+            self._counter.value = max(self._counter.value - n, 0)
+
+    @property
+    def used(self):
+        """已占用的名额数量"""
+        return self._counter.value
+
+    def remaining(self):
+        """
+        剩余名额
+
+        Returns:
+            int 或 None: 剩余数量，不限制时返回None
+        """
+        if self.total_limit is None:
+            return None
+        return max(self.total_limit - self._counter.value, 0)
+
+    def exhausted(self):
+        """配额是否已用完"""
+        return self.total_limit is not None and self._counter.value >= self.total_limit
@@ -0,0 +1,246 @@
+"""平台登录凭据缓存
+
+登录政采云、宁波平台的 access_token、湖州/丽水通过浏览器获取的 sid 都需要数秒到一分钟，
+还会消耗验证码识别次数。凭据缓存把这些结果连同过期时间保存到磁盘，跨运行复用：
+- get() 先查内存，再查磁盘（其他进程可能已刷新），都无效时才调用 loader 重新登录；
+- 同一凭据的并发请求只登录一次（按键加锁）；
+- 剩余有效期小于 refresh_before 时返回当前凭据，同时在后台线程提前刷新；
+- 服务器提示登录失效时调用 invalidate() 丢弃凭据，下次 get() 会重新登录。
+
+HTTP 录制/回放（见 spider.http_fixtures）开启时只在内存中缓存：录制时每次运行都会重新登录，
+登录请求和浏览器获取的 sid 才会被录制；回放得到的凭据也不会写入真实的凭据缓存。
+
+凭据必须可以 JSON 序列化（字符串、字典、Cookie 列表等）。
+有效期来自 SPIDER_CONFIG["credential_cache"]["ttl"]，也可以由 expiry 回调从凭据本身解析
+（如 JWT 的 exp 字段）。
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+
+from utils.log import log
+from config import SPIDER_CONFIG
+
+try:
+    from .http_fixtures import http_fixtures
+except ImportError:
+    from spider.http_fixtures import http_fixtures
+
+
+def jwt_expiry(token):
+    """
+    解析 JWT 的过期时间（不校验签名）
+
+    Returns:
+        float 或 None: exp 时间戳（秒），不是 JWT 或没有 exp 时返回None
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp else None
+    except Exception:
+        return None
+
+
+def dump_cookies(cookie_jar):
+    """把 requests 的 CookieJar 转换为可序列化的列表"""
+    return [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "expires": cookie.expires,
+            "secure": cookie.secure,
+        }
+        for cookie in cookie_jar
+    ]
+
+
+def load_cookies(session, cookies):
+    """把 dump_cookies 的结果恢复到 requests.Session"""
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"], cookie["value"],
+            domain=cookie.get("domain"), path=cookie.get("path") or "/",
+            expires=cookie.get("expires"), secure=cookie.get("secure", False),
+        )
+    return session
+
+
+def cookies_expiry(cookies):
+    """Cookie 列表中最早的过期时间（会话 Cookie 不计入），都没有过期时间时返回None"""
+    expires = [cookie["expires"] for cookie in cookies if cookie.get("expires")]
+    return float(min(expires)) if expires else None
+
+
+class CredentialCache:
+    """带过期时间的凭据缓存（内存 + 磁盘，线程安全）
+
+    使用示例:
+        token = credential_cache.get("ningbo_access_token", login, expiry=jwt_expiry)
+        ...
+        credential_cache.invalidate("ningbo_access_token")  # 服务器提示登录失效
+    """
+
+    def __init__(self, cache_dir=None, persistent=None):
+        """
+        Args:
+            cache_dir: 缓存文件目录（None时使用配置）
+            persistent: 是否读写磁盘缓存（None时在 HTTP 录制/回放开启时只使用内存）
+        """
+        config = SPIDER_CONFIG.get("credential_cache", {})
+        self.enabled = config.get("enabled", True)
+        self.cache_dir = cache_dir or config.get("cache_dir", "credential_cache")
+        self.persistent = not http_fixtures.active if persistent is None else persistent
+        self.default_ttl = config.get("default_ttl", 3600)
+        self.ttl = config.get("ttl", {})
+        self.refresh_before = config.get("refresh_before", 300)
+        # {key: {"value": ..., "expires_at": ..., "obtained_at": ...}}
+        self._entries = {}
+        self._key_locks = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _valid_entry(self, key):
+        """返回未过期的缓存项（内存中没有或已过期时读取磁盘）"""
+        entry = self._entries.get(key)
+        if entry is None or entry["expires_at"] <= time.time():
+            entry = self._read(key)
+            if entry is not None:
+                self._entries[key] = entry
+        if entry is None or entry["expires_at"] <= time.time():
+            return None
+        return entry
+
+    def _read(self, key):
+        if not self.persistent:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if "value" not in entry or "expires_at" not in entry:
+                raise ValueError("缓存格式不正确")
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"读取凭据缓存失败（将重新获取）: {key}, 错误: {str(e)}")
+            return None
+
+    def _write(self, key, entry):
+        if not self.persistent:
+            return
+        try:
+            # 凭据目录和文件只允许当前用户访问（Windows 上无效果）
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.tmp"
+            # 创建时即为 0600，写入过程中其他用户也无法读取
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            try:
+                # 已存在的临时文件不受 os.open 的 mode 影响
+                os.chmod(tmp_path, 0o600)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # 保存失败只影响下次运行是否需要重新登录
+            log.warning(f"保存凭据缓存失败: {key}, 错误: {str(e)}")
+
+    def _load(self, key, loader, expiry):
+        """调用 loader 获取新凭据并缓存，失败时返回None"""
+        started = time.time()
+        value = loader()
+        if not value:
+            return None
+        expires_at = (expiry(value) if expiry else None) or started + self.ttl.get(key, self.default_ttl)
+        entry = {"value": value, "expires_at": expires_at, "obtained_at": started}
+        self._entries[key] = entry
+        self._write(key, entry)
+        log.info(f"凭据已更新: {key}（耗时 {time.time() - started:.1f} 秒，"
+                 f"有效期至 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(expires_at))}）")
+        return value
+
+    def get(self, key, loader, expiry=None, force_refresh=False):
+        """
+        获取凭据
+
+        Args:
+            key: 凭据标识（同时用作缓存文件名）
+            loader: 获取新凭据的函数 loader() -> value，失败时返回 None 或空值
+            expiry: 从凭据解析过期时间的函数 expiry(value) -> 时间戳或None（None时使用配置的ttl）
+            force_refresh: 忽略缓存，立即重新获取
+
+        Returns:
+            凭据，获取失败时返回None
+        """
+        if not self.enabled:
+            return loader() or None
+        with self._key_lock(key):
+            entry = None if force_refresh else self._valid_entry(key)
+            if entry is None:
+                return self._load(key, loader, expiry)
+        if entry["expires_at"] - time.time() < self.refresh_before:
+            self._refresh_in_background(key, loader, expiry)
+        return entry["value"]
+
+    def _refresh_in_background(self, key, loader, expiry):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with self._key_lock(key):
+                    entry = self._valid_entry(key)
+                    # 其他线程/进程已经刷新过
+                    if entry is not None and entry["expires_at"] - time.time() >= self.refresh_before:
+                        return
+                    log.info(f"凭据即将过期，后台刷新: {key}")
+                    self._load(key, loader, expiry)
+            except Exception as e:
+                log.warning(f"后台刷新凭据失败: {key}, 错误: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"credential-refresh-{key}", daemon=True).start()
+
+    def invalidate(self, key, value=None):
+        """
+        丢弃凭据（服务器提示登录失效时调用）
+
+        Args:
+            key: 凭据标识
+            value: 失效的凭据值；传入时只有缓存中仍是该值才丢弃，避免丢弃其他线程刚刷新的凭据
+        """
+        with self._key_lock(key):
+            entry = self._entries.get(key) or self._read(key)
+            if entry is None or (value is not None and entry["value"] != value):
+                return
+            self._entries.pop(key, None)
+            if self.persistent:
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            log.info(f"凭据已失效，下次使用时重新获取: {key}")
+
+
+# 全局共享凭据缓存
+credential_cache = CredentialCache()
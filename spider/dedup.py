@@ -0,0 +1,209 @@
+"""项目去重索引
+
+替代「每次运行把 tender_projects 的全部 project_id 读入内存」的做法：
+- 每个平台在磁盘上保存一个布隆过滤器，记录表中全部已入库的 project_id（与原先的全表检查一致：
+  其他平台或 site_name 写法不同的记录中已存在的ID同样视为已存在），
+  内存占用约为每个ID 2字节（误判率0.1%时），加载时只需读入过滤器文件；
+- 过滤器判定「不存在」的ID一定是新项目，无需查询数据库；
+- 判定「可能存在」的ID按列表页批量用 IN (...) 查询确认，避免逐条查询；
+- 加载时按自增主键增量补齐上次保存后新增的记录，保存项目时同步加入过滤器。
+"""
+
+import hashlib
+import math
+import os
+import struct
+
+from utils.db import TenderProject
+from utils.log import log
+from config import SPIDER_CONFIG
+
+# 文件头：魔数、哈希函数个数、位数组长度、已加入元素数、已同步的最大记录ID
+_HEADER = struct.Struct(">4sIQQQ")
+_MAGIC = b"TPB2"  # TPBF：只含本平台记录的旧格式，加载时重建
+
+
+class BloomFilter:
+    """布隆过滤器（位数组保存在 bytearray 中，可序列化到磁盘）"""
+
+    def __init__(self, capacity, error_rate=0.001, num_bits=None, num_hashes=None, bits=None, count=0):
+        """
+        初始化过滤器
+
+        Args:
+            capacity: 预期元素数量（超过后误判率会上升，需要重建）
+            error_rate: 目标误判率
+            num_bits/num_hashes/bits/count: 从磁盘加载时使用
+        """
+        capacity = max(int(capacity), 1)
+        if num_bits is None:
+            num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        if num_hashes is None:
+            num_hashes = max(int(round(num_bits / capacity * math.log(2))), 1)
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.capacity = capacity
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, key):
+        # 双重哈希：由一个128位摘要派生 k 个位置
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """加入元素"""
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class DedupIndex:
+    """单个平台使用的项目去重索引（覆盖全表的 project_id）
+
+    使用示例:
+        index = DedupIndex(db, "杭州市公共资源交易网", "hangzhou")
+        new_ids = index.filter_new(["id1", "id2"])  # 一次 IN 查询确认
+        ...
+        index.add("id1")  # 项目保存成功后
+        index.save()
+    """
+
+    def __init__(self, db, platform_name, platform_code, index_dir=None):
+        """
+        初始化去重索引（首次使用时加载或重建过滤器）
+
+        Args:
+            db: 数据库会话
+            platform_name: 平台名称（用于日志）
+            platform_code: 平台代码（用作过滤器文件名，各平台的过滤器互不干扰地保存和重建）
+            index_dir: 过滤器文件目录（None时使用配置）
+        """
+        config = SPIDER_CONFIG.get("dedup", {})
+        self.db = db
+        self.platform_name = platform_name
+        self.path = os.path.join(index_dir or config.get("index_dir", "dedup_index"), f"{platform_code}.bloom")
+        self.capacity = config.get("capacity", 100000)
+        self.error_rate = config.get("error_rate", 0.001)
+        self.batch_size = config.get("batch_size", 500)
+        self._filter = None
+        self._synced_row_id = 0
+        self._dirty = False
+
+    def _project_query(self):
+        # project_id 全表唯一，不按 site_name 限定平台，与原先的全表检查结果一致
+        return self.db.query(TenderProject.id, TenderProject.project_id).filter(
+            TenderProject.project_id.isnot(None),
+        )
+
+    def _ensure_loaded(self):
+        if self._filter is not None:
+            return
+        if not self._load():
+            self._rebuild()
+            return
+        # 增量补齐上次同步后新增的记录（包括其他进程写入的）
+        added = self._sync_from(self._synced_row_id)
+        if self._filter.count > self._filter.capacity:
+            log.info(f"{self.platform_name}去重索引元素数超过容量，重建过滤器")
+            self._rebuild()
+        elif added:
+            log.debug(f"{self.platform_name}去重索引补齐 {added} 条新记录")
+
+    def _load(self):
+        """从磁盘加载过滤器，文件不存在或损坏时返回False"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                magic, num_hashes, num_bits, count, synced_row_id = _HEADER.unpack(f.read(_HEADER.size))
+                bits = bytearray(f.read())
+            if magic != _MAGIC or len(bits) != (num_bits + 7) // 8:
+                raise ValueError("文件格式不正确")
+        except Exception as e:
+            log.warning(f"{self.platform_name}去重索引文件损坏，将重建: {str(e)}")
+            return False
+        capacity = max(int(num_bits * (math.log(2) ** 2) / -math.log(self.error_rate)), 1)
+        self._filter = BloomFilter(capacity, self.error_rate, num_bits, num_hashes, bits, count)
+        self._synced_row_id = synced_row_id
+        return True
+
+    def _sync_from(self, row_id):
+        """把主键大于 row_id 的记录加入过滤器，返回加入数量"""
+        added = 0
+        for record_id, project_id in self._project_query().filter(TenderProject.id > row_id).yield_per(1000):
+            self._filter.add(project_id)
+            self._synced_row_id = max(self._synced_row_id, record_id)
+            added += 1
+        if added:
+            self._dirty = True
+        return added
+
+    def _rebuild(self):
+        """按记录数重建过滤器（逐批读取，不在内存中保留ID集合）"""
+        total = self._project_query().count()
+        capacity = max(self.capacity, total * 2)
+        self._filter = BloomFilter(capacity, self.error_rate)
+        self._synced_row_id = 0
+        self._sync_from(0)
+        self._dirty = True
+        log.info(f"{self.platform_name}去重索引已重建：{total} 条记录，容量 {capacity}")
+
+    def filter_new(self, project_ids):
+        """
+        批量判断项目是否为新项目
+
+        Args:
+            project_ids: 项目ID列表（通常为一个列表页的项目）
+
+        Returns:
+            set: 数据库中不存在的项目ID集合
+        """
+        self._ensure_loaded()
+        project_ids = {project_id for project_id in project_ids if project_id}
+        maybe_existing = [project_id for project_id in project_ids if project_id in self._filter]
+        existing = set()
+        for start in range(0, len(maybe_existing), self.batch_size):
+            chunk = maybe_existing[start:start + self.batch_size]
+            existing.update(
+                row[0] for row in self.db.query(TenderProject.project_id)
+                .filter(TenderProject.project_id.in_(chunk))
+                .all()
+            )
+        return project_ids - existing
+
+    def exists(self, project_id):
+        """判断单个项目是否已存在"""
+        return bool(project_id) and project_id not in self.filter_new([project_id])
+
+    def add(self, project_id):
+        """项目保存成功后加入过滤器"""
+        if not project_id:
+            return
+        self._ensure_loaded()
+        self._filter.add(project_id)
+        self._dirty = True
+
+    def save(self):
+        """把过滤器写回磁盘（先写临时文件再替换，避免写入中断导致文件损坏）"""
+        if self._filter is None or not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(
+                    _MAGIC, self._filter.num_hashes, self._filter.num_bits,
+                    self._filter.count, self._synced_row_id,
+                ))
+                f.write(self._filter.bits)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            # 保存失败只影响下次加载速度（会重建），不影响去重结果
+            log.warning(f"{self.platform_name}去重索引保存失败: {str(e)}")
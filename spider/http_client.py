@@ -0,0 +1,130 @@
+"""共享 HTTP 连接池
+
+原先每个爬虫各自新建 requests.Session（各自一套默认大小的连接池），ZheJiangTenderSpider
+在未传入会话时每次下载都新建会话，衢州 OCR、湖州/丽水验证码等请求直接调用 requests.post，
+并发下载时同一主机的 TLS 连接无法复用，每个请求都要重新握手。这里统一提供 HTTP 客户端：
+- 所有会话挂载同一个适配器，连接池按主机维护（最多 pool_connections 个主机，
+  每个主机最多保持 pool_maxsize 个长连接），不同会话、不同平台之间复用连接；
+- 连接开启 TCP keep-alive，长时间空闲的连接不会被中间设备静默断开；
+- 建立连接失败时在传输层自动重试 connect_retries 次（请求尚未发出，对 POST 也安全）；
+- 调用方未指定 timeout 时使用统一的默认超时；
+- 适配器继承 RateLimitedAdapter，按主机限速和熔断统计照常生效。
+
+Cookie 和请求头保存在会话上，连接池只保存连接，所以各会话的登录状态互不影响。
+
+使用示例:
+    session = http_client.session(headers=HEADERS, cookies=COOKIES)
+    response = http_client.post(url, json=data)  # 一次性请求，不保留 Cookie
+"""
+
+import atexit
+import socket
+
+import requests
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+from config import SPIDER_CONFIG
+
+try:
+    from .rate_limiter import rate_limiter, RateLimitedAdapter
+except ImportError:
+    from spider.rate_limiter import rate_limiter, RateLimitedAdapter
+
+# 在 urllib3 默认选项（关闭 Nagle）基础上开启 TCP keep-alive
+_KEEPALIVE_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+
+class PooledAdapter(RateLimitedAdapter):
+    """所有会话共用的适配器：开启 keep-alive、应用默认超时，会话关闭时不关闭连接池"""
+
+    def __init__(self, limiter, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(limiter, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", _KEEPALIVE_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+    def close(self):
+        # Session.close() 会关闭其挂载的适配器，共享连接池只在进程退出时关闭（见 shutdown）
+        pass
+
+    def shutdown(self):
+        """关闭所有连接"""
+        super().close()
+
+
+class HttpClient:
+    """HTTP 客户端工厂（线程安全）"""
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, connect_retries=None, timeout=None):
+        """
+        Args:
+            pool_connections: 最多保持连接池的主机数
+            pool_maxsize: 每个主机最多保持的连接数
+            connect_retries: 建立连接失败时的重试次数
+            timeout: 默认超时（秒，或 (连接超时, 读取超时)）
+        """
+        config = SPIDER_CONFIG.get("http_client", {})
+        connect_retries = config.get("connect_retries", 2) if connect_retries is None else connect_retries
+        timeout = timeout or config.get("timeout") or SPIDER_CONFIG["anti_crawl"].get("timeout", 15)
+        self.adapter = PooledAdapter(
+            rate_limiter,
+            timeout=tuple(timeout) if isinstance(timeout, list) else timeout,
+            pool_connections=pool_connections or config.get("pool_connections", 32),
+            pool_maxsize=pool_maxsize or config.get("pool_maxsize", 16),
+            # 只重试连接阶段的错误；读取超时和错误状态码由各平台的重试逻辑处理
+            max_retries=Retry(
+                total=connect_retries,
+                connect=connect_retries,
+                read=False,
+                status=0,
+                other=0,
+                backoff_factor=config.get("retry_backoff", 0.5),
+                raise_on_status=False,
+            ),
+        )
+
+    def session(self, headers=None, cookies=None):
+        """
+        创建使用共享连接池的会话
+
+        Args:
+            headers: 会话默认请求头
+            cookies: 会话初始 Cookie
+
+        Returns:
+            requests.Session: 会话（关闭会话不影响共享连接池）
+        """
+        session = requests.Session()
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        if headers:
+            session.headers.update(headers)
+        if cookies:
+            session.cookies.update(cookies)
+        return session
+
+    def request(self, method, url, **kwargs):
+        """一次性请求（与 requests.request 相同，不保留 Cookie，但复用共享连接池）"""
+        with self.session() as session:
+            return session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """关闭共享连接池中的所有连接"""
+        self.adapter.shutdown()
+
+
+# 全局共享 HTTP 客户端（所有平台共用连接池）
+http_client = HttpClient()
+atexit.register(http_client.close)
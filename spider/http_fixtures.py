@@ -0,0 +1,278 @@
+"""HTTP 录制/回放
+
+spider/crawl_tests 下的示例只能访问线上网站，无法离线测量爬取吞吐量或发现性能回退。
+录制/回放层挂在 requests 的传输层（HTTPAdapter.send）上，所有 requests.Session
+（包括 rate_limiter.install 挂载的限速适配器）和直接调用 requests.get/post 的请求都会经过：
+- record：正常访问网络，同时把每次请求/响应（列表、详情、验证码、文件下载）写入一个 zip 归档；
+- replay：不访问网络，从归档中找到匹配的响应返回，并按配置注入延迟，
+  可以在无网络的机器上确定性地对 SpiderManager.run_all_spiders 做基准测试；
+- off（默认）：不做任何处理。
+
+模式由 SPIDER_CONFIG["http_fixtures"] 决定（环境变量 SPIDER_HTTP_FIXTURES=record/replay）。
+回放时按「方法 + URL（忽略 ignore_params 中的时间戳等参数）+ 请求体」匹配，同一请求录制了多次时
+按录制顺序依次返回（用完后重复最后一次）；匹配不到时退化为按「方法 + 主机 + 路径」匹配，
+仍找不到则抛出 requests.ConnectionError（与断网时的表现一致）。
+浏览器获取的 sid 等不经过 requests 的结果用 memo() 一并录制。
+
+注意：录制模式下响应体会完整读入内存后再交给调用方（流式下载也是如此）；
+录制只支持线程池模式（多个进程会写同一个归档文件，SpiderManager 在录制时改用线程池），
+回放可以在进程池中使用（子进程各自重新打开归档）。
+"""
+
+import atexit
+import hashlib
+import http.client
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+from utils.log import log
+from config import SPIDER_CONFIG
+
+# 录制时丢弃的响应头：响应体保存的是解压后的内容，长度在回放时重新计算
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+class _RecordedMessage:
+    """回放响应的原始响应占位（requests 从 msg 中解析 Set-Cookie）"""
+
+    def __init__(self, header_pairs):
+        lines = "".join(f"{name}: {value}\r\n" for name, value in header_pairs)
+        self.msg = http.client.parse_headers(io.BytesIO((lines + "\r\n").encode("latin-1", "replace")))
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class HttpFixtures:
+    """HTTP 录制/回放（线程安全）
+
+    使用示例:
+        SPIDER_HTTP_FIXTURES=record python main.py   # 联网录制
+        SPIDER_HTTP_FIXTURES=replay python main.py   # 离线回放
+    """
+
+    def __init__(self, mode=None, archive=None):
+        """
+        Args:
+            mode: off / record / replay（None时使用配置）
+            archive: 归档文件路径（None时使用配置）
+        """
+        config = SPIDER_CONFIG.get("http_fixtures", {})
+        self.mode = (mode or config.get("mode") or "off").lower()
+        self.archive = archive or config.get("archive", "http_fixtures.zip")
+        self.latency = config.get("latency", 0.0)
+        self.recorded_latency = config.get("recorded_latency", False)
+        self.rate_limit = config.get("rate_limit", False)
+        self.ignore_params = set(config.get("ignore_params", []))
+        self._zip = None
+        self._count = 0
+        # 回放索引：{匹配键: [录制项, ...]}，以及每个匹配键已返回的次数
+        self._exchanges = {}
+        self._fallback = {}
+        self._memos = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self._original_send = None
+        # 打开归档的进程（fork 出的子进程与父进程共享文件偏移，回放时需要重新打开）
+        self._pid = os.getpid()
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    @property
+    def active(self):
+        return self.recording or self.replaying
+
+    def activate(self):
+        """挂载到 HTTPAdapter.send（只需调用一次）"""
+        if not self.active or self._original_send is not None:
+            return
+        if self.recording:
+            directory = os.path.dirname(os.path.abspath(self.archive))
+            os.makedirs(directory, exist_ok=True)
+            self._zip = zipfile.ZipFile(self.archive, "w", compression=zipfile.ZIP_DEFLATED)
+            log.info(f"HTTP录制已开启，归档文件: {self.archive}")
+        else:
+            self._load()
+            log.info(f"HTTP回放已开启，归档文件: {self.archive}（共 {self._count} 条记录）")
+
+        original_send = HTTPAdapter.send
+        fixtures = self
+
+        def send(adapter, request, **kwargs):
+            if fixtures.replaying:
+                return fixtures._replay(adapter, request)
+            response = original_send(adapter, request, **kwargs)
+            fixtures._record(request, response)
+            return response
+
+        self._original_send = original_send
+        HTTPAdapter.send = send
+
+    def _request_key(self, method, url, body):
+        """匹配键：方法 + 主机 + 路径 + 排序后的参数（去掉 ignore_params）+ 请求体摘要"""
+        parts = urlsplit(url)
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in self.ignore_params)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if isinstance(body, bytes) and self.ignore_params and b"=" in body and not body.lstrip().startswith((b"{", b"[")):
+            # 表单请求体同样去掉时间戳等参数
+            form = parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True)
+            body = urlencode(sorted((k, v) for k, v in form if k not in self.ignore_params)).encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest() if isinstance(body, bytes) and body else ""
+        return f"{method} {parts.netloc}{parts.path}?{urlencode(query)} {digest}"
+
+    @staticmethod
+    def _fallback_key(method, url):
+        parts = urlsplit(url)
+        return f"{method} {parts.netloc}{parts.path}"
+
+    def _record(self, request, response):
+        try:
+            body = response.content
+        except Exception as e:
+            log.warning(f"HTTP录制读取响应失败（该请求不录制）: {request.url}, 错误: {str(e)}")
+            return
+        raw_headers = getattr(response.raw, "headers", None)
+        if raw_headers is not None and hasattr(raw_headers, "iteritems"):
+            pairs = list(raw_headers.iteritems())
+        else:
+            pairs = list(response.headers.items())
+        exchange = {
+            "method": request.method,
+            "url": request.url,
+            "key": self._request_key(request.method, request.url, request.body),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": [[name, value] for name, value in pairs if name.lower() not in _DROPPED_HEADERS],
+            "elapsed": response.elapsed.total_seconds(),
+        }
+        with self._lock:
+            if self._zip is None:
+                return
+            self._count += 1
+            name = f"exchanges/{self._count:06d}"
+            self._zip.writestr(f"{name}.json", json.dumps(exchange, ensure_ascii=False))
+            self._zip.writestr(f"{name}.body", body)
+
+    def _load(self):
+        """读取归档并建立回放索引"""
+        try:
+            self._zip = zipfile.ZipFile(self.archive, "r")
+        except (OSError, zipfile.BadZipFile) as e:
+            raise RuntimeError(f"无法打开HTTP回放归档: {self.archive}, 错误: {str(e)}")
+        for name in sorted(self._zip.namelist()):
+            if not name.endswith(".json"):
+                continue
+            item = json.loads(self._zip.read(name))
+            if name.startswith("memo/"):
+                self._memos.setdefault(item["key"], []).append(item["value"])
+                continue
+            item["body"] = name[:-len(".json")] + ".body"
+            self._exchanges.setdefault(item["key"], []).append(item)
+            self._fallback.setdefault(self._fallback_key(item["method"], item["url"]), []).append(item)
+            self._count += 1
+
+    def _reader(self):
+        """回放归档（在 fork 出的子进程中重新打开，调用方持有锁）"""
+        if os.getpid() != self._pid:
+            # 不关闭继承的句柄：它与父进程共用同一个文件
+            self._zip = zipfile.ZipFile(self.archive, "r")
+            self._pid = os.getpid()
+        return self._zip
+
+    def _next(self, index, key):
+        """按录制顺序取下一条记录（用完后重复最后一条，调用方持有锁）"""
+        items = index.get(key)
+        if not items:
+            return None
+        cursor = self._cursors.get((id(index), key), 0)
+        self._cursors[(id(index), key)] = cursor + 1
+        return items[min(cursor, len(items) - 1)]
+
+    def _replay(self, adapter, request):
+        with self._lock:
+            exchange = self._next(self._exchanges, self._request_key(request.method, request.url, request.body))
+            if exchange is None:
+                exchange = self._next(self._fallback, self._fallback_key(request.method, request.url))
+            body = self._reader().read(exchange["body"]) if exchange is not None else None
+        if exchange is None:
+            raise requests.ConnectionError(f"HTTP回放归档中没有该请求: {request.method} {request.url}", request=request)
+
+        delay = exchange.get("elapsed", 0.0) if self.recorded_latency else self.latency
+        if delay:
+            time.sleep(delay)
+
+        headers = HTTPHeaderDict()
+        for name, value in exchange["headers"]:
+            headers.add(name, value)
+        headers["Content-Length"] = str(len(body))
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=exchange["status"],
+            reason=exchange.get("reason"),
+            preload_content=False,
+            decode_content=False,
+            original_response=_RecordedMessage(exchange["headers"]),
+        )
+        response = adapter.build_response(request, raw)
+        response.elapsed = timedelta(seconds=delay or 0)
+        return response
+
+    def memo(self, key, func):
+        """
+        录制/回放不经过 requests 的结果（如浏览器获取的 sid）
+
+        Args:
+            key: 结果标识
+            func: 获取结果的函数（回放时不调用），结果需可 JSON 序列化
+
+        Returns:
+            录制模式和关闭时为 func() 的结果，回放模式为录制的结果（没有录制时返回None）
+        """
+        if self.replaying:
+            with self._lock:
+                return self._next(self._memos, key)
+        value = func()
+        if self.recording:
+            with self._lock:
+                if self._zip is not None:
+                    self._count += 1
+                    self._zip.writestr(f"memo/{self._count:06d}.json",
+                                       json.dumps({"key": key, "value": value}, ensure_ascii=False))
+        return value
+
+    def close(self):
+        """写完归档（录制模式下不调用会导致归档损坏）"""
+        with self._lock:
+            archive, self._zip = self._zip, None
+        if archive is not None:
+            archive.close()
+            if self.recording:
+                log.info(f"HTTP录制已保存: {self.archive}（共 {self._count} 条记录）")
+
+
+# 全局录制/回放实例（按配置自动挂载）
+http_fixtures = HttpFixtures()
+http_fixtures.activate()
+atexit.register(http_fixtures.close)
@@ -0,0 +1,79 @@
+// 常驻 JS 执行进程（由 spider/js_worker.py 启动）
+//
+// 协议：stdin/stdout 上的逐行 JSON
+//   请求：{"id": 1, "file": "/abs/path/login.js", "func": "a", "args": []}
+//   响应：{"id": 1, "result": ...} 或 {"id": 1, "error": "..."}
+// 每个脚本只编译执行一次（与 execjs.compile 语义相同：顶层定义的函数可被调用），
+// require 按脚本所在目录解析 node_modules，无需切换工作目录。
+// 脚本中的 console 输出重定向到 stderr，避免破坏 stdout 上的协议。
+
+"use strict";
+
+const fs = require("fs");
+const path = require("path");
+const readline = require("readline");
+const vm = require("vm");
+const { createRequire } = require("module");
+
+const scriptConsole = new console.Console({ stdout: process.stderr, stderr: process.stderr });
+const contexts = new Map();
+
+function loadScript(file) {
+  let context = contexts.get(file);
+  if (context) {
+    return context;
+  }
+  const sandbox = {
+    require: createRequire(file),
+    console: scriptConsole,
+    Buffer,
+    process,
+    setTimeout,
+    clearTimeout,
+    setInterval,
+    clearInterval,
+    TextEncoder,
+    TextDecoder,
+    URL,
+    __filename: file,
+    __dirname: path.dirname(file),
+  };
+  if (typeof atob === "function") {
+    sandbox.atob = atob;
+    sandbox.btoa = btoa;
+  }
+  context = vm.createContext(sandbox);
+  vm.runInContext(fs.readFileSync(file, "utf8"), context, { filename: file });
+  contexts.set(file, context);
+  return context;
+}
+
+function respond(message) {
+  process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+rl.on("line", async (line) => {
+  if (!line.trim()) {
+    return;
+  }
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch (e) {
+    respond({ id: null, error: "invalid request: " + e.message });
+    return;
+  }
+  try {
+    const context = loadScript(request.file);
+    const func = context[request.func];
+    if (typeof func !== "function") {
+      throw new Error(request.func + " is not a function in " + request.file);
+    }
+    const result = await func.apply(context, request.args || []);
+    respond({ id: request.id, result: result === undefined ? null : result });
+  } catch (e) {
+    respond({ id: request.id, error: (e && e.stack) || String(e) });
+  }
+});
+rl.on("close", () => process.exit(0));
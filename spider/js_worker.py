@@ -0,0 +1,146 @@
+"""常驻 Node.js 执行进程
+
+替代每次调用都 execjs.compile（每次都启动一个 Node 进程并重新编译脚本）的做法：
+- 首次调用时启动一个 Node 子进程（spider/js_worker.js），之后所有线程复用；
+- 通过 stdin/stdout 逐行 JSON 通信，脚本只在首次调用时编译一次；
+- require 按脚本所在目录解析 node_modules，不再需要 os.chdir（工作目录是进程级的，多线程下不安全）；
+- 调用超时或进程异常退出时结束子进程，下次调用自动重启。
+
+使用示例:
+    from spider.js_worker import js_worker
+    encrypted = js_worker.call("/path/to/login.js", "a")
+"""
+
+import atexit
+import itertools
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+from utils.log import log
+from config import SPIDER_CONFIG
+
+_BOOTSTRAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js_worker.js")
+
+
+class JsWorkerError(RuntimeError):
+    """JS 执行失败（Node 不可用、脚本报错或调用超时）"""
+
+
+class NodeWorker:
+    """常驻 Node 子进程（线程安全，调用按顺序执行）"""
+
+    def __init__(self, node_path=None, call_timeout=None):
+        config = SPIDER_CONFIG.get("js_worker", {})
+        self.node_path = node_path or config.get("node_path", "node")
+        self.call_timeout = call_timeout or config.get("call_timeout", 30)
+        self._process = None
+        self._responses = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _start(self):
+        node = shutil.which(self.node_path)
+        if not node:
+            raise JsWorkerError(f"未找到 Node.js（{self.node_path}），请安装 Node.js 或配置 SPIDER_CONFIG['js_worker']['node_path']")
+        self._process = subprocess.Popen(
+            [node, _BOOTSTRAP_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_stdout, args=(self._process, self._responses),
+                         name="js-worker-stdout", daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self._process,),
+                         name="js-worker-stderr", daemon=True).start()
+        log.debug(f"Node.js 执行进程已启动（pid={self._process.pid}）")
+
+    @staticmethod
+    def _read_stdout(process, responses):
+        for line in process.stdout:
+            try:
+                responses.put(json.loads(line))
+            except ValueError:
+                log.debug(f"Node.js 执行进程输出无法解析: {line.strip()[:200]}")
+        # 进程退出，唤醒等待中的调用
+        responses.put(None)
+
+    @staticmethod
+    def _read_stderr(process):
+        # 脚本的 console 输出和 Node 报错都在 stderr 中
+        for line in process.stderr:
+            log.debug(f"[node] {line.rstrip()}")
+
+    def call(self, script_path, func, *args, timeout=None):
+        """
+        调用脚本中的顶层函数
+
+        Args:
+            script_path: JS 文件路径
+            func: 函数名
+            *args: 参数（需可 JSON 序列化）
+            timeout: 超时时间（秒，None时使用配置）
+
+        Returns:
+            函数返回值（JSON 反序列化后的结果）
+
+        Raises:
+            JsWorkerError: Node 不可用、脚本执行出错或超时
+        """
+        request_id = next(self._ids)
+        request = json.dumps({"id": request_id, "file": os.path.abspath(script_path), "func": func, "args": list(args)})
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            try:
+                self._process.stdin.write(request + "\n")
+                self._process.stdin.flush()
+                while True:
+                    response = self._responses.get(timeout=timeout or self.call_timeout)
+                    if response is None:
+                        raise JsWorkerError(f"Node.js 执行进程已退出（返回码 {self._process.poll()}）")
+                    if response.get("id") == request_id:
+                        break
+            except queue.Empty:
+                self._stop()
+                raise JsWorkerError(f"调用 {func} 超时（{timeout or self.call_timeout}秒）")
+            except (OSError, ValueError) as e:
+                self._stop()
+                raise JsWorkerError(f"与 Node.js 执行进程通信失败: {str(e)}")
+            except JsWorkerError:
+                self._stop()
+                raise
+        if "error" in response:
+            raise JsWorkerError(f"执行 {os.path.basename(script_path)}:{func} 失败: {response['error']}")
+        return response.get("result")
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def close(self):
+        """结束 Node 子进程"""
+        with self._lock:
+            self._stop()
+
+
+# 全局共享执行进程（首次调用时启动）
+js_worker = NodeWorker()
+atexit.register(js_worker.close)
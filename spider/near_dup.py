@@ -0,0 +1,333 @@
+"""跨平台近似重复公告检测
+
+同一个采购项目常常同时发布在省级和市级平台上，标题略有不同（区域前缀、括号、公告类型后缀等），
+project_id 也不同，按ID去重无法识别，结果被重复下载、解析并调用大模型。
+近似重复索引在列表阶段（下载之前）比较公告的签名：
+- 规范化标题的 SimHash（64位，快速筛选）和 MinHash（估算字符二元组的 Jaccard 相似度，精确判断）；
+- 发布日期相差不超过 date_window_days 天；
+- 标题中的数字（标段号、包号、编号）必须一致，避免把同一项目的不同标段判为重复；
+- 列表数据中带有采购人（purchaser）、预算（budget）时也必须一致。
+签名保存在 notice_signatures 表中：已入库项目的签名关联 tender_project_id，
+判定为近似重复的公告记录 duplicate_of（关联已有项目），不再下载，之后的运行也直接跳过。
+只比较不同平台之间的公告，同一平台内标题相近的通常是不同项目。
+"""
+
+import hashlib
+import re
+import struct
+from datetime import datetime, timedelta
+
+from utils.db import NoticeSignature, TenderProject
+from utils.log import log
+from config import SPIDER_CONFIG
+
+# 标题中不影响语义的公告类型词
+_NOISE_WORDS = re.compile(
+    r"(招标公告|采购公告|招标文件|公开招标|竞争性磋商|竞争性谈判|询价|单一来源|邀请招标|"
+    r"更正公告|变更公告|项目|公告|采购|招标|的)"
+)
+# 标题开头的区域、类型前缀，如 [安吉县]、【政府采购】
+_PREFIX = re.compile(r"^\s*([\[【(（][^\]】)）]{0,20}[\]】)）]\s*)+")
+_NUMBERS = re.compile(r"\d+")
+_CN_DIGITS = str.maketrans("一二三四五六七八九〇零", "12345678900")
+_PUNCT = re.compile(r"[\s\W_]+", re.UNICODE)
+
+_MERSENNE = (1 << 61) - 1
+_MASK64 = (1 << 64) - 1
+
+
+def normalize_title(title):
+    """规范化标题：去掉区域前缀、公告类型词、标点和空白"""
+    title = _PREFIX.sub("", title or "")
+    title = _NOISE_WORDS.sub("", title)
+    return _PUNCT.sub("", title).lower()
+
+
+def title_numbers(title):
+    """标题中的数字（包括中文数字的标段号、包号），用于区分同一项目的不同标段"""
+    text = re.sub(r"第?([一二三四五六七八九〇零]+)(标段|包|期|批)", lambda m: m.group(1).translate(_CN_DIGITS) + m.group(2),
+                  title or "")
+    return tuple(sorted(set(_NUMBERS.findall(text))))
+
+
+def normalize_purchaser(purchaser):
+    return _PUNCT.sub("", purchaser or "").lower() or None
+
+
+def _shingles(text):
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text):
+    """字符二元组的 64 位 SimHash（无符号整数）"""
+    weights = [0] * 64
+    for shingle in _shingles(text):
+        h = _hash64(shingle)
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a, b):
+    return bin((a ^ b) & _MASK64).count("1")
+
+
+class MinHasher:
+    """MinHash 签名（num_perm 个哈希函数，由固定种子生成，结果可跨进程比较）"""
+
+    def __init__(self, num_perm=64):
+        self.num_perm = num_perm
+        self._params = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+            a, b = struct.unpack(">QQ", digest)
+            self._params.append(((a % (_MERSENNE - 1)) + 1, b % _MERSENNE))
+
+    def signature(self, text):
+        hashes = [_hash64(shingle) for shingle in _shingles(text)]
+        if not hashes:
+            return (0,) * self.num_perm
+        return tuple(min((a * h + b) % _MERSENNE for h in hashes) & 0xFFFFFFFF for a, b in self._params)
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """估算 Jaccard 相似度"""
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+    @staticmethod
+    def dumps(signature):
+        return struct.pack(f">{len(signature)}I", *signature).hex()
+
+    @staticmethod
+    def loads(text):
+        data = bytes.fromhex(text or "")
+        return struct.unpack(f">{len(data) // 4}I", data)
+
+
+def _to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def platform_of(site_name):
+    """site_name 中的平台名称（浙江省政府采购网的 site_name 带有区域后缀）"""
+    return (site_name or "").split("-")[0]
+
+
+class NearDupIndex:
+    """单个平台的近似重复检测索引
+
+    使用示例:
+        index = NearDupIndex(db, "湖州市绿色采购服务平台")
+        new_projects = index.filter_page(page_projects)  # 近似重复的公告被关联并剔除
+        ...
+        index.add_many(saved_projects, data_by_id)  # 一批项目保存成功后
+    """
+
+    def __init__(self, db, platform_name):
+        config = SPIDER_CONFIG.get("near_dup", {})
+        self.db = db
+        self.platform = platform_of(platform_name)
+        self.date_window = timedelta(days=config.get("date_window_days", 3))
+        self.max_hamming = config.get("max_hamming", 12)
+        self.min_similarity = config.get("min_similarity", 0.8)
+        self.budget_tolerance = config.get("budget_tolerance", 0.01)
+        self.backfill_days = config.get("backfill_days", 30)
+        self.hasher = MinHasher(config.get("num_perm", 64))
+        # 其他平台已入库公告的签名 [(tender_project_id, 签名)]
+        self._entries = []
+        # 本平台已判定为近似重复的 project_id
+        self._linked = set()
+        self._synced_row_id = None
+
+    def _signature(self, project_id, project_name, site_name, publish_time, purchaser=None, budget=None):
+        title = normalize_title(project_name)
+        return {
+            "project_id": str(project_id),
+            "platform": platform_of(site_name) or self.platform,
+            "title_norm": title[:512],
+            "purchaser": normalize_purchaser(purchaser),
+            "budget": float(budget) if budget not in (None, "") else None,
+            "publish_date": publish_time,
+            "simhash": simhash(title),
+            "minhash": self.hasher.signature(title),
+        }
+
+    def _row(self, signature, tender_project_id=None, duplicate_of=None):
+        return NoticeSignature(
+            project_id=signature["project_id"],
+            platform=signature["platform"],
+            tender_project_id=tender_project_id,
+            duplicate_of=duplicate_of,
+            title_norm=signature["title_norm"],
+            purchaser=signature["purchaser"],
+            budget=signature["budget"],
+            publish_date=signature["publish_date"],
+            simhash=_to_signed(signature["simhash"]),
+            minhash=MinHasher.dumps(signature["minhash"]),
+        )
+
+    def _backfill(self):
+        """为近期已入库但还没有签名的项目补齐签名（首次启用或其他程序写入的项目）"""
+        since = datetime.now() - timedelta(days=self.backfill_days)
+        signed = self.db.query(NoticeSignature.tender_project_id).filter(NoticeSignature.tender_project_id.isnot(None))
+        rows = self.db.query(
+            TenderProject.id, TenderProject.project_id, TenderProject.project_name,
+            TenderProject.site_name, TenderProject.publish_time,
+        ).filter(
+            TenderProject.publish_time >= since,
+            TenderProject.project_id.isnot(None),
+            ~TenderProject.id.in_(signed),
+        ).all()
+        if not rows:
+            return
+        for row in rows:
+            signature = self._signature(row.project_id, row.project_name, row.site_name, row.publish_time)
+            self.db.add(self._row(signature, tender_project_id=row.id))
+        self.db.commit()
+        log.info(f"近似重复索引补齐 {len(rows)} 个已入库项目的签名")
+
+    def _sync(self):
+        """加载上次同步后新增的签名（包括其他平台并发写入的）"""
+        if self._synced_row_id is None:
+            try:
+                self._backfill()
+            except Exception as e:
+                self.db.rollback()
+                log.warning(f"近似重复索引补齐签名失败（可忽略）: {str(e)}")
+            self._synced_row_id = 0
+            query = self.db.query(NoticeSignature).filter(
+                NoticeSignature.publish_date >= datetime.now() - timedelta(days=self.backfill_days) - self.date_window
+            )
+        else:
+            query = self.db.query(NoticeSignature).filter(NoticeSignature.id > self._synced_row_id)
+        for row in query.order_by(NoticeSignature.id).all():
+            self._synced_row_id = max(self._synced_row_id, row.id)
+            if row.platform == self.platform:
+                if row.duplicate_of is not None:
+                    self._linked.add(row.project_id)
+                continue
+            if row.tender_project_id is None:
+                continue
+            self._entries.append((row.tender_project_id, {
+                "numbers": title_numbers(row.title_norm),
+                "purchaser": row.purchaser,
+                "budget": row.budget,
+                "publish_date": row.publish_date,
+                "simhash": row.simhash & _MASK64,
+                "minhash": MinHasher.loads(row.minhash),
+            }))
+
+    def _matches(self, candidate, entry, numbers):
+        if candidate["publish_date"] and entry["publish_date"]:
+            if abs(candidate["publish_date"] - entry["publish_date"]) > self.date_window:
+                return 0.0
+        if candidate["purchaser"] and entry["purchaser"] and candidate["purchaser"] != entry["purchaser"]:
+            return 0.0
+        if candidate["budget"] and entry["budget"]:
+            if abs(candidate["budget"] - entry["budget"]) > self.budget_tolerance * max(candidate["budget"], entry["budget"]):
+                return 0.0
+        if hamming(candidate["simhash"], entry["simhash"]) > self.max_hamming:
+            return 0.0
+        similarity = MinHasher.similarity(candidate["minhash"], entry["minhash"])
+        if similarity < self.min_similarity or entry["numbers"] != numbers:
+            return 0.0
+        return similarity
+
+    def find(self, project_data):
+        """
+        查找与公告近似重复的已入库项目
+
+        Returns:
+            tuple: (tender_project_id, 相似度)，没有时返回 (None, 0.0)
+        """
+        candidate = self._signature(
+            project_data.get("project_id"), project_data.get("project_name"), project_data.get("site_name"),
+            project_data.get("publish_time"), project_data.get("purchaser"), project_data.get("budget"),
+        )
+        # 标题中的数字在规范化时保留，与已入库项目的 title_norm 按同样方式提取后比较
+        numbers = title_numbers(candidate["title_norm"])
+        best_id, best_similarity = None, 0.0
+        for tender_project_id, entry in self._entries:
+            similarity = self._matches(candidate, entry, numbers)
+            if similarity > best_similarity:
+                best_id, best_similarity = tender_project_id, similarity
+        return best_id, best_similarity
+
+    def filter_page(self, page_projects):
+        """
+        剔除一个列表页中的近似重复公告（关联到已有项目，不再下载）
+
+        Args:
+            page_projects: 新项目数据列表
+
+        Returns:
+            list: 非重复的项目数据列表（保持原顺序）
+        """
+        if not page_projects:
+            return page_projects
+        self._sync()
+        kept = []
+        linked = 0
+        for project_data in page_projects:
+            project_id = str(project_data.get("project_id"))
+            if project_id in self._linked:
+                log.debug(f"项目已关联为近似重复公告，跳过: {project_id}")
+                continue
+            original_id, similarity = self.find(project_data)
+            if original_id is None:
+                kept.append(project_data)
+                continue
+            log.info(
+                f"疑似重复公告（相似度 {similarity:.2f}），关联到已有项目 {original_id}，跳过下载: "
+                f"{project_data.get('project_name', '')[:50]}"
+            )
+            signature = self._signature(
+                project_id, project_data.get("project_name"), project_data.get("site_name"),
+                project_data.get("publish_time"), project_data.get("purchaser"), project_data.get("budget"),
+            )
+            self.db.add(self._row(signature, duplicate_of=original_id))
+            self._linked.add(project_id)
+            linked += 1
+        if linked:
+            try:
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                log.warning(f"保存近似重复关联失败（下次运行会重新判断）: {str(e)}")
+        return kept
+
+    def add(self, project, project_data=None):
+        """项目保存成功后记录其签名（供其他平台比较）"""
+        self.add_many([project], {str(project.project_id): project_data} if project_data else None)
+
+    def add_many(self, projects, data_by_id=None):
+        """
+        一批项目保存成功后记录其签名（一次提交）
+
+        Args:
+            projects: 保存成功的项目（TenderProject）列表
+            data_by_id: {project_id: 项目数据}，提供采购人、预算等列表页字段
+        """
+        if not projects:
+            return
+        data_by_id = data_by_id or {}
+        try:
+            for project in projects:
+                project_data = data_by_id.get(str(project.project_id)) or {}
+                signature = self._signature(
+                    project.project_id, project.project_name, project.site_name, project.publish_time,
+                    project_data.get("purchaser"), project_data.get("budget"),
+                )
+                self.db.add(self._row(signature, tender_project_id=project.id))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            log.warning(f"保存公告签名失败（可忽略）: {str(e)}")
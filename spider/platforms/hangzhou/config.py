@@ -48,4 +48,5 @@ PLATFORM_CONFIG = {
     "max_pages": 50,
     "page_size": 10,
     "request_interval": 2,
+    "download_workers": 3,  # 文件下载并发数
 }
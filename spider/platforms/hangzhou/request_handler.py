@@ -3,9 +3,12 @@
 封装了可执行的HTTP请求函数
 """
 
+import os
+
 import requests
-import time
 from utils.log import log
+from spider.rate_limiter import rate_limiter
+from spider.resumable_download import download_resumable
 from spider.platforms.hangzhou.config import generate_random_key
 
 
@@ -68,7 +71,7 @@ def execute_request(session, url, method="GET", params=None, data=None,
                     log.warning(f"API返回业务错误: code={result.get('code')}, msg={error_msg}")
                     if attempt < retry_times:
                         wait_time = 2 * (attempt + 1)
-                        time.sleep(wait_time)
+                        rate_limiter.backoff(wait_time)
                         continue
                     return None
             
@@ -78,7 +81,7 @@ def execute_request(session, url, method="GET", params=None, data=None,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"请求超时（第{attempt+1}次），{wait_time}秒后重试: {url}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"请求超时，已达最大重试次数: {url}")
                 return None
@@ -87,7 +90,7 @@ def execute_request(session, url, method="GET", params=None, data=None,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"连接错误（第{attempt+1}次），{wait_time}秒后重试: {url}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"连接错误，已达最大重试次数: {url}")
                 return None
@@ -100,7 +103,7 @@ def execute_request(session, url, method="GET", params=None, data=None,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"请求失败（第{attempt+1}次），{wait_time}秒后重试: {url}, 错误: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"请求失败，已达最大重试次数: {url}, 错误: {str(e)}")
                 return None
@@ -192,7 +195,7 @@ def get_doc_detail(session, doc_id, headers=None, cookies=None):
     return None
 
 
-def download_file(session, fileServiceId, save_path, headers=None, cookies=None, timeout=120):
+def download_file(session, fileServiceId, save_path, headers=None, cookies=None, timeout=120, retry_times=3):
     """
     下载文件（对应demo中的download_id函数）
     
@@ -203,43 +206,48 @@ def download_file(session, fileServiceId, save_path, headers=None, cookies=None,
         headers: 请求头
         cookies: Cookie
         timeout: 超时时间（秒，文件下载可能需要更长时间）
+        retry_times: 重试次数（重试时断点续传）
     
     Returns:
         bool: True表示下载成功，False表示失败
     """
     url = f"https://ggzy.hzctc.hangzhou.gov.cn/api/file/download/{fileServiceId}"
     
-    response = execute_request(
-        session=session,
-        url=url,
-        method="GET",
-        headers=headers,
-        cookies=cookies,
-        timeout=timeout
-    )
+    # 请求头（动态生成jy-random-key）
+    request_headers = headers.copy() if headers else {}
+    if "jy-random-key" not in request_headers:
+        request_headers["jy-random-key"] = generate_random_key()
     
-    if response:
+    result = None
+    for attempt in range(retry_times + 1):
         try:
-            # 检查是否是文件内容
-            content_type = response.headers.get("Content-Type", "")
-            if "application/json" in content_type:
-                # 可能是错误响应
-                result = response.json()
-                log.error(f"下载文件失败，API返回错误: {result}")
-                return False
-            
-            # 保存文件
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            log.info(f"文件下载成功: {save_path}")
-            return True
-            
+            # 支持断点续传：重试时从已下载位置继续
+            result = download_resumable(session, url, save_path, headers=request_headers,
+                                        cookies=cookies, timeout=(30, timeout))
+            break
         except Exception as e:
-            log.error(f"保存文件失败: {save_path}, 错误: {str(e)}")
-            return False
-    else:
-        log.error(f"文件下载失败: fileServiceId={fileServiceId}")
+            if attempt < retry_times:
+                wait_time = 2 * (attempt + 1)
+                log.warning(f"文件下载中断（第{attempt+1}次），{wait_time}秒后续传: {str(e)}")
+                rate_limiter.backoff(wait_time)
+            else:
+                log.error(f"文件下载失败: fileServiceId={fileServiceId}, 错误: {str(e)}")
+                return False
+    
+    # 检查是否是文件内容
+    if "application/json" in result["content_type"]:
+        # 可能是错误响应
+        try:
+            with open(save_path, "r", encoding="utf-8", errors="ignore") as f:
+                error_text = f.read(500)
+        except OSError:
+            error_text = ""
+        log.error(f"下载文件失败，API返回错误: {error_text}")
+        try:
+            os.remove(save_path)
+        except OSError:
+            pass
         return False
+    
+    log.info(f"文件下载成功: {save_path}")
+    return True
@@ -1,26 +1,30 @@
 """杭州市招标平台爬虫实现"""
 
-import requests
 import json
 import os
-import time
 from datetime import datetime
 # 兼容相对导入和绝对导入
 try:
     from ...base_spider import BaseSpider
     from ...spider_manager import SpiderManager
+    from ...rate_limiter import rate_limiter
+    from ...http_client import http_client
+    from ...watermark import SEEN, STOP
     from .config import PLATFORM_CONFIG
     from .request_handler import get_doc_list, get_doc_detail, download_file
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     from spider.base_spider import BaseSpider
     from spider.spider_manager import SpiderManager
+    from spider.rate_limiter import rate_limiter
+    from spider.http_client import http_client
+    from spider.watermark import SEEN, STOP
     from spider.platforms.hangzhou.config import PLATFORM_CONFIG
     from spider.platforms.hangzhou.request_handler import get_doc_list, get_doc_detail, download_file
 
 # 这些导入在所有情况下都需要，放在try-except外
 from utils.log import log
-from utils.db import save_project, ProjectStatus
+from utils.db import ProjectStatus
 from config import SPIDER_CONFIG, FILES_DIR
 
 
@@ -49,6 +53,8 @@ class HangZhouTenderSpider(BaseSpider):
         self.max_pages = PLATFORM_CONFIG.get("max_pages", 50)
         self.page_size = PLATFORM_CONFIG.get("page_size", 10)
         self.request_interval = PLATFORM_CONFIG.get("request_interval", 2)
+        self.download_workers = PLATFORM_CONFIG.get("download_workers", self.download_workers)
+        rate_limiter.configure_platform(PLATFORM_CONFIG)
         self.default_params = PLATFORM_CONFIG.get("default_params", {})
     
     def run(self):
@@ -59,24 +65,15 @@ class HangZhouTenderSpider(BaseSpider):
             log.info(f"时间间隔限制：爬取最近 {self.days_before} 天内的文件")
         
         # 创建会话
-        session = requests.Session()
+        session = http_client.session()  # 共享连接池，按主机令牌桶限速
         session.headers.update(self.headers)
         session.cookies.update(self.cookies)
         
         # 初始化
-        projects = []
-        total_count = 0
         today = datetime.now().date()
         
-        # 批量查询已存在的项目ID
-        from utils.db import TenderProject
-        existing_project_ids = set(
-            row[0] for row in self.db.query(TenderProject.project_id)
-            .filter(TenderProject.project_id.isnot(None))
-            .all()
-        )
-        processed_project_ids = set(existing_project_ids)
-        log.info(f"已加载 {len(existing_project_ids)} 个已存在的项目ID到内存缓存")
+        # 本次运行已处理的项目ID；是否已入库由去重索引按列表页批量确认，不再全量预加载
+        processed_project_ids = set()
         
         # 计算最早允许的发布日期
         earliest_date = None
@@ -85,13 +82,43 @@ class HangZhouTenderSpider(BaseSpider):
             earliest_date = today - timedelta(days=self.days_before)
             log.info(f"时间范围：{earliest_date} 至 {today}（最近 {self.days_before} 天内）")
         
+        # 列表发现与文件下载解耦：列表在主线程中逐页获取，文件由下载线程池并发下载
+        candidates = self._iter_candidates(session, today, earliest_date, processed_project_ids)
+        projects = self._run_pipeline(
+            candidates,
+            lambda project_data: self._download_document(session, project_data["project_id"], project_data),
+        )
+        total_count = len(projects)
+        
+        # 关闭会话和数据库连接
+        session.close()
+        self._commit_watermarks()
+        self.db.close()
+        
+        self.crawled_count = total_count
+        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
+        
+        return projects
+    
+    def _iter_candidates(self, session, today, earliest_date, processed_project_ids):
+        """
+        列表发现：逐页获取列表，产出待下载的候选项目（在主线程中按需拉取）
+        
+        Args:
+            session: 请求会话
+            today: 当日日期
+            earliest_date: 最早允许的发布日期（None表示只爬取当日）
+            processed_project_ids: 已处理的项目ID集合（用于去重）
+        
+        Yields:
+            dict: 项目数据
+        """
+        # 增量爬取水位：翻页到上次已处理的区域即停止
+        watermark = self._get_watermark()
+        
         # 爬取列表
         page_no = 1
-        while page_no <= self.max_pages and total_count < self.daily_limit:
-            # 反爬控制
-            if page_no > 1:
-                time.sleep(self.request_interval)
-            
+        while page_no <= self.max_pages:
             log.debug(f"正在请求第{page_no}页数据")
             
             # 获取列表
@@ -108,6 +135,7 @@ class HangZhouTenderSpider(BaseSpider):
             
             if not result or result.get("code") != 200:
                 log.warning(f"第{page_no}页请求失败或返回错误")
+                watermark.abort()
                 break
             
             data = result.get("data", {})
@@ -119,11 +147,10 @@ class HangZhouTenderSpider(BaseSpider):
             
             log.debug(f"第{page_no}页获取到{len(records)}个项目")
             
+            page_projects = []
+            stop_paging = False
             # 处理每个项目
             for item in records:
-                if total_count >= self.daily_limit:
-                    break
-                
                 try:
                     # 解析项目数据
                     project_data = self._parse_project(item, today, earliest_date)
@@ -131,43 +158,32 @@ class HangZhouTenderSpider(BaseSpider):
                     if not project_data:
                         continue
                     
-                    # 检查是否已存在
-                    project_id = project_data.get("project_id")
-                    if project_id in processed_project_ids:
-                        log.debug(f"项目已存在，跳过: {project_id}")
+                    # 增量爬取：已处理过的项目跳过，连续遇到则停止翻页
+                    status = watermark.check(project_data)
+                    if status == STOP:
+                        stop_paging = True
+                        break
+                    if status == SEEN:
                         continue
                     
-                    # 添加到已处理集合
-                    processed_project_ids.add(project_id)
-                    
-                    # 获取详情并下载文件
-                    file_path, file_format = self._download_document(
-                        session, project_id, project_data
-                    )
-                    if file_path:
-                        project_data["file_path"] = file_path
-                        project_data["file_format"] = file_format
-                    
-                    # 保存项目
-                    saved_project = save_project(self.db, project_data)
-                    projects.append(saved_project)
-                    total_count += 1
-                    log.debug(f"已爬取项目: {project_data['project_name'][:50]}...")
+                    page_projects.append(project_data)
                     
                 except Exception as e:
                     log.error(f"处理项目失败: {str(e)}")
                     continue
             
+            # 批量确认本页项目是否已入库（布隆过滤器 + IN 查询）
+            for project_data in self._filter_new_projects(page_projects, processed_project_ids):
+                watermark.track(project_data)
+                yield project_data
+            
+            if stop_paging:
+                log.info("已到达上次爬取的位置，停止爬取")
+                return
+            
             page_no += 1
         
-        # 关闭会话和数据库连接
-        session.close()
-        self.db.close()
-        
-        self.crawled_count = total_count
-        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
-        
-        return projects
+        watermark.finish()
     
     def _parse_project(self, item, today, earliest_date):
         """
@@ -85,6 +85,7 @@ PLATFORM_CONFIG = {
     "max_pages": 50,
     "page_size": 10,  # 每页显示的项目数（从HTML中观察）
     "request_interval": 2,
+    "download_workers": 1,  # 每次下载需浏览器获取sid并识别验证码，串行下载
     # 验证码相关配置
     "captcha_enabled": True,  # 下载文件时需要验证码
     "ocr_enabled": True,  # 是否启用OCR识别验证码（需要安装ddddocr和DrissionPage）
@@ -5,12 +5,12 @@
 
 import os
 import requests
-import time
 import re
 import base64
 from typing import Optional, Dict, Any, Tuple
 from bs4 import BeautifulSoup
 from utils.log import log
+from spider.rate_limiter import rate_limiter
 from spider.platforms.huzhou.config import (
     BASE_URL, LIST_URL_TEMPLATE, API_VERIFICATION_CODE_URL, API_DOWNLOAD_URL,
     HEADERS_LIST, HEADERS_DETAIL, HEADERS_CAPTCHA, HEADERS_DOWNLOAD, COOKIES, PLATFORM_CONFIG
@@ -111,7 +111,7 @@ def get_doc_list(session: requests.Session, page: int = 1,
             else:
                 log.warning(f"第{page}页未找到项目")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return []
             
@@ -119,7 +119,7 @@ def get_doc_list(session: requests.Session, page: int = 1,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"列表请求超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表请求超时，已达最大重试次数")
                 return None
@@ -128,7 +128,7 @@ def get_doc_list(session: requests.Session, page: int = 1,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"列表连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表连接错误，已达最大重试次数")
                 return None
@@ -137,7 +137,7 @@ def get_doc_list(session: requests.Session, page: int = 1,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"列表请求异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -211,7 +211,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
                 # 静默处理：找不到attachGuid的项目直接跳过
                 log.debug(f"未找到招标文件正文.pdf的attachGuid: {detail_url}，跳过该项目")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -219,7 +219,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"详情页请求超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"详情页请求超时，已达最大重试次数")
                 return None
@@ -228,7 +228,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"详情页连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"详情页连接错误，已达最大重试次数")
                 return None
@@ -237,7 +237,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"详情页请求异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"详情页请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -292,7 +292,7 @@ def get_verification_code(session: requests.Session, sid: str,
             else:
                 log.warning(f"验证码响应格式异常: {result}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -300,7 +300,7 @@ def get_verification_code(session: requests.Session, sid: str,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"获取验证码失败（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"获取验证码失败，已达最大重试次数: {str(e)}")
                 return None
@@ -417,7 +417,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
                     error_text = content[:500].decode('utf-8', errors='ignore') if content else ""
                     log.warning(f"文件下载失败，文件太小（{len(content)}字节），可能是错误响应: {error_text[:200]}")
                     if attempt < retry_times:
-                        time.sleep(3 * (attempt + 1))
+                        rate_limiter.backoff(3 * (attempt + 1))
                         continue
                     return False
                 
@@ -446,7 +446,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
                     log.warning(f"文件下载失败，响应类型: {content_type or '(空)'}, 内容: {error_text[:200]}")
                 
                 if attempt < retry_times:
-                    time.sleep(3 * (attempt + 1))
+                    rate_limiter.backoff(3 * (attempt + 1))
                     continue
                 return False
             
@@ -454,7 +454,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"文件下载超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载超时，已达最大重试次数")
                 return False
@@ -463,7 +463,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 10 * (attempt + 1)
                 log.warning(f"文件下载连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载连接错误，已达最大重试次数")
                 return False
@@ -472,7 +472,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 3 * (attempt + 1)
                 log.warning(f"文件下载异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载异常，已达最大重试次数: {str(e)}")
                 return False
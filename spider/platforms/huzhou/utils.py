@@ -4,33 +4,25 @@
 """
 
 import base64
-import requests
 from typing import Optional, Dict
 from utils.log import log
+from spider.http_client import http_client
+from spider.credential_cache import credential_cache
+from spider.captcha_solver import captcha_solver, DDDDOCR_AVAILABLE
+from spider.browser_pool import browser_pool, DRISSIONPAGE_AVAILABLE
+from spider.http_fixtures import http_fixtures
 from spider.platforms.huzhou.config import (
-    API_VERIFICATION_CODE_URL, HEADERS_CAPTCHA, COOKIES
+    API_VERIFICATION_CODE_URL, HEADERS_CAPTCHA, COOKIES, PLATFORM_CODE
 )
 
-try:
-    import ddddocr
-    DDDDOCR_AVAILABLE = True
-except ImportError:
-    DDDDOCR_AVAILABLE = False
-    # 只在需要时输出警告，避免每次导入都输出
-
-try:
-    from DrissionPage import ChromiumPage, ChromiumOptions
-    DRISSIONPAGE_AVAILABLE = True
-except ImportError:
-    DRISSIONPAGE_AVAILABLE = False
-    # 只在需要时输出警告，避免每次导入都输出
-
 # 导出可用性标志，供外部检查
 # 导出可用性标志，供外部检查
 __all__ = [
     "get_sid_from_cookies",
     "get_verification_code_with_ocr",
     "auto_get_sid",
+    "get_cached_sid",
+    "invalidate_sid",
     "auto_get_sid_and_verification_code",
     "DDDDOCR_AVAILABLE",
     "DRISSIONPAGE_AVAILABLE",
@@ -85,7 +77,8 @@ def get_verification_code_with_ocr(sid: str) -> Optional[Dict]:
             "params": '{"width":"100","height":"40","codeNum":"4","interferenceLine":"1","codeGuid":""}'
         }
         
-        response = requests.post(
+        # 一次性请求（不保留 Cookie），复用共享连接池
+        response = http_client.post(
             API_VERIFICATION_CODE_URL,
             headers=headers,
             cookies=cookies,
@@ -107,7 +100,7 @@ def get_verification_code_with_ocr(sid: str) -> Optional[Dict]:
         # 调试日志
         log.debug(f"验证码API响应 - guid: {verification_code_guid[:30] if verification_code_guid else 'None'}..., value: {verification_code_value[:20] if verification_code_value else 'None'}...")
         
-        # 使用OCR识别验证码
+        # 使用共享识别服务识别验证码（模型只加载一次，结果已去除空白字符）
         try:
             if "," in img_code_base64:
                 base64_data = img_code_base64.split(",")[1]
@@ -115,13 +108,12 @@ def get_verification_code_with_ocr(sid: str) -> Optional[Dict]:
                 base64_data = img_code_base64
             
             image_bytes = base64.b64decode(base64_data)
-            ocr = ddddocr.DdddOcr()
-            recognized_code = ocr.classification(image_bytes)
-            
-            # 清理验证码：去除空格、换行等空白字符，转换为大写（某些验证码不区分大小写）
-            recognized_code = recognized_code.strip().replace(' ', '').replace('\n', '').replace('\r', '')
+            recognized_code = captcha_solver.solve_one(image_bytes)
+            if not recognized_code:
+                log.error("OCR识别验证码结果为空")
+                return None
             
-            log.info(f"验证码识别成功（原始: {ocr.classification(image_bytes)}, 清理后: {recognized_code}）")
+            log.info(f"验证码识别成功: {recognized_code}")
             
             return {
                 "code": recognized_code,
@@ -155,44 +147,43 @@ def auto_get_sid(detail_url: str) -> Optional[str]:
         log.error("DrissionPage未安装，无法自动获取sid。请安装: pip install DrissionPage")
         return None
     
-    options = ChromiumOptions()
-    options.headless()
-    page = ChromiumPage(options)
-    
+    # 从共享浏览器池借用已启动的浏览器（借出前已清空Cookie），避免每次冷启动
     try:
-        log.info("正在加载目标页面...")
-        page.get(detail_url)
-        import time
-        time.sleep(3)
-        log.info("页面加载完成")
-        
-        # 点击下载链接
-        log.info("正在定位下载链接...")
-        link = page.ele('@title=招标文件正文.pdf')
-        if link:
-            link.click()
+        with browser_pool.page() as page:
+            log.info("正在加载目标页面...")
+            page.get(detail_url)
+            import time
             time.sleep(3)
-            log.info("已点击下载链接")
-        else:
-            log.warning("未找到下载链接")
-            return None
-        
-        # 输入验证码（任意值即可，目的是获取sid）
-        log.info("正在定位验证码输入框...")
-        put = page.ele('@id=yzm')
-        if put:
-            put.input('1234')  # 输入任意验证码
-            time.sleep(1)
+            log.info("页面加载完成")
+            
+            # 点击下载链接
+            log.info("正在定位下载链接...")
+            link = page.ele('@title=招标文件正文.pdf')
+            if link:
+                link.click()
+                time.sleep(3)
+                log.info("已点击下载链接")
+            else:
+                log.warning("未找到下载链接")
+                return None
+            
+            # 输入验证码（任意值即可，目的是获取sid）
+            log.info("正在定位验证码输入框...")
+            put = page.ele('@id=yzm')
+            if put:
+                put.input('1234')  # 输入任意验证码
+                time.sleep(1)
+                
+                # 点击确认按钮
+                confirm_btn = page.ele('@class=layui-layer-btn0')
+                if confirm_btn:
+                    confirm_btn.click()
+                    time.sleep(2)
+                    log.info("已点击确认按钮")
             
-            # 点击确认按钮
-            confirm_btn = page.ele('@class=layui-layer-btn0')
-            if confirm_btn:
-                confirm_btn.click()
-                time.sleep(2)
-                log.info("已点击确认按钮")
+            # 提取sid
+            cookies = page.cookies()
         
-        # 提取sid
-        cookies = page.cookies()
         cookie_dict = {}
         if isinstance(cookies, list):
             for c in cookies:
@@ -211,8 +202,26 @@ def auto_get_sid(detail_url: str) -> Optional[str]:
     except Exception as e:
         log.error(f"自动获取sid失败: {str(e)}", exc_info=True)
         return None
-    finally:
-        page.quit()
+
+
+def get_cached_sid(detail_url: str) -> Optional[str]:
+    """
+    获取sid（优先使用凭据缓存，缓存无效时通过浏览器自动化获取）
+    
+    Args:
+        detail_url: 详情页URL（缓存无效时用于打开浏览器）
+    
+    Returns:
+        sid字符串，失败返回None
+    """
+    key = f"{PLATFORM_CODE}_sid"
+    # 浏览器获取的 sid 不经过 requests，单独录制/回放（录制/回放时凭据缓存只在内存中，每次运行都会经过 memo）
+    return credential_cache.get(key, lambda: http_fixtures.memo(key, lambda: auto_get_sid(detail_url)))
+
+
+def invalidate_sid(sid: str):
+    """丢弃缓存的sid（下载失败时调用，下次重新获取）"""
+    credential_cache.invalidate(f"{PLATFORM_CODE}_sid", sid)
 
 
 def auto_get_sid_and_verification_code(detail_url: str) -> Optional[Dict]:
@@ -237,58 +246,11 @@ def auto_get_sid_and_verification_code(detail_url: str) -> Optional[Dict]:
         log.error("ddddocr未安装，无法自动识别验证码。请安装: pip install ddddocr")
         return None
     
-    options = ChromiumOptions()
-    options.headless()
-    page = ChromiumPage(options)
-    
     try:
-        log.info("正在加载目标页面...")
-        page.get(detail_url)
-        import time
-        time.sleep(3)
-        log.info("页面加载完成")
-        
-        # 点击下载链接
-        log.info("正在定位下载链接...")
-        link = page.ele('@title=招标文件正文.pdf')
-        if link:
-            link.click()
-            time.sleep(3)
-            log.info("已点击下载链接")
-        else:
-            log.warning("未找到下载链接")
-            return None
-        
-        # 输入验证码（任意值即可，目的是获取sid）
-        log.info("正在定位验证码输入框...")
-        put = page.ele('@id=yzm')
-        if put:
-            put.input('1234')  # 输入任意验证码
-            time.sleep(1)
-            
-            # 点击确认按钮
-            confirm_btn = page.ele('@class=layui-layer-btn0')
-            if confirm_btn:
-                confirm_btn.click()
-                time.sleep(2)
-                log.info("已点击确认按钮")
-        
-        # 提取sid
-        cookies = page.cookies()
-        cookie_dict = {}
-        if isinstance(cookies, list):
-            for c in cookies:
-                cookie_dict[c.get('name')] = c.get('value')
-        else:
-            cookie_dict = cookies
-        
-        sid = cookie_dict.get('sid')
+        sid = auto_get_sid(detail_url)
         if not sid:
-            log.error("未提取到sid")
             return None
         
-        log.info(f"成功提取sid: {sid}")
-        
         # 获取验证码并识别
         verification_info = get_verification_code_with_ocr(sid)
         if not verification_info:
@@ -303,5 +265,3 @@ def auto_get_sid_and_verification_code(detail_url: str) -> Optional[Dict]:
     except Exception as e:
         log.error(f"自动获取sid和验证码失败: {str(e)}", exc_info=True)
         return None
-    finally:
-        page.quit()
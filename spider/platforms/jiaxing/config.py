@@ -64,6 +64,7 @@ PLATFORM_CONFIG = {
     "max_pages": 100,
     "page_size": 10,
     "request_interval": 2,
+    "download_workers": 3,  # 文件下载并发数
     
     # 列表查询参数（固定值）
     "list_params_template": {
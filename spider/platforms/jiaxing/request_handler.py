@@ -5,12 +5,12 @@
 
 import os
 import requests
-import time
 import json
 import re
 import base64
 from typing import Optional, Dict, Any, Tuple
 from utils.log import log
+from spider.rate_limiter import rate_limiter
 from spider.platforms.jiaxing.config import (
     API_LIST_URL, API_DETAIL_URL, API_CAPTCHA_URL, API_DOWNLOAD_URL,
     HEADERS_LIST, HEADERS_DETAIL, COOKIES, BASE_URL, PLATFORM_CONFIG
@@ -71,7 +71,7 @@ def get_doc_list(session: requests.Session, page: int = 0, page_size: int = 10,
             else:
                 log.warning(f"列表响应格式异常: {result}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -79,7 +79,7 @@ def get_doc_list(session: requests.Session, page: int = 0, page_size: int = 10,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"列表请求超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表请求超时，已达最大重试次数")
                 return None
@@ -88,7 +88,7 @@ def get_doc_list(session: requests.Session, page: int = 0, page_size: int = 10,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"列表连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表连接错误，已达最大重试次数")
                 return None
@@ -97,7 +97,7 @@ def get_doc_list(session: requests.Session, page: int = 0, page_size: int = 10,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"列表请求异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -155,7 +155,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
                 # 静默处理：找不到attachGuid的项目直接跳过，不显示警告
                 log.debug(f"未找到attachGuid: {detail_url}，跳过该项目")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -163,7 +163,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"详情页请求超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"详情页请求超时，已达最大重试次数")
                 return None
@@ -172,7 +172,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"详情页连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"详情页连接错误，已达最大重试次数")
                 return None
@@ -181,7 +181,7 @@ def get_doc_detail(session: requests.Session, detail_url: str,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"详情页请求异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"详情页请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -313,7 +313,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
                     error_text = content[:500].decode('utf-8', errors='ignore') if content else ""
                     log.warning(f"文件下载失败，文件太小（{len(content)}字节），可能是错误响应: {error_text[:200]}")
                     if attempt < retry_times:
-                        time.sleep(3 * (attempt + 1))
+                        rate_limiter.backoff(3 * (attempt + 1))
                         continue
                     return False
                 
@@ -335,7 +335,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
                 
                 log.warning(f"文件下载失败，响应类型: {content_type or '(空)'}, 内容: {error_text[:200]}")
                 if attempt < retry_times:
-                    time.sleep(3 * (attempt + 1))
+                    rate_limiter.backoff(3 * (attempt + 1))
                     continue
                 return False
             
@@ -343,7 +343,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"文件下载超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载超时，已达最大重试次数")
                 return False
@@ -352,7 +352,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 10 * (attempt + 1)
                 log.warning(f"文件下载连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载连接错误，已达最大重试次数")
                 return False
@@ -361,7 +361,7 @@ def download_file(session: requests.Session, attach_guid: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 3 * (attempt + 1)
                 log.warning(f"文件下载异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载异常，已达最大重试次数: {str(e)}")
                 return False
@@ -99,6 +99,7 @@ PLATFORM_CONFIG = {
     "max_pages": 50,
     "page_size": 10,
     "request_interval": 2,
+    "download_workers": 1,  # 每次下载需浏览器获取sid并识别验证码，串行下载
     "captcha_enabled": True,
     "ocr_enabled": True,
     "sid_fallback": "",
@@ -2,13 +2,13 @@
 
 import os
 import re
-import time
 from typing import Optional, Dict
 
 import requests
 from bs4 import BeautifulSoup
 
 from utils.log import log
+from spider.rate_limiter import rate_limiter
 from spider.platforms.lishui.config import (
     BASE_URL,
     LIST_URL_TEMPLATE,
@@ -81,7 +81,7 @@ def get_doc_list(
             return projects
         except Exception as e:
             if attempt < retry_times:
-                time.sleep(2 * (attempt + 1))
+                rate_limiter.backoff(2 * (attempt + 1))
                 continue
             log.error(f"列表请求失败: {str(e)}")
             return None
@@ -132,7 +132,7 @@ def get_doc_detail(
             return None
         except Exception as e:
             if attempt < retry_times:
-                time.sleep(2 * (attempt + 1))
+                rate_limiter.backoff(2 * (attempt + 1))
                 continue
             log.debug(f"详情页解析失败: {str(e)}")
             return None
@@ -218,12 +218,12 @@ def download_file(
                 log.warning(f"下载失败，content-type={content_type or '(空)'}，响应: {error_text[:200]}")
 
             if attempt < retry_times:
-                time.sleep(3 * (attempt + 1))
+                rate_limiter.backoff(3 * (attempt + 1))
                 continue
             return False
         except Exception as e:
             if attempt < retry_times:
-                time.sleep(3 * (attempt + 1))
+                rate_limiter.backoff(3 * (attempt + 1))
                 continue
             log.error(f"下载异常: {str(e)}")
             return False
@@ -2,23 +2,26 @@
 
 import os
 import re
-import time
 from datetime import datetime
 
-import requests
-
 from utils.log import log
-from utils.db import save_project, ProjectStatus
+from utils.db import ProjectStatus
 from config import FILES_DIR
 
 try:
     from ...base_spider import BaseSpider
     from ...spider_manager import SpiderManager
+    from ...rate_limiter import rate_limiter
+    from ...http_client import http_client
+    from ...watermark import SEEN, STOP
     from .config import PLATFORM_CONFIG
     from .request_handler import get_doc_list, get_doc_detail, download_file
 except ImportError:
     from spider.base_spider import BaseSpider
     from spider.spider_manager import SpiderManager
+    from spider.rate_limiter import rate_limiter
+    from spider.http_client import http_client
+    from spider.watermark import SEEN, STOP
     from spider.platforms.lishui.config import PLATFORM_CONFIG
     from spider.platforms.lishui.request_handler import get_doc_list, get_doc_detail, download_file
 
@@ -39,30 +42,22 @@ class LiShuiTenderSpider(BaseSpider):
         self.max_pages = PLATFORM_CONFIG.get("max_pages", 50)
         self.page_size = PLATFORM_CONFIG.get("page_size", 10)
         self.request_interval = PLATFORM_CONFIG.get("request_interval", 2)
+        self.download_workers = PLATFORM_CONFIG.get("download_workers", self.download_workers)
+        rate_limiter.configure_platform(PLATFORM_CONFIG)
 
     def run(self):
         log.info(f"开始爬取{self.PLATFORM_NAME}，总配额: {self.daily_limit}")
         if self.days_before is not None:
             log.info(f"时间间隔限制：爬取最近 {self.days_before} 天内的文件")
 
-        session = requests.Session()
+        session = http_client.session()  # 共享连接池，按主机令牌桶限速
         session.headers.update(self.headers_list)
         session.cookies.update(self.cookies)
 
-        projects = []
-        total_count = 0
         today = datetime.now().date()
 
-        from utils.db import TenderProject
-
-        existing_ids = set(
-            row[0]
-            for row in self.db.query(TenderProject.project_id)
-            .filter(TenderProject.project_id.isnot(None))
-            .all()
-        )
-        processed_ids = set(existing_ids)
-        log.info(f"已加载 {len(existing_ids)} 个已存在的项目ID到内存缓存")
+        # 本次运行已处理的项目ID；是否已入库由去重索引按列表页批量确认，不再全量预加载
+        processed_ids = set()
 
         earliest_date = None
         if self.days_before is not None and self.days_before > 0:
@@ -71,53 +66,82 @@ class LiShuiTenderSpider(BaseSpider):
             earliest_date = today - timedelta(days=self.days_before)
             log.info(f"时间范围：{earliest_date} 至 {today}（最近 {self.days_before} 天内）")
 
-        page_no = 1
-        while page_no <= self.max_pages and total_count < self.daily_limit:
-            if page_no > 1:
-                time.sleep(self.request_interval)
+        # 列表发现与文件下载解耦：列表在主线程中逐页获取，文件由下载线程池并发下载
+        candidates = self._iter_candidates(session, today, earliest_date, processed_ids)
+        projects = self._run_pipeline(
+            candidates,
+            lambda project_data: self._download_document(session, project_data["project_id"], project_data),
+            require_file=True,
+        )
+        total_count = len(projects)
+
+        session.close()
+        self._commit_watermarks()
+        self.db.close()
+        self.crawled_count = total_count
+        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
+        return projects
 
+    def _iter_candidates(self, session, today, earliest_date, processed_ids):
+        """
+        列表发现：逐页获取列表，产出待下载的候选项目（在主线程中按需拉取）
+        
+        Args:
+            session: 请求会话
+            today: 当日日期
+            earliest_date: 最早允许的发布日期（None表示只爬取当日）
+            processed_ids: 已处理的项目ID集合（用于去重）
+        
+        Yields:
+            dict: 项目数据
+        """
+        # 增量爬取水位：翻页到上次已处理的区域即停止
+        watermark = self._get_watermark()
+
+        page_no = 1
+        while page_no <= self.max_pages:
             items = get_doc_list(session=session, page=page_no, headers=self.headers_list, cookies=self.cookies)
             if items is None:
                 log.warning(f"第{page_no}页请求失败")
+                watermark.abort()
                 break
             if not items:
                 log.info(f"第{page_no}页无数据，停止爬取")
                 break
 
+            page_projects = []
+            stop_paging = False
             for item in items:
-                if total_count >= self.daily_limit:
-                    break
                 try:
                     project_data = self._parse_project(item, today, earliest_date)
                     if not project_data:
                         continue
 
-                    project_id = project_data["project_id"]
-                    if project_id in processed_ids:
+                    # 增量爬取：已处理过的项目跳过，连续遇到则停止翻页
+                    status = watermark.check(project_data)
+                    if status == STOP:
+                        stop_paging = True
+                        break
+                    if status == SEEN:
                         continue
-                    processed_ids.add(project_id)
 
-                    file_path, file_format = self._download_document(session, project_id, project_data)
-                    if not file_path:
-                        continue
-
-                    project_data["file_path"] = file_path
-                    project_data["file_format"] = file_format
-
-                    saved = save_project(self.db, project_data)
-                    projects.append(saved)
-                    total_count += 1
+                    page_projects.append(project_data)
                 except Exception as e:
                     log.error(f"处理项目失败: {str(e)}", exc_info=True)
                     continue
 
+            # 批量确认本页项目是否已入库（布隆过滤器 + IN 查询）
+            for project_data in self._filter_new_projects(page_projects, processed_ids):
+                watermark.track(project_data)
+                yield project_data
+
+            if stop_paging:
+                log.info("已到达上次爬取的位置，停止爬取")
+                return
+
             page_no += 1
 
-        session.close()
-        self.db.close()
-        self.crawled_count = total_count
-        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
-        return projects
+        watermark.finish()
 
     def _parse_project(self, item, today, earliest_date):
         try:
@@ -191,14 +215,17 @@ class LiShuiTenderSpider(BaseSpider):
             sid = None
             verification_code = None
             verification_guid = None
+            # 验证码是否由OCR识别（用于统计识别结果的服务器校验通过率）
+            ocr_solved = False
 
             # 自动获取 sid
             if PLATFORM_CONFIG.get("ocr_enabled", False):
                 try:
-                    from .utils import auto_get_sid, DDDDOCR_AVAILABLE, DRISSIONPAGE_AVAILABLE
+                    from .utils import get_cached_sid, DDDDOCR_AVAILABLE, DRISSIONPAGE_AVAILABLE
 
                     if DRISSIONPAGE_AVAILABLE:
-                        sid = auto_get_sid(detail_url)
+                        # sid 保存在凭据缓存中，有效期内的下载不再重复打开浏览器
+                        sid = get_cached_sid(detail_url)
                     else:
                         log.error("OCR已启用，但DrissionPage未安装。请安装: pip install DrissionPage")
 
@@ -209,6 +236,7 @@ class LiShuiTenderSpider(BaseSpider):
                         if info:
                             verification_code = info.get("code")
                             verification_guid = info.get("guid")
+                            ocr_solved = True
                 except Exception as e:
                     log.debug(f"自动获取sid/验证码失败: {str(e)}")
 
@@ -232,6 +260,7 @@ class LiShuiTenderSpider(BaseSpider):
                         if info:
                             verification_code = info.get("code")
                             verification_guid = info.get("guid")
+                            ocr_solved = True
                 except Exception:
                     pass
 
@@ -249,8 +278,17 @@ class LiShuiTenderSpider(BaseSpider):
                 headers=None,
                 cookies=self.cookies,
             )
+            if ocr_solved:
+                from .utils import captcha_solver
+
+                captcha_solver.report(ok)
             if ok and os.path.exists(file_path):
                 return file_path, file_format
+            # 下载失败可能是 sid 已失效，丢弃缓存的 sid（下次重新获取）
+            if PLATFORM_CONFIG.get("ocr_enabled", False):
+                from .utils import invalidate_sid
+
+                invalidate_sid(sid)
             return None, None
         except Exception as e:
             log.error(f"下载文档失败: {str(e)}", exc_info=True)
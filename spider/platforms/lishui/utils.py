@@ -4,32 +4,27 @@
 """
 
 import base64
-import requests
 from typing import Optional, Dict
 
 from utils.log import log
+from spider.http_client import http_client
+from spider.credential_cache import credential_cache
+from spider.captcha_solver import captcha_solver, DDDDOCR_AVAILABLE
+from spider.browser_pool import browser_pool, DRISSIONPAGE_AVAILABLE
+from spider.http_fixtures import http_fixtures
 from spider.platforms.lishui.config import (
     API_VERIFICATION_CODE_URL,
     HEADERS_CAPTCHA,
     COOKIES,
+    PLATFORM_CODE,
 )
 
-try:
-    import ddddocr
-    DDDDOCR_AVAILABLE = True
-except ImportError:
-    DDDDOCR_AVAILABLE = False
-
-try:
-    from DrissionPage import ChromiumPage, ChromiumOptions
-    DRISSIONPAGE_AVAILABLE = True
-except ImportError:
-    DRISSIONPAGE_AVAILABLE = False
-
 __all__ = [
     "get_sid_from_cookies",
     "get_verification_code_with_ocr",
     "auto_get_sid",
+    "get_cached_sid",
+    "invalidate_sid",
     "auto_get_sid_and_verification_code",
     "DDDDOCR_AVAILABLE",
     "DRISSIONPAGE_AVAILABLE",
@@ -71,7 +66,8 @@ def get_verification_code_with_ocr(sid: str) -> Optional[Dict]:
         log.debug(f"获取验证码请求 - sid: {sid[:20] if sid else 'None'}..., cookies keys: {list(cookies.keys())}")
 
         data = {"params": '{"width":"100","height":"40","codeNum":"4","interferenceLine":"1","codeGuid":""}'}
-        resp = requests.post(API_VERIFICATION_CODE_URL, headers=headers, cookies=cookies, data=data, timeout=15)
+        # 一次性请求（不保留 Cookie），复用共享连接池
+        resp = http_client.post(API_VERIFICATION_CODE_URL, headers=headers, cookies=cookies, data=data, timeout=15)
         resp.raise_for_status()
         result = resp.json()
         custom = result.get("custom") or {}
@@ -89,9 +85,11 @@ def get_verification_code_with_ocr(sid: str) -> Optional[Dict]:
             base64_data = img_code_base64
 
         image_bytes = base64.b64decode(base64_data)
-        ocr = ddddocr.DdddOcr()
-        recognized_code = ocr.classification(image_bytes)
-        recognized_code = recognized_code.strip().replace(" ", "").replace("\n", "").replace("\r", "")
+        # 共享识别服务：模型只加载一次，结果已去除空白字符
+        recognized_code = captcha_solver.solve_one(image_bytes)
+        if not recognized_code:
+            log.error("OCR识别验证码结果为空")
+            return None
 
         log.info(f"验证码识别成功: {recognized_code}, guid: {verification_code_guid[:20]}...")
         return {"code": recognized_code, "guid": verification_code_guid, "value": verification_code_value}
@@ -106,36 +104,36 @@ def auto_get_sid(detail_url: str) -> Optional[str]:
         log.error("DrissionPage未安装，无法自动获取sid。请安装: pip install DrissionPage")
         return None
 
-    options = ChromiumOptions()
-    options.headless()
-    page = ChromiumPage(options)
+    # 从共享浏览器池借用已启动的浏览器（借出前已清空 Cookie），避免每次冷启动
     try:
-        log.info("正在加载目标页面...")
-        page.get(detail_url)
-        import time
+        with browser_pool.page() as page:
+            log.info("正在加载目标页面...")
+            page.get(detail_url)
+            import time
 
-        time.sleep(3)
-        log.info("页面加载完成")
-
-        # 点击“招标文件正文.pdf”触发 sid 生成
-        link = page.ele("@title=招标文件正文.pdf")
-        if link:
-            link.click()
             time.sleep(3)
-        else:
-            log.warning("未找到下载链接（@title=招标文件正文.pdf）")
-            # 继续尝试提取 sid（有时已存在）
-
-        put = page.ele("@id=yzm")
-        if put:
-            put.input("1234")
-            time.sleep(1)
-            confirm_btn = page.ele("@class=layui-layer-btn0")
-            if confirm_btn:
-                confirm_btn.click()
-                time.sleep(2)
-
-        cookies = page.cookies()
+            log.info("页面加载完成")
+
+            # 点击“招标文件正文.pdf”触发 sid 生成
+            link = page.ele("@title=招标文件正文.pdf")
+            if link:
+                link.click()
+                time.sleep(3)
+            else:
+                log.warning("未找到下载链接（@title=招标文件正文.pdf）")
+                # 继续尝试提取 sid（有时已存在）
+
+            put = page.ele("@id=yzm")
+            if put:
+                put.input("1234")
+                time.sleep(1)
+                confirm_btn = page.ele("@class=layui-layer-btn0")
+                if confirm_btn:
+                    confirm_btn.click()
+                    time.sleep(2)
+
+            cookies = page.cookies()
+
         cookie_dict = {}
         if isinstance(cookies, list):
             for c in cookies:
@@ -152,8 +150,18 @@ def auto_get_sid(detail_url: str) -> Optional[str]:
     except Exception as e:
         log.error(f"自动获取sid失败: {str(e)}", exc_info=True)
         return None
-    finally:
-        page.quit()
+
+
+def get_cached_sid(detail_url: str) -> Optional[str]:
+    """获取 sid（优先使用凭据缓存，缓存无效时通过 DrissionPage 获取）"""
+    key = f"{PLATFORM_CODE}_sid"
+    # 浏览器获取的 sid 不经过 requests，单独录制/回放（录制/回放时凭据缓存只在内存中，每次运行都会经过 memo）
+    return credential_cache.get(key, lambda: http_fixtures.memo(key, lambda: auto_get_sid(detail_url)))
+
+
+def invalidate_sid(sid: str):
+    """丢弃缓存的 sid（下载失败时调用，下次重新获取）"""
+    credential_cache.invalidate(f"{PLATFORM_CODE}_sid", sid)
 
 
 def auto_get_sid_and_verification_code(detail_url: str) -> Optional[Dict]:
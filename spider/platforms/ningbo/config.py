@@ -2,12 +2,10 @@
 
 import time
 import os
-import requests
 from utils.log import log
-
-# execjs 将在运行时动态导入（不在模块导入时检查，避免需要重启应用）
-# 这样可以支持在运行时安装 PyExecJS 后立即生效
-EXECJS_AVAILABLE = None  # None 表示尚未检查
+from spider.credential_cache import credential_cache, jwt_expiry
+from spider.js_worker import js_worker, JsWorkerError
+from spider.http_client import http_client
 
 PLATFORM_NAME = "宁波市阳光采购服务平台"
 PLATFORM_CODE = "ningbo"
@@ -47,64 +45,40 @@ else:
     log.debug(f"✓ 使用生产代码位置的 login.js: {LOGIN_JS_PATH}")
 
 
-def get_access_token() -> str:
+def get_access_token(expired_token: str = None) -> str:
     """
-    动态获取access_token
+    获取access_token（优先使用凭据缓存，缓存无效时重新登录）
     
-    参考 login.py 的实现方式
+    Args:
+        expired_token: 服务器提示已失效的 access_token，传入时先丢弃该缓存再获取
     
     Returns:
         access_token字符串，失败返回空字符串
     """
-    global EXECJS_AVAILABLE
+    if expired_token:
+        credential_cache.invalidate("ningbo_access_token", expired_token)
+    return credential_cache.get("ningbo_access_token", _login_access_token, expiry=jwt_expiry) or ""
+
+
+def _login_access_token() -> str:
+    """
+    登录平台获取新的access_token
     
+    参考 login.py 的实现方式
+    
+    Returns:
+        access_token字符串，失败返回空字符串
+    """
     try:
-        # 运行时动态导入 execjs（支持运行时安装后立即生效）
-        if EXECJS_AVAILABLE is None or not EXECJS_AVAILABLE:
-            try:
-                import execjs
-                EXECJS_AVAILABLE = True
-                log.debug("成功导入 execjs 模块")
-            except ImportError as e:
-                EXECJS_AVAILABLE = False
-                import sys
-                python_path = sys.executable
-                log.error(
-                    f"execjs 模块未安装，无法获取 access_token。\n"
-                    f"当前 Python 路径: {python_path}\n"
-                    f"请在该 Python 环境中安装: pip install PyExecJS\n"
-                    f"或使用: {python_path} -m pip install PyExecJS"
-                )
-                return ""
-        
-        # 确保 execjs 已导入
-        import execjs
-        
-        # 检查是否有可用的 JavaScript 运行时
+        # 在常驻 Node 进程中执行 login.js 加密密码（脚本只编译一次，require 按脚本目录解析 node_modules）
         try:
-            runtime = execjs.get()
-            if not runtime:
-                log.error("未找到可用的 JavaScript 运行时。PyExecJS 需要 Node.js 或其他 JavaScript 运行时。")
-                return ""
-            log.debug(f"使用 JavaScript 运行时: {runtime.name}")
-        except Exception as e:
-            log.error(f"获取 JavaScript 运行时失败: {str(e)}")
+            encrypted_password = js_worker.call(LOGIN_JS_PATH, 'a')
+        except JsWorkerError as e:
+            log.error(f"执行 login.js 加密密码失败: {str(e)}")
+            return ""
+        if not encrypted_password:
+            log.error("login.js 加密密码结果为空")
             return ""
-        
-        # 读取login.js文件
-        with open(LOGIN_JS_PATH, 'r', encoding='utf-8') as f:
-            js_data = f.read()
-        
-        # 编译并执行JS函数加密密码
-        # 设置工作目录为 login.js 所在目录，以便 Node.js 能找到 node_modules
-        login_js_dir = os.path.dirname(LOGIN_JS_PATH)
-        original_cwd = os.getcwd()
-        try:
-            os.chdir(login_js_dir)  # 切换到 login.js 所在目录
-            js_compiled = execjs.compile(js_data)
-            encrypted_password = js_compiled.call('a')
-        finally:
-            os.chdir(original_cwd)  # 恢复原工作目录
         
         # 准备登录请求头
         login_headers = {
@@ -134,7 +108,7 @@ def get_access_token() -> str:
         }
         
         # 发送登录请求
-        response = requests.post(API_LOGIN_URL, headers=login_headers, json=json_data, timeout=15)
+        response = http_client.post(API_LOGIN_URL, headers=login_headers, json=json_data, timeout=15)
         response.raise_for_status()
         
         result = response.json()
@@ -153,9 +127,6 @@ def get_access_token() -> str:
             log.error(f"登录失败: code={result.get('code')}, msg={error_msg}")
             return ""
             
-    except FileNotFoundError:
-        log.error(f"找不到login.js文件: {LOGIN_JS_PATH}")
-        return ""
     except Exception as e:
         log.error(f"获取access_token失败: {str(e)}", exc_info=True)
         return ""
@@ -245,4 +216,5 @@ PLATFORM_CONFIG = {
     "max_pages": 50,
     "page_size": 10,
     "request_interval": 2,
+    "download_workers": 3,  # 文件下载并发数
 }
@@ -9,6 +9,8 @@ import time
 from typing import Optional, Dict, Any
 from urllib.parse import quote
 from utils.log import log
+from spider.rate_limiter import rate_limiter
+from spider.resumable_download import download_resumable
 from spider.platforms.ningbo.config import (
     API_LIST_URL, API_FILE_URL, API_DOWNLOAD_BASE_URL,
     HEADERS_LIST, HEADERS_DOWNLOAD, COOKIES, get_access_token
@@ -68,26 +70,29 @@ def get_doc_list(session: requests.Session, page_index: int = 1, page_size: int
                 if error_code == -1 and "请先登录" in error_msg:
                     log.warning(f"检测到登录失效（code={error_code}, msg={error_msg}），尝试重新获取 access_token")
                     # 重新获取 access_token
-                    new_access_token = get_access_token()
+                    new_access_token = get_access_token(expired_token=request_headers.get('access_token'))
                     if new_access_token:
                         # 更新请求头中的 access_token
                         request_headers['access_token'] = new_access_token
                         # 更新 session 的 headers
                         session.headers.update({'access_token': new_access_token})
+                        # 重试时会从调用方的 headers 重新复制，同步更新，避免继续使用失效的 token
+                        if headers is not None:
+                            headers['access_token'] = new_access_token
                         log.info(f"成功更新 access_token（长度: {len(new_access_token)}），将重试请求")
                         if attempt < retry_times:
-                            time.sleep(1)  # 短暂等待后重试
+                            rate_limiter.backoff(1)  # 短暂等待后重试
                             continue
                     else:
                         log.error("重新获取 access_token 失败")
                         if attempt < retry_times:
-                            time.sleep(2 * (attempt + 1))
+                            rate_limiter.backoff(2 * (attempt + 1))
                             continue
                         return None
                 
                 log.warning(f"列表响应格式异常或业务错误: code={error_code}, msg={error_msg}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -95,7 +100,7 @@ def get_doc_list(session: requests.Session, page_index: int = 1, page_size: int
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"列表请求超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表请求超时，已达最大重试次数")
                 return None
@@ -104,7 +109,7 @@ def get_doc_list(session: requests.Session, page_index: int = 1, page_size: int
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"列表连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表连接错误，已达最大重试次数")
                 return None
@@ -113,7 +118,7 @@ def get_doc_list(session: requests.Session, page_index: int = 1, page_size: int
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"列表请求异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"列表请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -181,7 +186,7 @@ def get_file_url(session: requests.Session, prj_id: str,
                     log.warning(f"项目 {prj_id} 的文件列表为空")
                 
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             else:
@@ -192,26 +197,29 @@ def get_file_url(session: requests.Session, prj_id: str,
                 if error_code == -1 and "请先登录" in error_msg:
                     log.warning(f"检测到登录失效（code={error_code}, msg={error_msg}），尝试重新获取 access_token")
                     # 重新获取 access_token
-                    new_access_token = get_access_token()
+                    new_access_token = get_access_token(expired_token=request_headers.get('access_token'))
                     if new_access_token:
                         # 更新请求头中的 access_token
                         request_headers['access_token'] = new_access_token
                         # 更新 session 的 headers
                         session.headers.update({'access_token': new_access_token})
+                        # 重试时会从调用方的 headers 重新复制，同步更新，避免继续使用失效的 token
+                        if headers is not None:
+                            headers['access_token'] = new_access_token
                         log.info(f"成功更新 access_token（长度: {len(new_access_token)}），将重试请求")
                         if attempt < retry_times:
-                            time.sleep(1)  # 短暂等待后重试
+                            rate_limiter.backoff(1)  # 短暂等待后重试
                             continue
                     else:
                         log.error("重新获取 access_token 失败")
                         if attempt < retry_times:
-                            time.sleep(2 * (attempt + 1))
+                            rate_limiter.backoff(2 * (attempt + 1))
                             continue
                         return None
                 
                 log.warning(f"文件URL响应格式异常或业务错误: code={error_code}, msg={error_msg}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -219,7 +227,7 @@ def get_file_url(session: requests.Session, prj_id: str,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"文件URL请求超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件URL请求超时，已达最大重试次数")
                 return None
@@ -228,7 +236,7 @@ def get_file_url(session: requests.Session, prj_id: str,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"文件URL连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件URL连接错误，已达最大重试次数")
                 return None
@@ -237,7 +245,7 @@ def get_file_url(session: requests.Session, prj_id: str,
             if attempt < retry_times:
                 wait_time = 2 * (attempt + 1)
                 log.warning(f"文件URL请求异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件URL请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -281,19 +289,21 @@ def download_file(session: requests.Session, file_url: str, save_path: str,
                 'v': str(int(time.time() * 1000)),
             }
             
-            # 执行请求
-            response = session.get(
+            # 执行请求（支持断点续传：重试时从已下载位置继续）
+            result = download_resumable(
+                session,
                 download_url,
+                save_path,
                 headers=request_headers,
                 params=params,
                 timeout=timeout
             )
             
-            response.raise_for_status()
-            
-            # 检查响应内容
-            content_type = response.headers.get("Content-Type", "").lower()
-            content = response.content
+            # 检查响应内容（只读取文件开头用于判断类型）
+            content_type = result["content_type"]
+            file_size = result["size"]
+            with open(save_path, 'rb') as f:
+                content = f.read(1000)
             
             # 判断是否为PDF文件或其他文档文件的多种方式：
             # 1. 检查Content-Type
@@ -310,33 +320,30 @@ def download_file(session: requests.Session, file_url: str, save_path: str,
             
             if is_valid_file:
                 # 如果文件太小，可能是错误页面
-                if len(content) < 1000:
+                if file_size < 1000:
                     error_text = content[:500].decode('utf-8', errors='ignore') if content else ""
-                    log.warning(f"文件下载失败，文件太小（{len(content)}字节），可能是错误响应: {error_text[:200]}")
+                    log.warning(f"文件下载失败，文件太小（{file_size}字节），可能是错误响应: {error_text[:200]}")
+                    os.remove(save_path)
                     if attempt < retry_times:
-                        time.sleep(3 * (attempt + 1))
+                        rate_limiter.backoff(3 * (attempt + 1))
                         continue
                     return False
                 
-                # 保存文件
-                os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                with open(save_path, 'wb') as f:
-                    f.write(content)
-                
-                file_size_kb = len(content) / 1024
+                file_size_kb = file_size / 1024
                 log.info(f"文件下载成功: {save_path} (大小: {file_size_kb:.2f} KB)")
                 return True
             else:
+                os.remove(save_path)
                 # 可能是验证码错误或其他错误
                 # 尝试解码为文本查看错误信息
                 try:
                     error_text = content[:500].decode('utf-8', errors='ignore') if content else ""
                 except:
-                    error_text = f"二进制内容，长度: {len(content)}字节"
+                    error_text = f"二进制内容，长度: {file_size}字节"
                 
                 log.warning(f"文件下载失败，响应类型: {content_type or '(空)'}, 内容: {error_text[:200]}")
                 if attempt < retry_times:
-                    time.sleep(3 * (attempt + 1))
+                    rate_limiter.backoff(3 * (attempt + 1))
                     continue
                 return False
             
@@ -344,7 +351,7 @@ def download_file(session: requests.Session, file_url: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 5 * (attempt + 1)
                 log.warning(f"文件下载超时（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载超时，已达最大重试次数")
                 return False
@@ -353,7 +360,7 @@ def download_file(session: requests.Session, file_url: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 10 * (attempt + 1)
                 log.warning(f"文件下载连接错误（第{attempt+1}次），{wait_time}秒后重试")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载连接错误，已达最大重试次数")
                 return False
@@ -362,7 +369,7 @@ def download_file(session: requests.Session, file_url: str, save_path: str,
             if attempt < retry_times:
                 wait_time = 3 * (attempt + 1)
                 log.warning(f"文件下载异常（第{attempt+1}次），{wait_time}秒后重试: {str(e)}")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             else:
                 log.error(f"文件下载异常，已达最大重试次数: {str(e)}")
                 return False
@@ -1,26 +1,30 @@
 """宁波市招标平台爬虫实现"""
 
-import requests
 import os
-import time
 from datetime import datetime
 from typing import Optional, Tuple
 # 兼容相对导入和绝对导入
 try:
     from ...base_spider import BaseSpider
     from ...spider_manager import SpiderManager
+    from ...rate_limiter import rate_limiter
+    from ...http_client import http_client
+    from ...watermark import SEEN, STOP
     from .config import PLATFORM_CONFIG, get_access_token
     from .request_handler import get_doc_list, get_file_url, download_file
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     from spider.base_spider import BaseSpider
     from spider.spider_manager import SpiderManager
+    from spider.rate_limiter import rate_limiter
+    from spider.http_client import http_client
+    from spider.watermark import SEEN, STOP
     from spider.platforms.ningbo.config import PLATFORM_CONFIG, get_access_token
     from spider.platforms.ningbo.request_handler import get_doc_list, get_file_url, download_file
 
 # 这些导入在所有情况下都需要，放在try-except外
 from utils.log import log
-from utils.db import save_project, ProjectStatus
+from utils.db import ProjectStatus
 from config import SPIDER_CONFIG, FILES_DIR
 
 
@@ -56,6 +60,8 @@ class NingBoTenderSpider(BaseSpider):
         self.max_pages = PLATFORM_CONFIG.get("max_pages", 50)
         self.page_size = PLATFORM_CONFIG.get("page_size", 10)
         self.request_interval = PLATFORM_CONFIG.get("request_interval", 2)
+        self.download_workers = PLATFORM_CONFIG.get("download_workers", self.download_workers)
+        rate_limiter.configure_platform(PLATFORM_CONFIG)
     
     def run(self):
         """执行爬虫主逻辑"""
@@ -65,26 +71,16 @@ class NingBoTenderSpider(BaseSpider):
             log.info(f"时间间隔限制：爬取最近 {self.days_before} 天内的文件")
         
         # 创建会话
-        session = requests.Session()
+        session = http_client.session()  # 共享连接池，按主机令牌桶限速
         session.headers.update(self.headers_list)
         if self.cookies:
             session.cookies.update(self.cookies)
         
         # 初始化
-        projects = []
-        total_count = 0
         today = datetime.now().date()
         
-        # 批量查询已存在的项目ID
-        from utils.db import TenderProject
-        existing_project_ids = set(
-            row[0] for row in self.db.query(TenderProject.project_id)
-            .filter(TenderProject.project_id.isnot(None))
-            .filter(TenderProject.site_name.like(f"%{self.PLATFORM_NAME}%"))
-            .all()
-        )
-        processed_project_ids = set(existing_project_ids)
-        log.info(f"已加载 {len(existing_project_ids)} 个已存在的项目ID到内存缓存")
+        # 本次运行已处理的项目ID；是否已入库由去重索引按列表页批量确认，不再全量预加载
+        processed_project_ids = set()
         
         # 计算最早允许的发布日期
         earliest_date = None
@@ -93,13 +89,43 @@ class NingBoTenderSpider(BaseSpider):
             earliest_date = today - timedelta(days=self.days_before)
             log.info(f"时间范围：{earliest_date} 至 {today}（最近 {self.days_before} 天内）")
         
+        # 列表发现与文件下载解耦：列表在主线程中逐页获取，文件由下载线程池并发下载
+        candidates = self._iter_candidates(session, today, earliest_date, processed_project_ids)
+        projects = self._run_pipeline(
+            candidates,
+            lambda project_data: self._download_document(session, project_data["project_id"], project_data),
+        )
+        total_count = len(projects)
+        
+        # 关闭会话和数据库连接
+        session.close()
+        self._commit_watermarks()
+        self.db.close()
+        
+        self.crawled_count = total_count
+        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
+        
+        return projects
+    
+    def _iter_candidates(self, session, today, earliest_date, processed_project_ids):
+        """
+        列表发现：逐页获取列表，产出待下载的候选项目（在主线程中按需拉取）
+        
+        Args:
+            session: 请求会话
+            today: 当日日期
+            earliest_date: 最早允许的发布日期（None表示只爬取当日）
+            processed_project_ids: 已处理的项目ID集合（用于去重）
+        
+        Yields:
+            dict: 项目数据
+        """
+        # 增量爬取水位：翻页到上次已处理的区域即停止
+        watermark = self._get_watermark()
+        
         # 爬取列表
         page_index = 1  # 页码从1开始
-        while page_index <= self.max_pages and total_count < self.daily_limit:
-            # 反爬控制
-            if page_index > 1:
-                time.sleep(self.request_interval)
-            
+        while page_index <= self.max_pages:
             log.debug(f"正在请求第{page_index}页数据")
             
             # 获取列表（带重试机制）
@@ -126,11 +152,12 @@ class NingBoTenderSpider(BaseSpider):
                 if retry < max_page_retries - 1:
                     wait_time = (retry + 1) * 2  # 递增等待时间：2秒、4秒、6秒
                     log.info(f"等待 {wait_time} 秒后重试第{page_index}页...")
-                    time.sleep(wait_time)
+                    rate_limiter.backoff(wait_time)
             
             # 如果所有重试都失败，记录错误并继续下一页（不中断整个爬虫）
             if not result or "data" not in result:
                 log.error(f"第{page_index}页请求失败，已达最大重试次数，跳过该页继续爬取")
+                watermark.abort()
                 page_index += 1
                 continue
             
@@ -143,11 +170,10 @@ class NingBoTenderSpider(BaseSpider):
             
             log.debug(f"第{page_index}页获取到{len(rows)}个项目")
             
+            page_projects = []
+            stop_paging = False
             # 处理每个项目
             for item in rows:
-                if total_count >= self.daily_limit:
-                    break
-                
                 try:
                     # 解析项目数据
                     project_data = self._parse_project(item, today, earliest_date)
@@ -155,33 +181,29 @@ class NingBoTenderSpider(BaseSpider):
                     if not project_data:
                         continue
                     
-                    # 检查是否已存在
-                    project_id = project_data.get("project_id")
-                    if project_id in processed_project_ids:
-                        log.debug(f"项目已存在，跳过: {project_id}")
+                    # 增量爬取：已处理过的项目跳过，连续遇到则停止翻页
+                    status = watermark.check(project_data)
+                    if status == STOP:
+                        stop_paging = True
+                        break
+                    if status == SEEN:
                         continue
                     
-                    # 添加到已处理集合
-                    processed_project_ids.add(project_id)
-                    
-                    # 获取文件URL并下载文件
-                    file_path, file_format = self._download_document(
-                        session, project_id, project_data
-                    )
-                    if file_path:
-                        project_data["file_path"] = file_path
-                        project_data["file_format"] = file_format
-                    
-                    # 保存项目
-                    saved_project = save_project(self.db, project_data)
-                    projects.append(saved_project)
-                    total_count += 1
-                    log.debug(f"已爬取项目: {project_data['project_name'][:50]}...")
+                    page_projects.append(project_data)
                     
                 except Exception as e:
                     log.error(f"处理项目失败: {str(e)}", exc_info=True)
                     continue
             
+            # 批量确认本页项目是否已入库（布隆过滤器 + IN 查询）
+            for project_data in self._filter_new_projects(page_projects, processed_project_ids):
+                watermark.track(project_data)
+                yield project_data
+            
+            if stop_paging:
+                log.info("已到达上次爬取的位置，停止爬取")
+                return
+            
             # 检查是否还有更多页
             total = data.get("total", 0)
             if page_index * self.page_size >= total:
@@ -191,14 +213,7 @@ class NingBoTenderSpider(BaseSpider):
             # 下一页
             page_index += 1
         
-        # 关闭会话和数据库连接
-        session.close()
-        self.db.close()
-        
-        self.crawled_count = total_count
-        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
-        
-        return projects
+        watermark.finish()
     
     def _parse_project(self, item, today, earliest_date):
         """
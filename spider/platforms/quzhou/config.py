@@ -107,4 +107,5 @@ PLATFORM_CONFIG = {
     "ocr_type": OCR_TYPE,
     "max_pages": 50,
     "request_interval": 2,
+    "download_workers": 2,  # 下载前需识别滑块验证码
 }
@@ -3,7 +3,6 @@
 import json
 import os
 import re
-import time
 import base64
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, parse_qs
@@ -13,6 +12,8 @@ import requests
 from bs4 import BeautifulSoup
 from PIL import Image
 from utils.log import log
+from spider.rate_limiter import rate_limiter
+from spider.http_client import http_client
 from spider.platforms.quzhou.config import (
     BASE_URL,
     LIST_URL_TEMPLATE,
@@ -124,7 +125,7 @@ def get_project_list(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"列表请求超时/连接失败（第{attempt+1}次），{wait}秒后重试")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error("列表请求失败，已达最大重试次数")
                 return None
@@ -132,7 +133,7 @@ def get_project_list(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"列表请求异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"列表请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -186,7 +187,7 @@ def init_captcha(
             if not captcha_id or not click_words:
                 log.warning(f"验证码初始化响应格式异常: {result}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -202,7 +203,7 @@ def init_captcha(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"验证码初始化异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"验证码初始化异常，已达最大重试次数: {str(e)}")
                 return None
@@ -276,7 +277,7 @@ def check_captcha(
                 "Content-Type": "application/json"
             }
             
-            ocr_response = requests.post(
+            ocr_response = http_client.post(
                 OCR_API_URL,
                 headers=ocr_headers,
                 json=ocr_data,
@@ -288,7 +289,7 @@ def check_captcha(
             if ocr_result.get('code') != 10000:
                 log.error(f"OCR识别失败: {ocr_result}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -297,7 +298,7 @@ def check_captcha(
             if not coordinate_str:
                 log.error(f"OCR返回数据格式异常: {ocr_result}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -315,7 +316,7 @@ def check_captcha(
             if len(check_nodes) != len(click_words):
                 log.warning(f"坐标数量({len(check_nodes)})与文字数量({len(click_words)})不匹配")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -345,7 +346,7 @@ def check_captcha(
             if not validate_code:
                 log.warning(f"验证码验证失败: {result}")
                 if attempt < retry_times:
-                    time.sleep(2 * (attempt + 1))
+                    rate_limiter.backoff(2 * (attempt + 1))
                     continue
                 return None
             
@@ -356,7 +357,7 @@ def check_captcha(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"验证码验证异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"验证码验证异常，已达最大重试次数: {str(e)}")
                 return None
@@ -480,7 +481,7 @@ def get_doc_detail(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"详情页请求异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"详情页请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -598,7 +599,7 @@ def download_file(
             if attempt < retry_times:
                 wait = 3 * (attempt + 1)
                 log.warning(f"文件下载异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"文件下载异常，已达最大重试次数: {str(e)}")
                 return None
@@ -1,10 +1,11 @@
 """绍兴市阳光采购服务平台请求封装"""
 
-import time
 from typing import Dict, Optional
 
 import requests
 from utils.log import log
+from spider.rate_limiter import rate_limiter
+from spider.resumable_download import download_resumable
 from spider.platforms.shaoxing.config import (
     API_LIST_URL,
     API_DOWNLOAD_URL,
@@ -51,7 +52,7 @@ def get_bulletin_list(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"列表请求超时/连接失败（第{attempt+1}次），{wait}秒后重试")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error("列表请求失败，已达最大重试次数")
                 return None
@@ -59,7 +60,7 @@ def get_bulletin_list(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"列表请求异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"列表请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -83,17 +84,18 @@ def download_file(
             req_headers = headers.copy() if headers else HEADERS_DOWNLOAD.copy()
             req_cookies = cookies.copy() if cookies else COOKIES.copy()
 
-            response = session.get(
+            # 支持断点续传：重试时从已下载位置继续
+            result = download_resumable(
+                session,
                 download_url,
+                save_path,
                 headers=req_headers,
                 cookies=req_cookies,
                 timeout=timeout,
-                stream=True,
             )
-            response.raise_for_status()
 
-            content_type = response.headers.get("Content-Type", "").lower()
-            disposition = response.headers.get("Content-Disposition", "")
+            content_type = result["content_type"]
+            disposition = result["disposition"]
             file_ext = "pdf"
             if "pdf" in content_type:
                 file_ext = "pdf"
@@ -104,18 +106,13 @@ def download_file(
             elif "octet-stream" in content_type and ".rar" in disposition.lower():
                 file_ext = "rar"
 
-            with open(save_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-
             log.info(f"文件下载成功: {save_path}")
             return file_ext
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
             if attempt < retry_times:
                 wait = 3 * (attempt + 1)
                 log.warning(f"文件下载超时/连接失败（第{attempt+1}次），{wait}秒后重试")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error("文件下载失败，已达最大重试次数")
                 return None
@@ -123,7 +120,7 @@ def download_file(
             if attempt < retry_times:
                 wait = 3 * (attempt + 1)
                 log.warning(f"文件下载异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"文件下载异常，已达最大重试次数: {str(e)}")
                 return None
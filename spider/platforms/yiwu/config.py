@@ -98,4 +98,5 @@ PLATFORM_CONFIG = {
     "max_pages": 50,
     "page_size": 10,  # 每页显示的项目数
     "request_interval": 2,
+    "download_workers": 3,  # 文件下载并发数
 }
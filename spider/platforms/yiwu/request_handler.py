@@ -1,14 +1,15 @@
 """义乌市阳光招标采购平台请求封装"""
 
 import json
-import os
-import time
 from typing import Dict, Optional
 from urllib.parse import urljoin, urlparse, parse_qs
 
 import requests
 from bs4 import BeautifulSoup
 from utils.log import log
+from spider.rate_limiter import rate_limiter
+from spider.http_client import http_client
+from spider.resumable_download import download_resumable
 from spider.platforms.yiwu.config import (
     BASE_URL,
     API_LIST_URL,
@@ -77,9 +78,9 @@ def get_project_list(
             log.debug(f"请求数据长度: {len(data)} 字节")
             log.debug(f"请求数据内容: {data[:300]}...")  # 记录前300字符
             
-            # 与demo文件完全一致：直接使用requests.post（不使用session）
-            # demo文件中使用的是 requests.post(url, headers=headers, data=data)
-            response = requests.post(
+            # 与demo文件完全一致：不使用session（不携带会话Cookie）
+            # demo文件中使用的是 requests.post(url, headers=headers, data=data)，这里同样是一次性请求，只复用共享连接池
+            response = http_client.post(
                 API_LIST_URL,
                 headers=req_headers,
                 data=data,
@@ -110,7 +111,7 @@ def get_project_list(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"列表请求超时/连接失败（第{attempt+1}次），{wait}秒后重试")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error("列表请求失败，已达最大重试次数")
                 return None
@@ -118,7 +119,7 @@ def get_project_list(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"列表请求异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"列表请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -204,7 +205,7 @@ def get_doc_detail(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"详情页请求超时/连接失败（第{attempt+1}次），{wait}秒后重试")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error("详情页请求失败，已达最大重试次数")
                 return None
@@ -212,7 +213,7 @@ def get_doc_detail(
             if attempt < retry_times:
                 wait = 2 * (attempt + 1)
                 log.warning(f"详情页请求异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"详情页请求异常，已达最大重试次数: {str(e)}")
                 return None
@@ -248,18 +249,19 @@ def download_file(
             req_headers = headers.copy() if headers else HEADERS_DOWNLOAD.copy()
             req_cookies = cookies.copy() if cookies else COOKIES.copy()
             
-            response = session.get(
+            # 支持断点续传：重试时从已下载位置继续
+            result = download_resumable(
+                session,
                 download_url,
+                save_path,
                 headers=req_headers,
                 cookies=req_cookies,
                 timeout=timeout,
-                stream=True,
             )
-            response.raise_for_status()
             
             # 判断文件类型
-            content_type = response.headers.get("Content-Type", "").lower()
-            disposition = response.headers.get("Content-Disposition", "")
+            content_type = result["content_type"]
+            disposition = result["disposition"]
             
             # 从Content-Disposition或URL中提取文件扩展名
             file_ext = "pdf"  # 默认扩展名
@@ -298,22 +300,16 @@ def download_file(
                     file_ext = "rar"
             
             # 方法3：从文件内容判断（检查前几个字节）
-            content = response.content[:10]
-            if content.startswith(b'%PDF'):
+            with open(save_path, "rb") as f:
+                head = f.read(1000)
+            if head.startswith(b'%PDF'):
                 file_ext = "pdf"
-            elif content.startswith(b'PK') and b'word/' in response.content[:1000]:
+            elif head.startswith(b'PK') and b'word/' in head:
                 file_ext = "docx"
-            elif content.startswith(b'PK'):
+            elif head.startswith(b'PK'):
                 file_ext = "zip"
             
-            # 保存文件
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            with open(save_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            file_size_kb = os.path.getsize(save_path) / 1024
+            file_size_kb = result["size"] / 1024
             log.info(f"文件下载成功: {save_path} (大小: {file_size_kb:.2f} KB, 类型: {file_ext})")
             return file_ext
             
@@ -321,7 +317,7 @@ def download_file(
             if attempt < retry_times:
                 wait = 3 * (attempt + 1)
                 log.warning(f"文件下载超时/连接失败（第{attempt+1}次），{wait}秒后重试")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error("文件下载失败，已达最大重试次数")
                 return None
@@ -329,7 +325,7 @@ def download_file(
             if attempt < retry_times:
                 wait = 3 * (attempt + 1)
                 log.warning(f"文件下载异常（第{attempt+1}次），{wait}秒后重试: {str(e)}")
-                time.sleep(wait)
+                rate_limiter.backoff(wait)
             else:
                 log.error(f"文件下载异常，已达最大重试次数: {str(e)}")
                 return None
@@ -1,23 +1,27 @@
 """义乌市阳光招标采购平台爬虫实现"""
 
 import os
-import time
 from datetime import datetime
 from urllib.parse import urljoin
 
-import requests
 from utils.log import log
-from utils.db import save_project, ProjectStatus
+from utils.db import ProjectStatus
 from config import FILES_DIR
 
 try:
     from ...base_spider import BaseSpider
     from ...spider_manager import SpiderManager
+    from ...rate_limiter import rate_limiter
+    from ...http_client import http_client
+    from ...watermark import SEEN, STOP
     from .config import PLATFORM_CONFIG
     from .request_handler import get_project_list, get_doc_detail, download_file
 except ImportError:
     from spider.base_spider import BaseSpider
     from spider.spider_manager import SpiderManager
+    from spider.rate_limiter import rate_limiter
+    from spider.http_client import http_client
+    from spider.watermark import SEEN, STOP
     from spider.platforms.yiwu.config import PLATFORM_CONFIG
     from spider.platforms.yiwu.request_handler import get_project_list, get_doc_detail, download_file
 
@@ -40,6 +44,8 @@ class YiWuTenderSpider(BaseSpider):
         self.max_pages = PLATFORM_CONFIG.get("max_pages", 50)
         self.page_size = PLATFORM_CONFIG.get("page_size", 10)
         self.request_interval = PLATFORM_CONFIG.get("request_interval", 2)
+        self.download_workers = PLATFORM_CONFIG.get("download_workers", self.download_workers)
+        rate_limiter.configure_platform(PLATFORM_CONFIG)
 
     def run(self):
         log.info(f"开始爬取{self.PLATFORM_NAME}，总配额: {self.daily_limit}")
@@ -47,25 +53,15 @@ class YiWuTenderSpider(BaseSpider):
         if self.days_before is not None:
             log.info(f"时间间隔限制：爬取最近 {self.days_before} 天内的文件")
 
-        session = requests.Session()
+        session = http_client.session()  # 共享连接池，按主机令牌桶限速
         session.headers.update(self.headers_list)
         # demo文件中没有使用cookies，所以这里也不更新cookies（即使COOKIES为空）
         # session.cookies.update(self.cookies)
 
-        projects = []
-        total_count = 0
         today = datetime.now().date()
 
-        from utils.db import TenderProject
-
-        existing_ids = set(
-            row[0]
-            for row in self.db.query(TenderProject.project_id)
-            .filter(TenderProject.project_id.isnot(None))
-            .all()
-        )
-        processed_ids = set(existing_ids)
-        log.info(f"已加载 {len(existing_ids)} 个已存在的项目ID到内存缓存")
+        # 本次运行已处理的项目ID；是否已入库由去重索引按列表页批量确认，不再全量预加载
+        processed_ids = set()
 
         earliest_date = None
         sdt = None  # API开始日期参数
@@ -85,11 +81,42 @@ class YiWuTenderSpider(BaseSpider):
             # sdt = earliest_date.strftime("%Y-%m-%d")
             # edt = today.strftime("%Y-%m-%d")
 
-        page_no = 1
-        while page_no <= self.max_pages and total_count < self.daily_limit:
-            if page_no > 1:
-                time.sleep(self.request_interval)
+        # 列表发现与文件下载解耦：列表在主线程中逐页获取，文件由下载线程池并发下载
+        candidates = self._iter_candidates(session, today, earliest_date, processed_ids, sdt=sdt, edt=edt)
+        projects = self._run_pipeline(
+            candidates,
+            lambda project_data: self._download_document(session, project_data["project_id"], project_data),
+        )
+        total_count = len(projects)
+
+        session.close()
+        self._commit_watermarks()
+        self.db.close()
 
+        self.crawled_count = total_count
+        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
+        return projects
+
+    def _iter_candidates(self, session, today, earliest_date, processed_ids, sdt=None, edt=None):
+        """
+        列表发现：逐页获取列表，产出待下载的候选项目（在主线程中按需拉取）
+        
+        Args:
+            session: 请求会话
+            today: 当日日期
+            earliest_date: 最早允许的发布日期（None表示只爬取当日）
+            processed_ids: 已处理的项目ID集合（用于去重）
+            sdt: API开始日期参数
+            edt: API结束日期参数
+        
+        Yields:
+            dict: 项目数据
+        """
+        # 增量爬取水位：翻页到上次已处理的区域即停止
+        watermark = self._get_watermark()
+
+        page_no = 1
+        while page_no <= self.max_pages:
             log.debug(f"正在请求第{page_no}页数据")
             result = get_project_list(
                 session=session,
@@ -103,6 +130,7 @@ class YiWuTenderSpider(BaseSpider):
 
             if not result:
                 log.warning(f"第{page_no}页请求失败或返回为空")
+                watermark.abort()
                 break
 
             # 解析返回的JSON数据
@@ -128,41 +156,39 @@ class YiWuTenderSpider(BaseSpider):
 
             log.debug(f"第{page_no}页获取到{len(records)}个项目")
 
+            page_projects = []
+            stop_paging = False
             for item in records:
-                if total_count >= self.daily_limit:
-                    break
                 try:
                     project_data = self._parse_project(item, today, earliest_date)
                     if not project_data:
                         continue
 
-                    project_id = project_data.get("project_id")
-                    if project_id in processed_ids:
-                        log.debug(f"项目已存在，跳过: {project_id}")
+                    # 增量爬取：已处理过的项目跳过，连续遇到则停止翻页
+                    status = watermark.check(project_data)
+                    if status == STOP:
+                        stop_paging = True
+                        break
+                    if status == SEEN:
                         continue
-                    processed_ids.add(project_id)
 
-                    file_path, file_format = self._download_document(session, project_id, project_data)
-                    if file_path:
-                        project_data["file_path"] = file_path
-                        project_data["file_format"] = file_format
-
-                    saved_project = save_project(self.db, project_data)
-                    projects.append(saved_project)
-                    total_count += 1
-                    log.debug(f"已爬取项目: {project_data['project_name'][:50]}...")
+                    page_projects.append(project_data)
                 except Exception as e:
                     log.error(f"处理项目失败: {str(e)}", exc_info=True)
                     continue
 
-            page_no += 1
+            # 批量确认本页项目是否已入库（布隆过滤器 + IN 查询）
+            for project_data in self._filter_new_projects(page_projects, processed_ids):
+                watermark.track(project_data)
+                yield project_data
 
-        session.close()
-        self.db.close()
+            if stop_paging:
+                log.info("已到达上次爬取的位置，停止爬取")
+                return
 
-        self.crawled_count = total_count
-        log.info(f"{self.PLATFORM_NAME}爬取完成，总获取: {total_count}个项目")
-        return projects
+            page_no += 1
+
+        watermark.finish()
 
     def _parse_project(self, item, today, earliest_date):
         """解析列表项为项目数据"""
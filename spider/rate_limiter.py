@@ -0,0 +1,216 @@
+"""按主机限流的令牌桶限速器
+
+所有平台共享一个限速器实例 rate_limiter，按请求主机（host）维护令牌桶：
+- 每个主机按 requests_per_second 匀速补充令牌，最多积累 burst 个（允许短时突发）；
+- 通过 install(session) 挂载到 requests.Session 上，会话发出的每个请求都会先申请令牌
+  （spider.http_client 创建的会话使用共享连接池适配器，同样继承自 RateLimitedAdapter）；
+- 重试退避使用 backoff()，冷却时间作用于整个主机，并发线程会一起放慢，而不是各自盲等；
+- 请求前检查平台熔断状态（见 circuit_breaker），平台熔断时请求直接失败、退避不再等待。
+
+默认速率来自 SPIDER_CONFIG["anti_crawl"]["rate_limit"]，
+平台可在 PLATFORM_CONFIG["rate_limit"] 中覆盖（见 configure_platform）。
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+
+from config import SPIDER_CONFIG
+
+try:
+    from .circuit_breaker import circuit_breakers
+    from .http_fixtures import http_fixtures
+except ImportError:
+    from spider.circuit_breaker import circuit_breakers
+    from spider.http_fixtures import http_fixtures
+
+
+def _host_of(url_or_host):
+    """从URL中提取主机名（传入的已是主机名时原样返回）"""
+    if not url_or_host:
+        return ""
+    if "://" in url_or_host:
+        return urlparse(url_or_host).netloc
+    return url_or_host
+
+
+class TokenBucket:
+    """令牌桶（线程安全）"""
+
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate: 每秒补充的令牌数（即稳定状态下每秒允许的请求数）
+            burst: 桶容量（允许的最大突发请求数）
+        """
+        self.rate = max(float(rate), 0.001)
+        self.burst = max(float(burst), 1.0)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, rate=None, burst=None):
+        """调整速率和容量"""
+        with self._lock:
+            if rate is not None:
+                self.rate = max(float(rate), 0.001)
+            if burst is not None:
+                self.burst = max(float(burst), 1.0)
+                self._tokens = min(self._tokens, self.burst)
+
+    def reserve(self, tokens=1):
+        """
+        预订令牌并返回需要等待的秒数（不阻塞，供异步代码使用）
+
+        Returns:
+            float: 调用方需要等待的时间（秒），0表示可立即发出请求
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now, 0.0)
+
+    def acquire(self, tokens=1):
+        """申请令牌（阻塞直到可以发出请求）"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """让该主机冷却 seconds 秒（冷却期间所有请求都需等待）"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class HostRateLimiter:
+    """按主机管理令牌桶的限速器"""
+
+    def __init__(self, requests_per_second=2.0, burst=5):
+        self.default_rate = requests_per_second
+        self.default_burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+        # 记录每个线程最近请求的主机，backoff() 未指定URL时使用
+        self._local = threading.local()
+
+    def bucket(self, url_or_host):
+        """获取（必要时创建）主机对应的令牌桶"""
+        host = _host_of(url_or_host)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.default_rate, self.default_burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def configure(self, url_or_host, requests_per_second=None, burst=None):
+        """
+        设置某个主机的速率
+
+        Args:
+            url_or_host: 主机名或该主机下的任意URL
+            requests_per_second: 每秒请求数（None表示不修改）
+            burst: 突发容量（None表示不修改）
+        """
+        self.bucket(url_or_host).configure(requests_per_second, burst)
+
+    def configure_platform(self, platform_config):
+        """
+        按平台配置设置其所有主机的速率
+
+        平台配置中所有以 http 开头的 *_url 配置项对应的主机都会被设置；
+        速率取 platform_config["rate_limit"]，未配置时使用全局默认值。
+        这些主机同时注册为该平台的熔断范围（同一平台的主机共用一个熔断器）。
+
+        Args:
+            platform_config: 平台配置字典（PLATFORM_CONFIG）
+        """
+        rate_config = platform_config.get("rate_limit") or {}
+        rate = rate_config.get("requests_per_second", self.default_rate)
+        burst = rate_config.get("burst", self.default_burst)
+        hosts = {
+            _host_of(value)
+            for key, value in platform_config.items()
+            if key.endswith("url") and isinstance(value, str) and value.startswith("http")
+        }
+        for host in hosts:
+            self.configure(host, rate, burst)
+        if platform_config.get("code"):
+            circuit_breakers.register_platform(platform_config["code"], hosts, platform_config.get("name"))
+
+    def acquire(self, url_or_host):
+        """
+        请求前申请令牌（阻塞）
+
+        Raises:
+            CircuitOpenError: 主机所属平台已熔断
+        """
+        host = _host_of(url_or_host)
+        self._local.last_host = host
+        circuit_breakers.before_request(host)
+        if http_fixtures.replaying and not http_fixtures.rate_limit:
+            # 离线回放时默认不限速，基准测试测的是爬取流程本身
+            return
+        self.bucket(host).acquire()
+
+    def reserve(self, url_or_host):
+        """预订令牌，返回需要等待的秒数（供异步代码 await asyncio.sleep 使用）"""
+        return self.bucket(url_or_host).reserve()
+
+    def backoff(self, seconds, url_or_host=None):
+        """
+        重试退避：让主机冷却 seconds 秒并等待
+
+        Args:
+            seconds: 冷却时间（秒）
+            url_or_host: 主机或URL（None时使用当前线程最近请求的主机）
+        """
+        host = _host_of(url_or_host) or getattr(self._local, "last_host", "")
+        if circuit_breakers.is_open(host):
+            # 平台已熔断，等待没有意义，让重试循环尽快结束
+            return
+        if host:
+            self.bucket(host).penalize(seconds)
+        time.sleep(seconds)
+
+    def install(self, session):
+        """为 requests.Session 挂载限速适配器，会话发出的每个请求都会先申请令牌"""
+        adapter = RateLimitedAdapter(self)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """发送请求前按主机申请令牌、发送后记录熔断统计的 HTTPAdapter"""
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire(request.url)
+        try:
+            response = super().send(request, **kwargs)
+        except RequestException:
+            circuit_breakers.record(request.url, False)
+            raise
+        # 5xx 和 429 视为平台异常，其他状态码说明平台仍在正常响应
+        circuit_breakers.record(request.url, response.status_code < 500 and response.status_code != 429)
+        return response
+
+
+_rate_config = SPIDER_CONFIG["anti_crawl"].get("rate_limit", {})
+
+# 全局共享限速器
+rate_limiter = HostRateLimiter(
+    requests_per_second=_rate_config.get("requests_per_second", 2.0),
+    burst=_rate_config.get("burst", 5),
+)
@@ -0,0 +1,231 @@
+"""可断点续传的文件下载
+
+大文件（50~200MB 的招标文件压缩包）下载超时后不再从零开始：
+- 数据先写入 <save_path>.part，同时维护清单文件 <save_path>.part.json，
+  记录 ETag / Last-Modified、文件总大小和已下载字节数，进程重启后仍然有效；
+- 重试（或次日运行）时用 Range 请求剩余部分，并通过 If-Range 校验服务器上的文件未变化，
+  文件已变化时服务器返回完整内容（200），自动从头下载；
+- 下载完成且大小校验通过后，原子替换为 save_path 并删除清单；
+- 下载时同时计算文件的 SHA-256 并登记到内容寻址存储（utils.blob_store），入库时无需再次读取文件。
+
+只适用于可重复发起的 GET 下载；依赖一次性验证码的 POST 下载无法续传。
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+
+import requests
+
+from utils.blob_store import hash_file, record_hash
+from utils.log import log
+from config import SPIDER_CONFIG
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class IncompleteDownloadError(requests.exceptions.ConnectionError):
+    """下载的数据少于服务器声明的大小（已下载部分会保留，下次续传）"""
+
+
+def _part_paths(save_path):
+    part_path = f"{save_path}.part"
+    return part_path, f"{part_path}.json"
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(manifest_path, manifest):
+    manifest["update_time"] = int(time.time())
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def discard_partial(save_path):
+    """删除未完成的下载数据和清单（文件内容校验失败时调用）"""
+    for path in _part_paths(save_path):
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                log.warning(f"删除未完成的下载文件失败: {path}, 错误: {str(e)}")
+
+
+def _parse_content_range(value):
+    """解析 Content-Range，返回 (起始字节, 总大小或None)"""
+    match = _CONTENT_RANGE.match(value or "")
+    if not match:
+        return None, None
+    total = match.group(3)
+    return int(match.group(1)), (int(total) if total != "*" else None)
+
+
+def _resume_state(save_path):
+    """返回可续传的 (已下载字节数, 清单)，不可续传时返回 (0, None)"""
+    part_path, manifest_path = _part_paths(save_path)
+    manifest = _load_manifest(manifest_path)
+    if not manifest or not os.path.exists(part_path):
+        return 0, None
+    offset = os.path.getsize(part_path)
+    # 没有校验值时只能依靠总大小判断文件是否变化
+    if offset <= 0 or not (manifest.get("etag") or manifest.get("last_modified") or manifest.get("total_size")):
+        return 0, None
+    return offset, manifest
+
+
+def download_resumable(session, url, save_path, headers=None, cookies=None, params=None,
+                       timeout=(30, 120), chunk_timeout=None, chunk_size=None):
+    """
+    下载文件到 save_path（支持断点续传）
+
+    Args:
+        session: requests.Session 对象
+        url: 下载地址（GET）
+        save_path: 保存路径
+        headers: 请求头
+        cookies: Cookie
+        params: URL参数
+        timeout: 请求超时（秒，或 (连接超时, 读取超时)）
+        chunk_timeout: 超过该时间未收到数据视为超时（None时使用配置）
+        chunk_size: 分块大小（None时使用配置）
+
+    Returns:
+        dict: {"size": 文件大小, "content_type": ..., "disposition": ..., "resumed": 是否为续传,
+               "sha256": 文件内容哈希}
+
+    Raises:
+        requests.RequestException: 请求失败或下载中断（已下载部分保留，下次调用时续传）
+    """
+    config = SPIDER_CONFIG.get("resumable_download", {})
+    chunk_timeout = chunk_timeout or config.get("chunk_timeout", 60)
+    chunk_size = chunk_size or config.get("chunk_size", 65536)
+    flush_bytes = config.get("manifest_flush_bytes", 1024 * 1024)
+    part_path, manifest_path = _part_paths(save_path)
+    os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+
+    offset, manifest = _resume_state(save_path) if config.get("enabled", True) else (0, None)
+    request_headers = dict(headers or {})
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+        validator = manifest.get("etag") or manifest.get("last_modified")
+        if validator:
+            request_headers["If-Range"] = validator
+
+    response = session.get(url, headers=request_headers, cookies=cookies, params=params,
+                           stream=True, timeout=timeout)
+    try:
+        if offset and response.status_code == 416:
+            # 请求范围超出文件末尾：已下载部分与服务器文件大小一致时说明已经下载完成
+            if manifest.get("total_size") == offset:
+                response.close()
+                return _finish(save_path, offset, manifest, resumed=True)
+            log.info(f"续传范围无效，重新下载: {save_path}")
+            response.close()
+            discard_partial(save_path)
+            return download_resumable(session, url, save_path, headers, cookies, params,
+                                      timeout, chunk_timeout, chunk_size)
+        response.raise_for_status()
+
+        total_size = None
+        resumed = False
+        if offset and response.status_code == 206:
+            start, total_size = _parse_content_range(response.headers.get("Content-Range"))
+            expected_total = manifest.get("total_size")
+            resumed = start == offset and (not expected_total or not total_size or expected_total == total_size)
+            if not resumed:
+                # 服务器返回的范围与本地不一致，放弃续传
+                log.info(f"服务器返回的续传范围不匹配，重新下载: {save_path}")
+                response.close()
+                discard_partial(save_path)
+                return download_resumable(session, url, save_path, headers, cookies, params,
+                                          timeout, chunk_timeout, chunk_size)
+        else:
+            # 200：不支持 Range 或文件已变化（If-Range 校验失败），从头下载
+            if offset:
+                log.info(f"服务器未接受续传请求，从头下载: {save_path}")
+            offset = 0
+            content_length = response.headers.get("Content-Length")
+            total_size = int(content_length) if content_length and content_length.isdigit() else None
+
+        etag = response.headers.get("ETag")
+        manifest = {
+            "url": url,
+            # 弱校验值不能用于 If-Range
+            "etag": etag if etag and not etag.startswith("W/") else None,
+            "last_modified": response.headers.get("Last-Modified"),
+            "total_size": total_size,
+            "content_type": response.headers.get("Content-Type", ""),
+            "disposition": response.headers.get("Content-Disposition", ""),
+            "bytes_done": offset,
+        }
+        if resumed:
+            log.info(f"断点续传: {save_path}，已完成 {offset / 1024:.2f}KB，继续下载剩余部分")
+        _save_manifest(manifest_path, manifest)
+
+        # 续传时先计入已下载部分，之后边下载边计算
+        hasher = hashlib.sha256()
+        if resumed:
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    hasher.update(chunk)
+
+        downloaded = offset
+        unflushed = 0
+        with open(part_path, "ab" if resumed else "wb") as f:
+            last_chunk_time = time.time()
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    current_time = time.time()
+                    if current_time - last_chunk_time > chunk_timeout:
+                        raise requests.Timeout("文件下载块超时")
+                    if chunk:
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        downloaded += len(chunk)
+                        unflushed += len(chunk)
+                        last_chunk_time = current_time
+                        if unflushed >= flush_bytes:
+                            f.flush()
+                            manifest["bytes_done"] = downloaded
+                            _save_manifest(manifest_path, manifest)
+                            unflushed = 0
+            finally:
+                # 无论成功与否都记录已下载的字节数，供下次续传
+                f.flush()
+                manifest["bytes_done"] = downloaded
+                _save_manifest(manifest_path, manifest)
+
+        if total_size is not None and downloaded < total_size:
+            raise IncompleteDownloadError(
+                f"文件下载不完整: {downloaded}/{total_size} 字节，已保留已下载部分"
+            )
+        return _finish(save_path, downloaded, manifest, resumed, hasher.hexdigest())
+    finally:
+        response.close()
+
+
+def _finish(save_path, size, manifest, resumed, sha256=None):
+    """下载完成：替换为正式文件、删除清单并登记内容哈希"""
+    part_path, manifest_path = _part_paths(save_path)
+    sha256 = sha256 or hash_file(part_path)
+    os.replace(part_path, save_path)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    record_hash(save_path, sha256)
+    return {
+        "size": size,
+        "content_type": (manifest.get("content_type") or "").lower(),
+        "disposition": manifest.get("disposition") or "",
+        "resumed": resumed,
+        "sha256": sha256,
+    }
@@ -1,16 +1,44 @@
 """爬虫管理器
 
 负责爬虫的注册、发现、创建和统一调度
+
+各平台爬虫登记在入口表中（平台代码 -> 模块路径、类名和平台名称），列出平台、展示平台信息时
+不导入任何平台模块；首次 get_spider/create_spider 时才导入对应模块（模块中的
+@SpiderManager.register 完成注册），避免界面冷启动时加载所有平台的依赖。
 """
 
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from typing import List, Dict, Optional, Type
 from utils.log import log
+from config import SPIDER_CONFIG
 # 兼容相对导入和绝对导入
 try:
     from .base_spider import BaseSpider
+    from .crawl_quota import CrawlQuota
+    from .budget_planner import CrawlBudgetPlanner, load_yield_stats
+    from .http_fixtures import http_fixtures
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     from spider.base_spider import BaseSpider
+    from spider.crawl_quota import CrawlQuota
+    from spider.budget_planner import CrawlBudgetPlanner, load_yield_stats
+    from spider.http_fixtures import http_fixtures
+
+
+# 内置平台入口表：平台代码 -> 模块路径、类名和平台名称（顺序即平台列表的展示顺序）
+SPIDER_ENTRY_POINTS = {
+    "zhejiang": {"module": "spider.tender_spider", "class": "ZheJiangTenderSpider", "name": "浙江省政府采购网"},
+    "hangzhou": {"module": "spider.platforms.hangzhou.spider", "class": "HangZhouTenderSpider", "name": "杭州市公共资源交易网"},
+    "jiaxing": {"module": "spider.platforms.jiaxing.spider", "class": "JiaXingTenderSpider", "name": "嘉兴禾采联综合采购服务平台"},
+    "ningbo": {"module": "spider.platforms.ningbo.spider", "class": "NingBoTenderSpider", "name": "宁波市阳光采购服务平台"},
+    "shaoxing": {"module": "spider.platforms.shaoxing.spider", "class": "ShaoXingTenderSpider", "name": "绍兴市阳光采购服务平台"},
+    "huzhou": {"module": "spider.platforms.huzhou.spider", "class": "HuZhouTenderSpider", "name": "湖州市绿色采购服务平台"},
+    "yiwu": {"module": "spider.platforms.yiwu.spider", "class": "YiWuTenderSpider", "name": "义乌市阳光招标采购平台"},
+    "lishui": {"module": "spider.platforms.lishui.spider", "class": "LiShuiTenderSpider", "name": "丽水市阳光采购服务平台"},
+    "quzhou": {"module": "spider.platforms.quzhou.spider", "class": "QuZhouTenderSpider", "name": "衢州市阳光交易服务平台"},
+}
 
 
 class SpiderManager:
@@ -26,6 +54,9 @@ class SpiderManager:
         # 或者手动注册
         SpiderManager.register(MySpider)
         
+        # 或者登记入口（首次使用时才导入模块）
+        SpiderManager.register_entry_point("my_platform", "spider.platforms.my_platform.spider", "MySpider", "我的平台")
+        
         # 获取爬虫类
         spider_class = SpiderManager.get_spider("my_platform")
         
@@ -36,7 +67,10 @@ class SpiderManager:
         projects = SpiderManager.run_all_spiders(days_before=7)
     """
     
-    _spiders: Dict[str, Type[BaseSpider]] = {}  # 注册的爬虫类字典
+    _spiders: Dict[str, Type[BaseSpider]] = {}  # 已导入并注册的爬虫类字典
+    _entry_points: Dict[str, Dict] = dict(SPIDER_ENTRY_POINTS)  # 平台入口表（按需导入）
+    _load_errors: Dict[str, str] = {}  # 导入失败的平台及错误信息（不再重复导入）
+    last_run_report: List[Dict] = []  # 最近一次 run_all_spiders 的各平台运行报告
     
     @classmethod
     def register(cls, spider_class: Type[BaseSpider]):
@@ -66,6 +100,39 @@ class SpiderManager:
         log.info(f"注册爬虫: {platform_code} ({spider_class.PLATFORM_NAME})")
         return spider_class
     
+    @classmethod
+    def register_entry_point(cls, platform_code: str, module: str, class_name: str, name: str = ""):
+        """
+        登记平台入口（不导入模块，首次 get_spider/create_spider 时导入）
+        
+        Args:
+            platform_code: 平台代码
+            module: 爬虫类所在模块路径
+            class_name: 爬虫类名
+            name: 平台名称（列出平台时展示）
+        """
+        cls._entry_points[platform_code] = {"module": module, "class": class_name, "name": name}
+        cls._load_errors.pop(platform_code, None)
+    
+    @classmethod
+    def _load(cls, platform_code: str) -> Optional[Type[BaseSpider]]:
+        """导入平台入口对应的模块（导入失败时记录错误并返回None）"""
+        entry = cls._entry_points.get(platform_code)
+        if entry is None or platform_code in cls._load_errors:
+            return None
+        try:
+            module = importlib.import_module(entry["module"])
+        except Exception as e:
+            cls._load_errors[platform_code] = str(e)
+            log.warning(f"导入平台 {platform_code} 爬虫失败（{entry['module']}）: {str(e)}", exc_info=True)
+            return None
+        if platform_code not in cls._spiders:
+            # 模块中没有使用 @SpiderManager.register 时按类名注册
+            spider_class = getattr(module, entry["class"], None)
+            if spider_class is not None:
+                cls.register(spider_class)
+        return cls._spiders.get(platform_code)
+    
     @classmethod
     def unregister(cls, platform_code: str):
         """
@@ -74,8 +141,9 @@ class SpiderManager:
         Args:
             platform_code: 平台代码
         """
-        if platform_code in cls._spiders:
-            del cls._spiders[platform_code]
+        if platform_code in cls._spiders or platform_code in cls._entry_points:
+            cls._spiders.pop(platform_code, None)
+            cls._entry_points.pop(platform_code, None)
             log.info(f"注销爬虫: {platform_code}")
         else:
             log.warning(f"未找到要注销的爬虫: {platform_code}")
@@ -83,7 +151,7 @@ class SpiderManager:
     @classmethod
     def get_spider(cls, platform_code: str) -> Optional[Type[BaseSpider]]:
         """
-        获取爬虫类
+        获取爬虫类（只登记了入口的平台在此时导入）
         
         Args:
             platform_code: 平台代码
@@ -91,22 +159,23 @@ class SpiderManager:
         Returns:
             Type[BaseSpider] 或 None
         """
-        return cls._spiders.get(platform_code)
+        return cls._spiders.get(platform_code) or cls._load(platform_code)
     
     @classmethod
     def list_spiders(cls) -> List[str]:
         """
-        列出所有注册的爬虫平台代码
+        列出所有注册的爬虫平台代码（不导入平台模块，已知导入失败的平台除外）
         
         Returns:
             List[str]: 平台代码列表
         """
-        return list(cls._spiders.keys())
+        codes = dict.fromkeys(list(cls._entry_points) + list(cls._spiders))
+        return [code for code in codes if code not in cls._load_errors or code in cls._spiders]
     
     @classmethod
     def get_spider_info(cls, platform_code: str) -> Optional[Dict]:
         """
-        获取爬虫信息
+        获取爬虫信息（未导入的平台从入口表读取，不导入模块）
         
         Args:
             platform_code: 平台代码
@@ -118,20 +187,27 @@ class SpiderManager:
                 "class": "爬虫类名"
             }
         """
-        spider_class = cls.get_spider(platform_code)
-        if not spider_class:
-            return None
+        spider_class = cls._spiders.get(platform_code)
+        if spider_class:
+            return {
+                "code": platform_code,
+                "name": spider_class.PLATFORM_NAME,
+                "class": spider_class.__name__
+            }
         
+        entry = cls._entry_points.get(platform_code)
+        if entry is None:
+            return None
         return {
             "code": platform_code,
-            "name": spider_class.PLATFORM_NAME,
-            "class": spider_class.__name__
+            "name": entry["name"] or platform_code,
+            "class": entry["class"]
         }
     
     @classmethod
     def list_all_spider_info(cls) -> List[Dict]:
         """
-        列出所有爬虫信息
+        列出所有爬虫信息（不导入平台模块）
         
         Returns:
             List[Dict]: 爬虫信息列表
@@ -175,19 +251,27 @@ class SpiderManager:
             raise
     
     @classmethod
-    def run_all_spiders(cls, days_before=None, enabled_platforms=None, total_limit=None) -> List:
+    def run_all_spiders(cls, days_before=None, enabled_platforms=None, total_limit=None,
+                        concurrent=None, executor=None, max_workers=None) -> List:
         """
         运行所有爬虫或指定平台爬虫
         
+        有 total_limit 时按各平台历史推荐率分配配额（见 budget_planner），推荐率高的平台先运行，
+        平台实际爬取数量少于分配额度时，剩余配额重新分给后面的平台。
+        
         Args:
             days_before: 时间间隔，爬取最近N天内的文件（None表示只爬取当日）
             enabled_platforms: 启用的平台列表（None表示全部启用）
             total_limit: 总爬取数量限制（None表示不限制）
+            concurrent: 是否并发运行各平台（None时使用 SPIDER_CONFIG["concurrency"]["enabled"]）
+            executor: 并发方式，"thread" 或 "process"（None时使用配置）
+            max_workers: 同时运行的平台数量（None时使用配置）
             
         Returns:
             List: 所有爬虫返回的项目列表（合并后）
         """
         all_projects = []
+        cls.last_run_report = []
         
         # 确定要运行的平台
         if enabled_platforms is None:
@@ -205,6 +289,23 @@ class SpiderManager:
             log.warning("没有可运行的爬虫平台")
             return all_projects
         
+        planner = cls._plan_budget(enabled_platforms, total_limit)
+        if planner is not None:
+            enabled_platforms = planner.order()
+        
+        concurrency_config = SPIDER_CONFIG.get("concurrency", {})
+        if concurrent is None:
+            concurrent = concurrency_config.get("enabled", False)
+        if concurrent and len(enabled_platforms) > 1:
+            return cls._run_spiders_concurrently(
+                enabled_platforms,
+                days_before=days_before,
+                total_limit=total_limit,
+                executor=executor or concurrency_config.get("executor", "thread"),
+                max_workers=max_workers or concurrency_config.get("max_workers", 4),
+                planner=planner,
+            )
+        
         log.info(f"准备运行 {len(enabled_platforms)} 个平台爬虫: {', '.join(enabled_platforms)}")
         
         # 依次运行每个平台的爬虫
@@ -214,46 +315,164 @@ class SpiderManager:
                 log.info(f"已达到总爬取限制 {total_limit}，停止爬取")
                 break
             
-            try:
-                log.info(f"=" * 50)
-                log.info(f"开始运行平台: {platform_code}")
-                log.info(f"=" * 50)
-                
-                # 计算当前平台可爬取的数量
-                remaining_limit = None
-                if total_limit is not None:
-                    remaining_limit = total_limit - len(all_projects)
-                    log.info(f"当前平台剩余可爬取数量: {remaining_limit}")
-                
-                spider = cls.create_spider(platform_code, days_before=days_before, daily_limit=remaining_limit)
-                projects = spider.run()
-                
-                # 如果有总限制，只添加剩余数量的项目
-                if total_limit is not None:
-                    remaining = total_limit - len(all_projects)
-                    if len(projects) > remaining:
-                        projects = projects[:remaining]
-                        log.info(f"平台 {platform_code} 实际爬取 {len(projects)} 个项目（已达到总限制）")
-                
-                all_projects.extend(projects)
-                
-                log.info(f"平台 {platform_code} 爬取完成，获取 {len(projects)} 个项目，累计已爬取 {len(all_projects)} 个项目")
-                
-            except Exception as e:
-                log.error(f"平台 {platform_code} 爬取失败: {str(e)}", exc_info=True)
+            log.info(f"=" * 50)
+            log.info(f"开始运行平台: {platform_code}")
+            log.info(f"=" * 50)
+            
+            # 计算当前平台可爬取的数量
+            remaining_limit = None
+            if total_limit is not None:
+                remaining_limit = total_limit - len(all_projects)
+                if planner is not None:
+                    remaining_limit = min(remaining_limit, planner.limit(platform_code))
+                    if remaining_limit <= 0:
+                        log.info(f"平台 {platform_code} 未分到配额，跳过")
+                        planner.finish(platform_code, 0)
+                        continue
+                log.info(f"当前平台剩余可爬取数量: {remaining_limit}")
+            
+            report = _run_platform(platform_code, days_before, remaining_limit)
+            projects = report.pop("projects")
+            cls.last_run_report.append(report)
+            if planner is not None:
+                # 平台提前爬完时，剩余配额按推荐率分给后面的平台
+                planner.finish(platform_code, len(projects))
+            if report["error"]:
                 # 继续运行其他平台，不中断整个流程
                 continue
+            
+            # 如果有总限制，只添加剩余数量的项目
+            if total_limit is not None:
+                remaining = total_limit - len(all_projects)
+                if len(projects) > remaining:
+                    projects = projects[:remaining]
+                    log.info(f"平台 {platform_code} 实际爬取 {len(projects)} 个项目（已达到总限制）")
+            
+            all_projects.extend(projects)
+            
+            log.info(f"平台 {platform_code} 爬取完成，获取 {len(projects)} 个项目，累计已爬取 {len(all_projects)} 个项目")
         
-        log.info(f"=" * 50)
-        log.info(f"所有爬虫运行完成，总共获取 {len(all_projects)} 个项目")
-        log.info(f"=" * 50)
+        cls._log_run_report(len(all_projects))
+        
+        return all_projects
+    
+    @classmethod
+    def _run_spiders_concurrently(cls, enabled_platforms, days_before=None, total_limit=None,
+                                  executor="thread", max_workers=4, planner=None) -> List:
+        """
+        并发运行多个平台爬虫
+        
+        各平台通过共享配额（CrawlQuota）竞争 total_limit，总数不会超出限制；
+        线程池模式下各平台另受预算规划器的平台额度限制，平台结束时剩余额度分给仍在运行的平台
+        （进程池模式无法共享规划器，只按推荐率顺序提交）。
+        单个平台异常只记录到运行报告，不影响其他平台。
+        
+        Args:
+            enabled_platforms: 要运行的平台代码列表
+            days_before: 时间间隔
+            total_limit: 总爬取数量限制（None表示不限制）
+            executor: "thread"（线程池）或 "process"（进程池）
+            max_workers: 同时运行的平台数量
+            planner: 预算规划器（CrawlBudgetPlanner，None表示不按推荐率分配）
+            
+        Returns:
+            List: 所有爬虫返回的项目列表（合并后）
+        """
+        all_projects = []
+        quota = CrawlQuota(total_limit)
+        max_workers = max(1, min(int(max_workers), len(enabled_platforms)))
+        use_process = executor == "process"
+        if use_process and http_fixtures.recording:
+            # 各子进程会同时写（或共用 fork 继承的句柄写）同一个录制归档
+            log.warning("HTTP录制模式不支持进程池，改用线程池运行各平台爬虫")
+            use_process = False
+        
+        log.info(
+            f"准备并发运行 {len(enabled_platforms)} 个平台爬虫（{'进程池' if use_process else '线程池'}，"
+            f"并发数: {max_workers}）: {', '.join(enabled_platforms)}"
+        )
+        
+        if use_process:
+            # 共享计数器只能在创建子进程时传递，因此通过 initializer 注入
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_process_quota,
+                initargs=(quota,),
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spider")
+        
+        with pool:
+            futures = {}
+            for platform_code in enabled_platforms:
+                if use_process:
+                    future = pool.submit(_run_platform_in_process, platform_code, days_before, total_limit)
+                else:
+                    future = pool.submit(_run_platform, platform_code, days_before, total_limit, quota, planner)
+                futures[future] = platform_code
+            
+            for future in as_completed(futures):
+                platform_code = futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:
+                    # 进程崩溃等无法在平台内部捕获的异常
+                    log.error(f"平台 {platform_code} 运行异常: {str(e)}", exc_info=True)
+                    report = {"platform": platform_code, "count": 0, "elapsed": 0.0,
+                              "error": str(e), "projects": []}
+                
+                projects = report.pop("projects")
+                if use_process and projects:
+                    projects = _load_projects(projects)
+                cls.last_run_report.append(report)
+                all_projects.extend(projects)
+        
+        if total_limit is not None and len(all_projects) > total_limit:
+            all_projects = all_projects[:total_limit]
+        
+        cls._log_run_report(len(all_projects))
         
         return all_projects
     
+    @classmethod
+    def _plan_budget(cls, enabled_platforms, total_limit) -> Optional[CrawlBudgetPlanner]:
+        """
+        按各平台历史推荐率分配 total_limit
+        
+        Returns:
+            CrawlBudgetPlanner 或 None（不限制总数、只有一个平台、未启用或统计失败时）
+        """
+        if total_limit is None or len(enabled_platforms) < 2:
+            return None
+        if not SPIDER_CONFIG.get("budget_planner", {}).get("enabled", True):
+            return None
+        try:
+            stats = load_yield_stats()
+        except Exception as e:
+            log.warning(f"统计历史推荐率失败，按平台顺序分配配额: {str(e)}")
+            return None
+        names = {code: cls.get_spider_info(code)["name"] for code in enabled_platforms}
+        planner = CrawlBudgetPlanner(total_limit, {code: stats.platform(names[code]) for code in enabled_platforms})
+        log.info(f"按历史推荐率分配总配额 {total_limit}（已判定项目 {stats.judged} 个）: {planner.describe(names)}")
+        return planner
+    
+    @classmethod
+    def _log_run_report(cls, total):
+        """输出各平台耗时与结果汇总"""
+        log.info(f"=" * 50)
+        for report in cls.last_run_report:
+            status = f"失败: {report['error']}" if report["error"] else "成功"
+            log.info(
+                f"平台 {report['platform']}: 获取 {report['count']} 个项目，"
+                f"耗时 {report['elapsed']:.1f} 秒，{status}"
+            )
+        log.info(f"所有爬虫运行完成，总共获取 {total} 个项目")
+        log.info(f"=" * 50)
+    
     @classmethod
     def is_registered(cls, platform_code: str) -> bool:
         """
-        检查平台是否已注册
+        检查平台是否已注册（包括只登记了入口、尚未导入的平台）
         
         Args:
             platform_code: 平台代码
@@ -261,4 +480,72 @@ class SpiderManager:
         Returns:
             bool: True表示已注册
         """
-        return platform_code in cls._spiders
+        return platform_code in cls._spiders or platform_code in cls._entry_points
+
+
+# 进程池模式下，子进程中的共享配额（由 _init_process_quota 注入）
+_process_quota = None
+
+
+def _run_platform(platform_code, days_before=None, daily_limit=None, quota=None, budget=None) -> Dict:
+    """
+    运行单个平台爬虫并统计耗时（异常在此捕获，不影响其他平台）
+    
+    Args:
+        budget: 预算规划器（并发运行时传入，平台结束后归还未用完的额度）
+    
+    Returns:
+        dict: {"platform", "count", "elapsed", "error", "projects"}
+    """
+    start = time.perf_counter()
+    report = {"platform": platform_code, "count": 0, "elapsed": 0.0, "error": None, "projects": []}
+    try:
+        spider = SpiderManager.create_spider(
+            platform_code, days_before=days_before, daily_limit=daily_limit, quota=quota, budget=budget
+        )
+        projects = spider.run() or []
+        report["projects"] = projects
+        report["count"] = len(projects)
+    except Exception as e:
+        log.error(f"平台 {platform_code} 爬取失败: {str(e)}", exc_info=True)
+        report["error"] = str(e)
+    if budget is not None:
+        budget.finish(platform_code, report["count"])
+    report["elapsed"] = time.perf_counter() - start
+    log.info(f"平台 {platform_code} 运行结束，获取 {report['count']} 个项目，耗时 {report['elapsed']:.1f} 秒")
+    return report
+
+
+def _init_process_quota(quota):
+    """进程池 initializer：保存主进程传入的共享配额"""
+    global _process_quota
+    _process_quota = quota
+
+
+def _run_platform_in_process(platform_code, days_before=None, daily_limit=None) -> Dict:
+    """
+    在子进程中运行单个平台爬虫
+    
+    ORM 对象无法跨进程传递，因此只返回项目主键，由主进程重新加载
+    """
+    # 子进程（spawn 方式）需要重新导入爬虫包（平台模块在创建爬虫时按需导入）
+    import spider  # noqa: F401
+    
+    report = _run_platform(platform_code, days_before, daily_limit, _process_quota)
+    report["projects"] = [project.id for project in report["projects"]]
+    return report
+
+
+def _load_projects(project_ids) -> List:
+    """根据主键从数据库重新加载项目（进程池模式使用，按 project_ids 的顺序返回，与线程池模式一致）"""
+    from utils.db import get_db, TenderProject
+    
+    db = next(get_db())
+    try:
+        projects = db.query(TenderProject).filter(TenderProject.id.in_(project_ids)).all()
+        db.expunge_all()
+        position = {project_id: index for index, project_id in enumerate(project_ids)}
+        projects.sort(key=lambda project: position.get(project.id, len(position)))
+        return projects
+    finally:
+        db.close()
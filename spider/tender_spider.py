@@ -1,20 +1,38 @@
+import asyncio
 import time
 import requests
 import json
 import os
-import shutil
+import threading
+from urllib.parse import urlparse
 from utils.log import log
 from config import SPIDER_CONFIG, FILES_DIR
-from utils.db import get_db, save_project, TenderProject, ProjectStatus
+from utils.db import get_db, ProjectStatus
 from datetime import datetime
 # 兼容相对导入和绝对导入
 try:
     from .base_spider import BaseSpider
     from .spider_manager import SpiderManager
+    from .async_listing import AsyncListingEngine, aiohttp
+    from .rate_limiter import rate_limiter
+    from .http_client import http_client
+    from .circuit_breaker import circuit_breakers, CircuitOpenError
+    from .budget_planner import CrawlBudgetPlanner, load_yield_stats
+    from .watermark import SEEN, STOP
+    from .resumable_download import download_resumable
+    from .credential_cache import credential_cache, dump_cookies, load_cookies
 except ImportError:
     # 如果相对导入失败，尝试绝对导入（用于直接运行脚本时）
     from spider.base_spider import BaseSpider
     from spider.spider_manager import SpiderManager
+    from spider.async_listing import AsyncListingEngine, aiohttp
+    from spider.rate_limiter import rate_limiter
+    from spider.http_client import http_client
+    from spider.circuit_breaker import circuit_breakers, CircuitOpenError
+    from spider.budget_planner import CrawlBudgetPlanner, load_yield_stats
+    from spider.watermark import SEEN, STOP
+    from spider.resumable_download import download_resumable
+    from spider.credential_cache import credential_cache, dump_cookies, load_cookies
 
 
 class ZheJiangTenderSpider(BaseSpider):
@@ -57,9 +75,9 @@ class ZheJiangTenderSpider(BaseSpider):
             "331000": "台州市",
             "331100": "丽水市"
         }
-        # 每个分类的爬取配额（平均分配，确保至少为1）
+        # 每个分类/区域的平均配额（仅界面中逐页爬取的流程使用；run() 在列表获取完成后
+        # 按历史推荐率分配各分类/区域的配额，见 _plan_candidates）
         self.category_quota = max(self.daily_limit // len(self.category_codes), 1)
-        # 每个区域的爬取配额（确保至少为1）
         self.district_quota = max(self.category_quota // len(self.district_codes), 1)
         # 注意：crawled_count 和 max_retries 已在父类中初始化
         # 优化headers使其更像真实浏览器
@@ -95,30 +113,70 @@ class ZheJiangTenderSpider(BaseSpider):
         self.zcy_password = os.getenv("ZCY_PASSWORD", "wqh284704256")
         self.zcy_login_url = "https://login.zcygov.cn/login"
         self.zcy_session: requests.Session | None = None
+        # zcy_session 对应的登录 Cookie（凭据缓存刷新后据此重建会话）
+        self._zcy_cookies = None
+        self._zcy_login_lock = threading.Lock()
 
 
+    def _build_page_payload(self, category_code, page_no, district_code=None, is_gov=True):
+        """构造列表接口请求体（JSON字符串）"""
+        data = {
+            "pageNo": page_no,
+            "pageSize": 15,
+            "categoryCode": category_code,
+            "procurementMethodCode": 1,
+            "isGov": is_gov,
+            "excludeDistrictPrefix": ["90", "006011", "H0"],
+            "_t": int(time.time() * 1000)
+        }
+        
+        # 添加区域参数
+        if district_code:
+            data["districtCode"] = [district_code]
+        
+        # 使用json.dumps格式化数据，与aaaa.py保持一致
+        return json.dumps(data, separators=(',', ':'))
+
+    def _check_page_response(self, json_response, category_code, page_no):
+        """
+        校验列表接口响应结构
+        
+        Returns:
+            tuple: (json_response 或 None, 是否需要重试)
+        """
+        # 检查success字段（如果存在）
+        if 'success' in json_response and not json_response.get('success'):
+            error_msg = json_response.get('error', '未知错误')
+            log.error(f"爬取分类[{category_code}]第{page_no}页API返回失败: {error_msg}")
+            return None, False
+        
+        # 按照aaaa.py的逻辑解析数据结构
+        # API响应结构: {success: true, result: {data: {data: [...]}}}
+        if json_response.get('result') and json_response['result'].get('data'):
+            data_obj = json_response['result']['data']
+            # 检查data字段中是否有data数组
+            if isinstance(data_obj, dict) and 'data' in data_obj:
+                items = data_obj.get('data', [])
+                if items:
+                    log.debug(f"成功获取分类[{category_code}]第{page_no}页数据，共{len(items)}条")
+                    return json_response, False
+                else:
+                    log.warning(f"爬取分类[{category_code}]第{page_no}页返回的数据列表为空")
+            else:
+                log.warning(f"爬取分类[{category_code}]第{page_no}页返回的数据结构异常: data字段格式不正确")
+                log.debug(f"响应内容: {json.dumps(json_response, ensure_ascii=False, default=str)[:500]}")
+        else:
+            log.warning(f"爬取分类[{category_code}]第{page_no}页返回的数据结构异常: 缺少result或data字段")
+            log.debug(f"响应内容: {json.dumps(json_response, ensure_ascii=False, default=str)[:500]}")
+        return None, True
+
     def _fetch_page(self, session, category_code, page_no, district_code=None, is_gov=True):
         """获取单页数据（带重试机制）"""
         retry_count = 0
         
         while retry_count <= self.max_retries:
             try:
-                data = {
-                    "pageNo": page_no,
-                    "pageSize": 15,
-                    "categoryCode": category_code,
-                    "procurementMethodCode": 1,
-                    "isGov": is_gov,
-                    "excludeDistrictPrefix": ["90", "006011", "H0"],
-                    "_t": int(time.time() * 1000)
-                }
-                
-                # 添加区域参数
-                if district_code:
-                    data["districtCode"] = [district_code]
-                
-                # 使用json.dumps格式化数据，与aaaa.py保持一致
-                json_data = json.dumps(data, separators=(',', ':'))
+                json_data = self._build_page_payload(category_code, page_no, district_code, is_gov)
 
                 log.debug(f"正在请求分类[{category_code}]第{page_no}页数据")
                 
@@ -133,31 +191,9 @@ class ZheJiangTenderSpider(BaseSpider):
                 if response.status_code == 200:
                     try:
                         json_response = response.json()
-                        
-                        # 检查success字段（如果存在）
-                        if 'success' in json_response and not json_response.get('success'):
-                            error_msg = json_response.get('error', '未知错误')
-                            log.error(f"爬取分类[{category_code}]第{page_no}页API返回失败: {error_msg}")
-                            return None
-                        
-                        # 按照aaaa.py的逻辑解析数据结构
-                        # API响应结构: {success: true, result: {data: {data: [...]}}}
-                        if json_response.get('result') and json_response['result'].get('data'):
-                            data_obj = json_response['result']['data']
-                            # 检查data字段中是否有data数组
-                            if isinstance(data_obj, dict) and 'data' in data_obj:
-                                items = data_obj.get('data', [])
-                                if items:
-                                    log.debug(f"成功获取分类[{category_code}]第{page_no}页数据，共{len(items)}条")
-                                    return json_response
-                                else:
-                                    log.warning(f"爬取分类[{category_code}]第{page_no}页返回的数据列表为空")
-                            else:
-                                log.warning(f"爬取分类[{category_code}]第{page_no}页返回的数据结构异常: data字段格式不正确")
-                                log.debug(f"响应内容: {json.dumps(json_response, ensure_ascii=False, default=str)[:500]}")
-                        else:
-                            log.warning(f"爬取分类[{category_code}]第{page_no}页返回的数据结构异常: 缺少result或data字段")
-                            log.debug(f"响应内容: {json.dumps(json_response, ensure_ascii=False, default=str)[:500]}")
+                        result, should_retry = self._check_page_response(json_response, category_code, page_no)
+                        if result or not should_retry:
+                            return result
                     except ValueError as e:
                         log.error(f"爬取分类[{category_code}]第{page_no}页返回的不是有效的JSON数据: {str(e)}")
                         log.debug(f"响应内容（前500字符）: {response.text[:500]}")
@@ -172,15 +208,15 @@ class ZheJiangTenderSpider(BaseSpider):
                 if "10053" in str(e):  # Windows连接中止错误代码
                     wait_time = 5 * (retry_count + 1)
                     log.info(f"遇到连接中止错误，等待{wait_time}秒后重试...")
-                    time.sleep(wait_time)
+                    rate_limiter.backoff(wait_time)
                 else:
-                    time.sleep(SPIDER_CONFIG["anti_crawl"]["request_interval"])
+                    rate_limiter.backoff(SPIDER_CONFIG["anti_crawl"]["request_interval"])
             except requests.Timeout as e:
                 log.error(f"爬取分类[{category_code}]第{page_no}页超时: {str(e)}")
-                time.sleep(2)
+                rate_limiter.backoff(2)
             except Exception as e:
                 log.error(f"爬取分类[{category_code}]第{page_no}页失败: {str(e)}")
-                time.sleep(SPIDER_CONFIG["anti_crawl"]["request_interval"])
+                rate_limiter.backoff(SPIDER_CONFIG["anti_crawl"]["request_interval"])
             
             retry_count += 1
             
@@ -188,7 +224,7 @@ class ZheJiangTenderSpider(BaseSpider):
                 log.info(f"正在第{retry_count}次重试爬取分类[{category_code}]第{page_no}页...")
                 # 指数退避策略
                 backoff_time = SPIDER_CONFIG["anti_crawl"]["request_interval"] * (2 ** (retry_count - 1))
-                time.sleep(min(backoff_time, 30))  # 最大等待30秒
+                rate_limiter.backoff(min(backoff_time, 30))  # 最大等待30秒
             else:
                 log.error(f"爬取分类[{category_code}]第{page_no}页达到最大重试次数，放弃该页")
         
@@ -243,11 +279,30 @@ class ZheJiangTenderSpider(BaseSpider):
         """
         新流程第2步：登录政采云主站（www.zcygov.cn），获取带鉴权 Cookie 的 Session
         等价于 aaaa_update.py 中的 login 函数，增加了日志与错误处理
+
+        登录 Cookie 保存在凭据缓存中，跨运行复用；多个下载线程同时需要登录时只登录一次
         """
-        if self.zcy_session is not None:
+        cookies = credential_cache.get("zcy_login", self._login_zcy)
+        if not cookies:
+            return None
+
+        with self._zcy_login_lock:
+            if self.zcy_session is None or self._zcy_cookies is not cookies:
+                self.zcy_session = load_cookies(http_client.session(), cookies)
+                self._zcy_cookies = cookies
             return self.zcy_session
 
-        session = requests.Session()
+    def _check_zcy_login(self, response: requests.Response) -> bool:
+        """政采云接口返回未登录（401/403 或跳转到登录页）时丢弃缓存的登录 Cookie，返回False"""
+        if response.status_code in (401, 403) or "login.zcygov.cn" in response.url:
+            log.warning("政采云登录已失效，将重新登录")
+            credential_cache.invalidate("zcy_login", self._zcy_cookies)
+            return False
+        return True
+
+    def _login_zcy(self) -> list | None:
+        """登录政采云主站，返回登录 Cookie 列表（由凭据缓存调用）"""
+        session = http_client.session()
 
         headers = {
             "Accept": "application/json, text/plain, */*",
@@ -303,9 +358,8 @@ class ZheJiangTenderSpider(BaseSpider):
                 log.error("政采云登录后未获得任何 Cookie，可能登录失败")
                 return None
 
-            self.zcy_session = session
             log.info("政采云登录成功，将复用该会话下载文件")
-            return session
+            return dump_cookies(session.cookies)
         except Exception as e:
             log.error(f"政采云登录失败: {str(e)}")
             return None
@@ -345,6 +399,8 @@ class ZheJiangTenderSpider(BaseSpider):
             }
             data = json.dumps(payload, separators=(",", ":"))
             resp_submit = login_session.post(submit_url, data=data, timeout=SPIDER_CONFIG["anti_crawl"].get("timeout", 30))
+            if not self._check_zcy_login(resp_submit):
+                return None, None
             resp_submit.raise_for_status()
             log.debug(f"提交 acquirePurFile/submit 响应: {resp_submit.text[:300]}")
 
@@ -355,6 +411,8 @@ class ZheJiangTenderSpider(BaseSpider):
                 "projectId": project_id,
             }
             resp_get = login_session.get(get_url, params=params, timeout=SPIDER_CONFIG["anti_crawl"].get("timeout", 30))
+            if not self._check_zcy_login(resp_get):
+                return None, None
             resp_get.raise_for_status()
 
             result = resp_get.json()
@@ -385,18 +443,12 @@ class ZheJiangTenderSpider(BaseSpider):
         """下载招标文件（使用政采云新流程，带重试机制和增强的错误处理）"""
         max_retries = SPIDER_CONFIG["anti_crawl"].get("retry_times", 3)
         retry_count = 0
+        # 上层未传入 session 时创建一个（各次重试共用，连接来自共享连接池）访问 zfcg.czt.zj.gov.cn
+        use_zfcg_session = session or http_client.session(headers=self.headers, cookies=self.cookies)
 
         while retry_count <= max_retries:
             try:
                 # 1）通过浙江政府采购网详情接口拿到 acquirePurFileDetailUrl
-                if not session:
-                    # 如果上层未传入 session，则使用一个新的 session 访问 zfcg.czt.zj.gov.cn
-                    use_zfcg_session = requests.Session()
-                    use_zfcg_session.headers.update(self.headers)
-                    use_zfcg_session.cookies.update(self.cookies)
-                else:
-                    use_zfcg_session = session
-
                 acquire_url = self._get_acquire_purfile_detail_url(article_id, use_zfcg_session)
                 if not acquire_url:
                     log.error(f"articleId={article_id} 未能获取 acquirePurFileDetailUrl")
@@ -439,116 +491,13 @@ class ZheJiangTenderSpider(BaseSpider):
                     
                     filepath = os.path.join(FILES_DIR, filename)
                     
-                    # 下载文件（带分块超时处理）
+                    # 下载文件（支持断点续传：超时重试或次日运行时从上次中断处继续）
                     log.info(f"开始下载文件: {filename}")
                     # 设置文件下载的超时时间（连接超时和读取超时分开设置）
                     download_timeout = (30, 120)  # (连接超时, 读取超时)
-                    file_response = login_session.get(download_link, stream=True, timeout=download_timeout)
-                    file_response.raise_for_status()
-                    
-                    # 获取文件大小
-                    content_length = file_response.headers.get("content-length")
-                    total_size = int(content_length) if content_length else 0
-                    downloaded_size = 0
-                    
-                    # 创建临时文件路径
-                    temp_filepath = f"{filepath}.tmp"
-                    
-                    # 如果目标文件已存在，先删除（避免重命名失败）
-                    if os.path.exists(filepath):
-                        try:
-                            os.remove(filepath)
-                            log.debug(f"删除已存在的文件: {filepath}")
-                        except Exception as e:
-                            log.warning(f"删除已存在文件失败: {filepath}, 错误: {str(e)}")
-                            # 如果删除失败，使用带时间戳的文件名
-                            timestamp = int(time.time())
-                            base_name = os.path.splitext(filename)[0]
-                            ext = os.path.splitext(filename)[1]
-                            filename = f"{base_name}_{timestamp}{ext}"
-                            filepath = os.path.join(FILES_DIR, filename)
-                            temp_filepath = f"{filepath}.tmp"
-                    
-                    # 如果临时文件已存在，先删除
-                    if os.path.exists(temp_filepath):
-                        try:
-                            os.remove(temp_filepath)
-                            log.debug(f"删除已存在的临时文件: {temp_filepath}")
-                        except Exception as e:
-                            log.warning(f"删除临时文件失败: {temp_filepath}, 错误: {str(e)}")
-                    
-                    # 分块下载文件
-                    temp_file = None
-                    try:
-                        temp_file = open(temp_filepath, "wb")
-                        # 设置块超时计时器
-                        last_chunk_time = time.time()
-                        for chunk in file_response.iter_content(chunk_size=8192):
-                            # 检查是否超时（超过60秒未收到数据）
-                            current_time = time.time()
-                            if current_time - last_chunk_time > 60:
-                                raise requests.Timeout("文件下载块超时")
-                            
-                            if chunk:
-                                temp_file.write(chunk)
-                                downloaded_size += len(chunk)
-                                last_chunk_time = current_time
-                        
-                        # 确保文件写入完成
-                        temp_file.flush()
-                        temp_file.close()
-                        temp_file = None
-                        
-                        # 下载完成后重命名临时文件
-                        # 再次检查目标文件是否存在（防止并发下载）
-                        if os.path.exists(filepath):
-                            try:
-                                os.remove(filepath)
-                                log.debug(f"重命名前删除已存在的目标文件: {filepath}")
-                            except Exception as e:
-                                log.warning(f"重命名前删除文件失败: {filepath}, 错误: {str(e)}")
-                                # 如果删除失败，使用带时间戳的文件名
-                                timestamp = int(time.time())
-                                base_name = os.path.splitext(filename)[0]
-                                ext = os.path.splitext(filename)[1]
-                                filename = f"{base_name}_{timestamp}{ext}"
-                                filepath = os.path.join(FILES_DIR, filename)
-                        
-                        # 重命名临时文件（使用shutil.move作为备选，更可靠）
-                        try:
-                            os.rename(temp_filepath, filepath)
-                        except OSError:
-                            # 如果rename失败，尝试使用shutil.move
-                            shutil.move(temp_filepath, filepath)
-                        
-                        log.info(f"文件下载完成: {filepath} (大小: {downloaded_size/1024:.2f}KB)")
-                        return filepath, file_extension
-                    except Exception as e:
-                        # 确保临时文件被关闭
-                        if temp_file:
-                            try:
-                                temp_file.close()
-                            except Exception:
-                                pass
-                        # 清理临时文件
-                        if os.path.exists(temp_filepath):
-                            try:
-                                os.remove(temp_filepath)
-                            except Exception:
-                                pass
-                        raise  # 重新抛出异常以便外层处理
-                    else:
-                        # 特殊情况：success为True但result为None
-                        log.warning(f"API返回success=True但未提供下载链接，响应内容: {result}")
-                        # 将这种情况视为需要重试的错误
-                        retry_count += 1
-                        if retry_count > max_retries:
-                            log.error(f"下载文件[{article_id}]达到最大重试次数（{max_retries}次），放弃下载（空下载链接）")
-                            break
-                        wait_time = 2 * retry_count
-                        log.info(f"遇到空下载链接，等待{wait_time}秒后重试（第{retry_count}次）...")
-                        time.sleep(wait_time)
-                        continue
+                    download_info = download_resumable(login_session, download_link, filepath, timeout=download_timeout)
+                    log.info(f"文件下载完成: {filepath} (大小: {download_info['size']/1024:.2f}KB)")
+                    return filepath, file_extension
                 else:
                     error_msg = result.get('error', '未知错误')
                     log.error(f"获取下载链接失败: {error_msg}，响应内容: {result}")
@@ -559,7 +508,7 @@ class ZheJiangTenderSpider(BaseSpider):
                         break
                     wait_time = 3 * retry_count
                     log.info(f"API返回错误，等待{wait_time}秒后重试（第{retry_count}次）...")
-                    time.sleep(wait_time)
+                    rate_limiter.backoff(wait_time)
                     continue
                     
             except requests.ConnectionError as e:
@@ -567,18 +516,18 @@ class ZheJiangTenderSpider(BaseSpider):
                 # 连接错误时增加等待时间
                 wait_time = 5 * (retry_count + 1)
                 log.info(f"遇到连接错误，等待{wait_time}秒后重试...")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             except requests.Timeout as e:
                 log.error(f"下载文件[{article_id}]超时: {str(e)}")
                 wait_time = 3 * (retry_count + 1)
                 log.info(f"遇到超时错误，等待{wait_time}秒后重试...")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             except Exception as e:
                 log.error(f"下载文件失败[{article_id}]: {str(e)}")
                 # 其他错误也进行重试
                 wait_time = 2 * (retry_count + 1)
                 log.info(f"遇到错误，等待{wait_time}秒后重试...")
-                time.sleep(wait_time)
+                rate_limiter.backoff(wait_time)
             
             retry_count += 1
             
@@ -724,13 +673,297 @@ class ZheJiangTenderSpider(BaseSpider):
         
         return None, None
 
+    def _build_list_streams(self):
+        """
+        构造「分类 × 区域」列表流（政府类在前，区域按 district_codes 顺序）
+        
+        Returns:
+            list: 列表流字典列表，listing 阶段得到的候选项目保存在 "candidates" 中
+        """
+        host = urlparse(self.API_URL).netloc
+        streams = []
+        for category in self.category_codes:
+            for district_code, district_name in self.district_codes.items():
+                streams.append({
+                    "host": host,
+                    "label": f"{category['name']}-{district_name}",
+                    "category_code": category["code"],
+                    "category_name": category["name"],
+                    "is_gov": category["name"] == "政府类",  # 根据分类名称判断是否为政府类
+                    "district_code": district_code,
+                    "district_name": district_name,
+                    # 爬取来源（保存到 crawl_source，预算规划器按来源统计推荐率）
+                    "source": f"{self.PLATFORM_CODE}:{category['code']}:{district_code}",
+                    "session": None,
+                    "candidates": [],
+                    # 增量爬取水位（按 分类:区域 持久化）
+                    "watermark": self._get_watermark(category["code"], district_code),
+                })
+        return streams
+
+    def _new_list_session(self):
+        """创建列表请求会话（未安装 aiohttp 时，每个列表流在线程池中使用独立会话）"""
+        return http_client.session(headers=self.headers, cookies=self.cookies)
+
+    async def _fetch_page_async(self, client, stream, page_no):
+        """
+        异步获取单页数据（带重试机制）
+        
+        Args:
+            client: aiohttp.ClientSession，为None时回退到线程池中执行 _fetch_page
+            stream: 列表流
+            page_no: 页码
+        """
+        category_code = stream["category_code"]
+        if client is None:
+            if stream["session"] is None:
+                stream["session"] = self._new_list_session()
+            return await asyncio.to_thread(
+                self._fetch_page, stream["session"], category_code, page_no,
+                stream["district_code"], stream["is_gov"]
+            )
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                json_data = self._build_page_payload(category_code, page_no, stream["district_code"], stream["is_gov"])
+                log.debug(f"正在请求分类[{category_code}]第{page_no}页数据")
+                # 平台熔断时直接放弃该页
+                circuit_breakers.before_request(self.API_URL)
+                # 按主机令牌桶限速（异步等待，不阻塞其他列表流）
+                await asyncio.sleep(rate_limiter.reserve(self.API_URL))
+                async with client.post(self.API_URL, data=json_data, headers=self.headers, cookies=self.cookies) as response:
+                    circuit_breakers.record(self.API_URL, response.status < 500 and response.status != 429)
+                    response.raise_for_status()
+                    json_response = await response.json(content_type=None)
+                result, should_retry = self._check_page_response(json_response, category_code, page_no)
+                if result or not should_retry:
+                    return result
+            except CircuitOpenError as e:
+                log.warning(f"爬取分类[{category_code}]第{page_no}页跳过: {str(e)}")
+                return None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                circuit_breakers.record(self.API_URL, False)
+                log.error(f"爬取分类[{category_code}]第{page_no}页失败: {str(e)}")
+            except Exception as e:
+                log.error(f"爬取分类[{category_code}]第{page_no}页失败: {str(e)}")
+            
+            if attempt < self.max_retries:
+                log.info(f"正在第{attempt + 1}次重试爬取分类[{category_code}]第{page_no}页...")
+                # 指数退避策略（冷却作用于整个主机）
+                backoff_time = min(SPIDER_CONFIG["anti_crawl"]["request_interval"] * (2 ** attempt), 30)  # 最大等待30秒
+                rate_limiter.bucket(self.API_URL).penalize(backoff_time)
+                await asyncio.sleep(backoff_time)
+            else:
+                log.error(f"爬取分类[{category_code}]第{page_no}页达到最大重试次数，放弃该页")
+        return None
+
+    def _parse_list_item(self, item, name, district_name, today, earliest_date):
+        """
+        解析列表项为项目数据
+        
+        Returns:
+            tuple: (project_data 或 None, 是否停止该列表流)
+        """
+        project_id = item.get("articleId")
+        
+        # 增强project_id验证
+        if not project_id:
+            log.warning(f"[{name}-{district_name}]发现无project_id的项目，跳过处理")
+            return None, False
+        
+        # 提取发布时间
+        publish_date, publish_date_source = self._extract_publish_date(item, name, district_name)
+        
+        # 如果没有发布时间，跳过该项目（不使用当前时间作为后备）
+        if publish_date is None:
+            log.warning(
+                f"[{name}-{district_name}]跳过无发布时间的项目: {item.get('title', '未命名项目')[:50]}"
+            )
+            return None, False
+        
+        # 解析发布时间：publishDate是13位毫秒时间戳，去掉后3位得到10位秒级时间戳
+        try:
+            # 统一处理：将publishDate转换为整数，然后去掉后3位
+            if isinstance(publish_date, (int, float)):
+                timestamp_ms = int(publish_date)
+            elif isinstance(publish_date, str) and publish_date.strip() and publish_date.strip().isdigit():
+                timestamp_ms = int(publish_date.strip())
+            else:
+                log.error(
+                    f"[{name}-{district_name}]❌ publishDate格式错误: {publish_date} "
+                    f"(类型: {type(publish_date).__name__})，跳过该项目"
+                )
+                return None, False
+            
+            # 去掉后3位，转换为10位秒级时间戳
+            timestamp = timestamp_ms // 1000
+            publish_time = datetime.fromtimestamp(timestamp)
+            project_date = publish_time.date()
+            
+            log.debug(
+                f"[{name}-{district_name}]时间戳转换: "
+                f"{timestamp_ms} -> {timestamp}, "
+                f"发布时间={publish_time.strftime('%Y-%m-%d %H:%M:%S')}"
+            )
+            
+            # 如果设置了时间间隔限制
+            if self.days_before is not None:
+                # 爬取最近N天内的文件：earliest_date <= project_date <= today
+                # 如果项目日期早于最早允许日期（太旧），停止该区域爬取
+                if earliest_date is not None and project_date < earliest_date:
+                    log.info(f"[{name}-{district_name}]发现项目日期（{project_date}）早于时间范围（{earliest_date}），停止该区域爬取")
+                    return None, True
+                # 如果项目日期晚于今天（未来日期，不应该存在），跳过
+                elif project_date > today:
+                    log.debug(f"[{name}-{district_name}]发现未来日期项目（{project_date}），跳过")
+                    return None, False
+            else:
+                # 未设置时间间隔时，只爬取当日文件
+                # 如果项目日期不是当日，停止该区域当日爬取
+                if project_date < today:
+                    log.info(f"[{name}-{district_name}]发现非当日项目（{project_date}），停止该区域当日爬取")
+                    return None, True
+        except (ValueError, OverflowError) as e:
+            log.warning(f"[{name}-{district_name}]项目日期格式错误: {publish_date}, 错误: {str(e)}，跳过该项目")
+            return None, False
+        
+        # 获取区域名称（优先使用API返回的districtName，根据aaaa.py）
+        # 如果没有districtName，使用district_codes映射（兼容旧数据）
+        region_name = item.get("districtName") or district_name
+        
+        project_data = {
+            "project_name": item.get("title", ""),
+            "site_name": f"浙江省政府采购网-{region_name}",
+            "publish_time": publish_time,  # 使用从API时间戳转换的发布时间
+            "publish_timestamp": timestamp_ms,  # 保存原始时间戳（毫秒）
+            "download_url": f"{self.BASE_URL}/site/detail?parentId=600007&articleId={project_id}",
+            "project_id": project_id,
+            "region": region_name,  # 使用API返回的districtName
+            "status": ProjectStatus.DOWNLOADED  # 使用枚举类型确保数据一致性
+        }
+        return project_data, False
+
+    def _list_streams(self, streams, today, earliest_date):
+        """
+        并发获取所有列表流的候选项目（结果写入各列表流的 "candidates"）
+        
+        已入库的项目在 listing 阶段按页批量过滤（去重索引 + IN 查询）
+        
+        Args:
+            streams: 列表流列表
+            today: 当日日期
+            earliest_date: 最早允许的发布日期（None表示只爬取当日）
+        """
+        def handle_page(stream, page_no, result):
+            name, district_name = stream["category_name"], stream["district_name"]
+            watermark = stream["watermark"]
+            if not result:
+                log.warning(f"[{name}-{district_name}]第{page_no}页无有效数据，停止爬取该区域")
+                watermark.abort()
+                return True
+            
+            items = result['result']['data'].get('data', [])
+            log.debug(f"[{name}-{district_name}]第{page_no}页获取到{len(items)}个项目")
+            page_projects = []
+            stop_paging = False
+            for item in items:
+                project_data, stop = self._parse_list_item(item, name, district_name, today, earliest_date)
+                if stop:
+                    # 已到达时间范围边界，该列表流完整
+                    watermark.finish()
+                    stop_paging = True
+                    break
+                if not project_data:
+                    continue
+                # 增量爬取：已处理过的项目跳过，连续遇到则停止翻页
+                status = watermark.check(project_data)
+                if status == STOP:
+                    log.info(f"[{name}-{district_name}]已到达上次爬取的位置，停止爬取该区域")
+                    stop_paging = True
+                    break
+                if status == SEEN:
+                    continue
+                page_projects.append(project_data)
+            
+            # 性能优化：本页项目一次批量确认是否已入库（布隆过滤器 + IN 查询）
+            new_ids = self.dedup.filter_new(project_data["project_id"] for project_data in page_projects)
+            fresh_projects = []
+            for project_data in page_projects:
+                if project_data["project_id"] not in new_ids:
+                    log.debug(f"[{name}-{district_name}]项目已存在，跳过处理: {project_data['project_name']}")
+                    continue
+                project_data["crawl_source"] = stream["source"]
+                fresh_projects.append(project_data)
+            # 标题预筛排除的公告、市级平台已入库的同一采购（标题略有不同）不再下载
+            for project_data in self._filter_near_duplicates(self._prefilter_titles(fresh_projects)):
+                watermark.track(project_data)
+                stream["candidates"].append(project_data)
+            # 单个区域的新项目已足够填满配额时无需继续翻页
+            return stop_paging or len(stream["candidates"]) >= self.daily_limit
+        
+        engine = AsyncListingEngine(
+            max_per_host=SPIDER_CONFIG.get("zhejiang_list_concurrency", 4),
+            page_interval=0,  # 请求节奏由按主机的令牌桶限速器控制
+            max_pages=SPIDER_CONFIG["zhejiang_max_pages"],
+            timeout=SPIDER_CONFIG["anti_crawl"].get("timeout", 15),
+        )
+        try:
+            engine.run(streams, self._fetch_page_async, handle_page)
+        finally:
+            for stream in streams:
+                if stream["session"] is not None:
+                    stream["session"].close()
+                    stream["session"] = None
+
+    def _plan_candidates(self, streams):
+        """
+        按各列表流的历史推荐率分配配额，返回候选项目的产出顺序
+
+        配额按推荐率比例分配，且不超过各列表流实际发现的新项目数（列表流不够分时多出的配额
+        分给其他列表流）。先依次产出各列表流（推荐率从高到低）规划额度内的候选项目；
+        规划额度用完后仍需要项目时（下载失败、保存时发现重复或平台额度增加），
+        剩余候选项目继续按推荐率从高到低产出。
+
+        未启用预算规划或统计失败时按 政府类 -> 非政府类、浙江省本级 -> 杭州市 -> ... 的顺序产出。
+
+        Returns:
+            list: 候选项目（project_data）
+        """
+        default_order = [project_data for stream in streams for project_data in stream["candidates"]]
+        if not SPIDER_CONFIG.get("budget_planner", {}).get("enabled", True):
+            return default_order
+        try:
+            stats = load_yield_stats(self.db)
+        except Exception as e:
+            log.warning(f"统计历史推荐率失败，按分类/区域顺序下载: {str(e)}")
+            return default_order
+
+        by_source = {stream["source"]: stream for stream in streams}
+        planner = CrawlBudgetPlanner(
+            self._crawl_limit(),
+            {
+                key: stats.source(key, f"{self.PLATFORM_NAME}-{stream['district_name']}")
+                for key, stream in by_source.items()
+            },
+            {key: len(stream["candidates"]) for key, stream in by_source.items()},
+        )
+        plan = planner.plan()
+        log.info(
+            "按历史推荐率分配各分类/区域配额: "
+            + planner.describe({key: stream["label"] for key, stream in by_source.items()})
+        )
+        order = planner.order()
+        planned = [project_data for key in order for project_data in by_source[key]["candidates"][:plan[key]]]
+        rest = [project_data for key in order for project_data in by_source[key]["candidates"][plan[key]:]]
+        return planned + rest
+
     def run(self):
         """
         执行爬虫（优先爬取当日文件，按顺序完成每个区域/分类）
         
         爬取顺序：
-        1. 政府类 -> 浙江省本级当日文件（完毕）-> 杭州市当日文件（完毕）-> ... -> 所有区域完毕
-        2. 非政府类 -> 浙江省本级当日文件（完毕）-> 杭州市当日文件（完毕）-> ... -> 所有区域完毕
+        1. 并发获取「政府类/非政府类 × 各区域」共24个列表流的当日（或时间范围内）项目
+        2. 按各分类/区域的历史推荐率分配配额（见 _plan_candidates），推荐率高的列表流先下载并保存
         3. 达到配额即停止，不再爬取历史文件
         
         重要说明：
@@ -741,18 +974,10 @@ class ZheJiangTenderSpider(BaseSpider):
         if self.days_before is not None:
             log.info(f"时间间隔限制：爬取最近 {self.days_before} 天内的文件")
         
-        total_count = 0
-        projects = []
         today = datetime.now().date()  # 获取当日日期（仅日期部分）
         
-        # 性能优化：批量查询所有已存在的project_id，避免每次单独查询数据库
-        existing_project_ids = set(
-            row[0] for row in self.db.query(TenderProject.project_id)
-            .filter(TenderProject.project_id.isnot(None))
-            .all()
-        )
-        processed_project_ids = set(existing_project_ids)  # 本地缓存已处理的project_id，避免重复处理
-        log.info(f"已加载 {len(existing_project_ids)} 个已存在的项目ID到内存缓存")
+        # 本次运行已处理的project_id（不同列表流可能包含同一项目）；是否已入库由去重索引按页批量确认
+        processed_project_ids = set()
         
         # 计算最早允许的发布日期（如果设置了days_before）
         # days_before表示爬取最近N天内的文件（从今天往前N天）
@@ -762,408 +987,51 @@ class ZheJiangTenderSpider(BaseSpider):
             earliest_date = today - timedelta(days=self.days_before)
             log.info(f"时间范围：{earliest_date} 至 {today}（最近 {self.days_before} 天内）")
 
-        session = requests.Session()  # 创建一个持久化的会话对象，提高连接效率
-        session.headers.update(self.headers)
-        session.cookies.update(self.cookies)
-        
-        # 遍历分类：政府类 -> 非政府类
-        for category in self.category_codes:
-            # 检查是否已达到配额
-            if total_count >= self.daily_limit:
-                log.info(f"已达到爬取配额（{self.daily_limit}），停止爬取")
-                break
-            
-            code = category["code"]
-            name = category["name"]
-            category_count = 0
-            is_gov = name == "政府类"  # 根据分类名称判断是否为政府类
-
-            log.info(f"开始爬取[{name}]分类（{code}）")
-
-            # 政府类：依次爬取每个区域的当日文件
-            if is_gov:
-                log.info(f"[{name}]依次爬取各区域当日文件")
-                
-                for district_code, district_name in self.district_codes.items():
-                    # 检查是否已达到配额
-                    if total_count >= self.daily_limit:
-                        log.info(f"已达到爬取配额（{self.daily_limit}），停止爬取")
-                        break
-                        
-                    district_count = 0
-                    page_no = 1
-                    found_non_today = False  # 标记是否遇到非当日项目
-
-                    log.info(f"  开始爬取区域: {district_name}（{district_code}）的当日文件")
-
-                    # 爬取该区域的所有当日文件，直到遇到非当日项目或达到配额
-                    while page_no <= SPIDER_CONFIG["zhejiang_max_pages"] and not found_non_today and total_count < self.daily_limit:
-                        # 反爬控制
-                        if page_no > 1:  # 第一页不等待，提高效率
-                            time.sleep(SPIDER_CONFIG["anti_crawl"]["request_interval"])
-
-                        # 获取页面数据（带区域参数和分类类型）
-                        log.debug(f"[{name}-{district_name}]正在请求第{page_no}页当日数据")
-                        result = self._fetch_page(session, code, page_no, district_code, is_gov)
-                        
-                        # 检查响应是否有效
-                        if not result:
-                            log.warning(f"[{name}-{district_name}]第{page_no}页请求失败，停止爬取该区域")
-                            break
-                        
-                        # 检查响应结构
-                        if not isinstance(result, dict):
-                            log.warning(f"[{name}-{district_name}]第{page_no}页响应格式错误，类型={type(result).__name__}")
-                            break
-                        
-                        if not result.get('result') or not result['result'].get('data'):
-                            log.warning(f"[{name}-{district_name}]第{page_no}页无有效数据，停止爬取该区域")
-                            log.debug(f"响应结构: result字段存在={bool(result.get('result'))}, data字段存在={bool(result.get('result', {}).get('data'))}")
-                            break
-                        
-                        # 获取数据列表
-                        data_obj = result['result']['data']
-                        if not isinstance(data_obj, dict):
-                            log.warning(f"[{name}-{district_name}]第{page_no}页data字段格式错误，类型={type(data_obj).__name__}")
-                            break
-                        
-                        items = data_obj.get('data', [])
-                        if not items:
-                            log.warning(f"[{name}-{district_name}]第{page_no}页无项目数据，停止爬取该区域")
-                            break
-                        
-                        log.debug(f"[{name}-{district_name}]第{page_no}页获取到{len(items)}个项目")
-
-                        # 处理项目数据
-                        for item in items:
-                            if total_count >= self.daily_limit:
-                                break
-
-                            project_id = item.get("articleId")
-                            
-                            # 增强project_id验证
-                            if not project_id:
-                                log.warning(f"[{name}-{district_name}]发现无project_id的项目，跳过处理")
-                                continue
-                            
-                            # 提取发布时间
-                            publish_date, publish_date_source = self._extract_publish_date(item, name, district_name)
-                            
-                            # 如果没有发布时间，跳过该项目（不使用当前时间作为后备）
-                            if publish_date is None:
-                                log.warning(
-                                    f"[{name}-{district_name}]跳过无发布时间的项目: {item.get('title', '未命名项目')[:50]}"
-                                )
-                                continue
-                            
-                            # 解析发布时间：publishDate是13位毫秒时间戳，去掉后3位得到10位秒级时间戳
-                            project_date = None
-                            publish_time = None
-                            try:
-                                # 统一处理：将publishDate转换为整数，然后去掉后3位
-                                if isinstance(publish_date, (int, float)):
-                                    timestamp_ms = int(publish_date)
-                                elif isinstance(publish_date, str) and publish_date.strip() and publish_date.strip().isdigit():
-                                    timestamp_ms = int(publish_date.strip())
-                                else:
-                                    log.error(
-                                        f"[{name}-{district_name}]❌ publishDate格式错误: {publish_date} "
-                                        f"(类型: {type(publish_date).__name__})，跳过该项目"
-                                    )
-                                    continue
-                                
-                                # 去掉后3位，转换为10位秒级时间戳
-                                timestamp = timestamp_ms // 1000
-                                publish_time = datetime.fromtimestamp(timestamp)
-                                project_date = publish_time.date()
-                                
-                                log.debug(
-                                    f"[{name}-{district_name}]时间戳转换: "
-                                    f"{timestamp_ms} -> {timestamp}, "
-                                    f"发布时间={publish_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                                )
-                                
-                                # 如果设置了时间间隔限制
-                                if self.days_before is not None:
-                                    # 爬取最近N天内的文件：earliest_date <= project_date <= today
-                                    # 如果项目日期早于最早允许日期（太旧），停止该区域爬取
-                                    if project_date < earliest_date:
-                                        log.info(f"[{name}-{district_name}]发现项目日期（{project_date}）早于时间范围（{earliest_date}），停止该区域爬取")
-                                        found_non_today = True
-                                        break
-                                    # 如果项目日期晚于今天（未来日期，不应该存在），跳过
-                                    elif project_date > today:
-                                        log.debug(f"[{name}-{district_name}]发现未来日期项目（{project_date}），跳过")
-                                        continue
-                                else:
-                                    # 未设置时间间隔时，只爬取当日文件
-                                    # 如果项目日期不是当日，标记并跳过
-                                    if project_date < today:
-                                        log.info(f"[{name}-{district_name}]发现非当日项目（{project_date}），停止该区域当日爬取")
-                                        found_non_today = True
-                                        break
-                            except (ValueError, OverflowError) as e:
-                                log.warning(f"[{name}-{district_name}]项目日期格式错误: {publish_date}, 错误: {str(e)}，跳过该项目")
-                                continue
-                            
-                            # 如果发布时间解析失败，跳过该项目
-                            if not publish_time:
-                                log.warning(f"[{name}-{district_name}]无法解析发布时间: {publish_date}，跳过该项目")
-                                continue
-                            
-                            # 性能优化：只检查本地缓存，已批量加载所有已存在的project_id
-                            if project_id in processed_project_ids:
-                                log.debug(f"[{name}-{district_name}]项目已存在，跳过处理: {item.get('title', '未命名项目')}")
-                                continue
-                            
-                            # 添加到本地已处理集合
-                            processed_project_ids.add(project_id)
-                            
-                            # 获取区域名称（优先使用API返回的districtName，根据aaaa.py）
-                            api_district_name = item.get("districtName")
-                            if api_district_name:
-                                region_name = api_district_name
-                            else:
-                                # 如果没有districtName，使用district_codes映射（兼容旧数据）
-                                region_name = district_name
-                            
-                            # 保存原始时间戳（毫秒）
-                            publish_timestamp = timestamp_ms
-                            
-                            project_data = {
-                                "project_name": item.get("title", ""),
-                                "site_name": f"浙江省政府采购网-{region_name}",
-                                "publish_time": publish_time,  # 使用从API时间戳转换的发布时间
-                                "publish_timestamp": publish_timestamp,  # 保存原始时间戳（毫秒）
-                                "download_url": f"{self.BASE_URL}/site/detail?parentId=600007&articleId={project_id}",
-                                "project_id": project_id,
-                                "region": region_name,  # 使用API返回的districtName
-                                "status": ProjectStatus.DOWNLOADED  # 使用枚举类型确保数据一致性
-                            }
-                            
-                            # 下载文件
-                            file_path, file_format = self._download_document(project_id, project_data["project_name"], session)
-                            if file_path:
-                                project_data["file_path"] = file_path
-                                project_data["file_format"] = file_format
-
-                            try:
-                                # 保存项目
-                                saved_project = save_project(self.db, project_data)
-                                projects.append(saved_project)
-                                district_count += 1
-                                category_count += 1
-                                total_count += 1
-                                self.crawled_count += 1
-                                log.debug(
-                                    f"已爬取[{name}-{district_name}]当日项目: {project_data['project_name']}（总进度: {total_count}/{self.daily_limit}）")
-                            except Exception as e:
-                                log.error(f"保存项目失败[{project_id}]: {str(e)}。项目已标记为已处理，不会重复爬取。")
-                                # 不从这里移除，保持已处理状态，避免无限循环
-                                # 项目已经在 processed_project_ids 中，即使保存失败也不移除
-                                pass
-
-                        page_no += 1
-
-                    log.info(f"  [{name}-{district_name}]区域当日文件爬取完成，实际获取: {district_count}个")
-                
-                # 政府类所有区域爬取完毕
-                log.info(f"[{name}]所有区域当日文件爬取完成，共获取: {category_count}个")
-            
-            # 非政府类：依次爬取每个区域的当日文件（与政府类逻辑一致）
-            else:
-                log.info(f"[{name}]依次爬取各区域当日文件")
-                
-                for district_code, district_name in self.district_codes.items():
-                    # 检查是否已达到配额
-                    if total_count >= self.daily_limit:
-                        log.info(f"已达到爬取配额（{self.daily_limit}），停止爬取")
-                        break
-                        
-                    district_count = 0
-                    page_no = 1
-                    found_non_today = False  # 标记是否遇到非当日项目
-
-                    log.info(f"  开始爬取区域: {district_name}（{district_code}）的当日文件")
-
-                    # 爬取该区域的所有当日文件，直到遇到非当日项目或达到配额
-                    while page_no <= SPIDER_CONFIG["zhejiang_max_pages"] and not found_non_today and total_count < self.daily_limit:
-                        # 反爬控制
-                        if page_no > 1:  # 第一页不等待，提高效率
-                            time.sleep(SPIDER_CONFIG["anti_crawl"]["request_interval"])
-
-                        # 获取页面数据（带区域参数和分类类型）
-                        log.debug(f"[{name}-{district_name}]正在请求第{page_no}页当日数据")
-                        result = self._fetch_page(session, code, page_no, district_code, is_gov)
-                        
-                        # 检查响应是否有效
-                        if not result:
-                            log.warning(f"[{name}-{district_name}]第{page_no}页请求失败，停止爬取该区域")
-                            break
-                        
-                        # 检查响应结构
-                        if not isinstance(result, dict):
-                            log.warning(f"[{name}-{district_name}]第{page_no}页响应格式错误，类型={type(result).__name__}")
-                            break
-                        
-                        if not result.get('result') or not result['result'].get('data'):
-                            log.warning(f"[{name}-{district_name}]第{page_no}页无有效数据，停止爬取该区域")
-                            log.debug(f"响应结构: result字段存在={bool(result.get('result'))}, data字段存在={bool(result.get('result', {}).get('data'))}")
-                            break
-                        
-                        # 获取数据列表
-                        data_obj = result['result']['data']
-                        if not isinstance(data_obj, dict):
-                            log.warning(f"[{name}-{district_name}]第{page_no}页data字段格式错误，类型={type(data_obj).__name__}")
-                            break
-                        
-                        items = data_obj.get('data', [])
-                        if not items:
-                            log.warning(f"[{name}-{district_name}]第{page_no}页无项目数据，停止爬取该区域")
-                            break
-                        
-                        log.debug(f"[{name}-{district_name}]第{page_no}页获取到{len(items)}个项目")
-
-                        # 处理项目数据
-                        for item in items:
-                            if total_count >= self.daily_limit:
-                                break
-
-                            project_id = item.get("articleId")
-                            
-                            # 增强project_id验证
-                            if not project_id:
-                                log.warning(f"[{name}-{district_name}]发现无project_id的项目，跳过处理")
-                                continue
-                            
-                            # 提取发布时间
-                            publish_date, publish_date_source = self._extract_publish_date(item, name, district_name)
-                            
-                            # 如果没有发布时间，跳过该项目（不使用当前时间作为后备）
-                            if publish_date is None:
-                                log.warning(
-                                    f"[{name}-{district_name}]跳过无发布时间的项目: {item.get('title', '未命名项目')[:50]}"
-                                )
-                                continue
-                            
-                            # 解析发布时间：publishDate是13位毫秒时间戳，去掉后3位得到10位秒级时间戳
-                            project_date = None
-                            publish_time = None
-                            try:
-                                # 统一处理：将publishDate转换为整数，然后去掉后3位
-                                if isinstance(publish_date, (int, float)):
-                                    timestamp_ms = int(publish_date)
-                                elif isinstance(publish_date, str) and publish_date.strip() and publish_date.strip().isdigit():
-                                    timestamp_ms = int(publish_date.strip())
-                                else:
-                                    log.error(
-                                        f"[{name}-{district_name}]❌ publishDate格式错误: {publish_date} "
-                                        f"(类型: {type(publish_date).__name__})，跳过该项目"
-                                    )
-                                    continue
-                                
-                                # 去掉后3位，转换为10位秒级时间戳
-                                timestamp = timestamp_ms // 1000
-                                publish_time = datetime.fromtimestamp(timestamp)
-                                project_date = publish_time.date()
-                                
-                                log.debug(
-                                    f"[{name}-{district_name}]时间戳转换: "
-                                    f"{timestamp_ms} -> {timestamp}, "
-                                    f"发布时间={publish_time.strftime('%Y-%m-%d %H:%M:%S')}"
-                                )
-                                
-                                # 如果设置了时间间隔限制
-                                if self.days_before is not None:
-                                    # 爬取最近N天内的文件：earliest_date <= project_date <= today
-                                    # 如果项目日期早于最早允许日期（太旧），停止该区域爬取
-                                    if project_date < earliest_date:
-                                        log.info(f"[{name}-{district_name}]发现项目日期（{project_date}）早于时间范围（{earliest_date}），停止该区域爬取")
-                                        found_non_today = True
-                                        break
-                                    # 如果项目日期晚于今天（未来日期，不应该存在），跳过
-                                    elif project_date > today:
-                                        log.debug(f"[{name}-{district_name}]发现未来日期项目（{project_date}），跳过")
-                                        continue
-                                else:
-                                    # 未设置时间间隔时，只爬取当日文件
-                                    # 如果项目日期不是当日，标记并跳过
-                                    if project_date < today:
-                                        log.info(f"[{name}-{district_name}]发现非当日项目（{project_date}），停止该区域当日爬取")
-                                        found_non_today = True
-                                        break
-                            except (ValueError, OverflowError) as e:
-                                log.warning(f"[{name}-{district_name}]项目日期格式错误: {publish_date}, 错误: {str(e)}，跳过该项目")
-                                continue
-                            
-                            # 如果发布时间解析失败，跳过该项目
-                            if not publish_time:
-                                log.warning(f"[{name}-{district_name}]无法解析发布时间: {publish_date}，跳过该项目")
-                                continue
-                            
-                            # 性能优化：只检查本地缓存，已批量加载所有已存在的project_id
-                            if project_id in processed_project_ids:
-                                log.debug(f"[{name}-{district_name}]项目已存在，跳过处理: {item.get('title', '未命名项目')}")
-                                continue
-                            
-                            # 添加到本地已处理集合
-                            processed_project_ids.add(project_id)
-                            
-                            # 获取区域名称（优先使用API返回的districtName，根据aaaa.py）
-                            api_district_name = item.get("districtName")
-                            if api_district_name:
-                                region_name = api_district_name
-                            else:
-                                # 如果没有districtName，使用district_codes映射（兼容旧数据）
-                                region_name = district_name
-                            
-                            # 保存原始时间戳（毫秒）
-                            publish_timestamp = timestamp_ms
-                            
-                            project_data = {
-                                "project_name": item.get("title", ""),
-                                "site_name": f"浙江省政府采购网-{region_name}",
-                                "publish_time": publish_time,  # 使用从API时间戳转换的发布时间
-                                "publish_timestamp": publish_timestamp,  # 保存原始时间戳（毫秒）
-                                "download_url": f"{self.BASE_URL}/site/detail?parentId=600007&articleId={project_id}",
-                                "project_id": project_id,
-                                "region": region_name,  # 使用API返回的districtName
-                                "status": ProjectStatus.DOWNLOADED  # 使用枚举类型确保数据一致性
-                            }
-                            
-                            # 下载文件
-                            file_path, file_format = self._download_document(project_id, project_data["project_name"], session)
-                            if file_path:
-                                project_data["file_path"] = file_path
-                                project_data["file_format"] = file_format
-
-                            try:
-                                # 保存项目
-                                saved_project = save_project(self.db, project_data)
-                                projects.append(saved_project)
-                                district_count += 1
-                                category_count += 1
-                                total_count += 1
-                                self.crawled_count += 1
-                                log.debug(
-                                    f"已爬取[{name}-{district_name}]当日项目: {project_data['project_name']}（总进度: {total_count}/{self.daily_limit}）")
-                            except Exception as e:
-                                log.error(f"保存项目失败[{project_id}]: {str(e)}。项目已标记为已处理，不会重复爬取。")
-                                # 不从这里移除，保持已处理状态，避免无限循环
-                                # 项目已经在 processed_project_ids 中，即使保存失败也不移除
-                                pass
-
-                        page_no += 1
-
-                    log.info(f"  [{name}-{district_name}]区域当日文件爬取完成，实际获取: {district_count}个")
-                
-                # 非政府类所有区域爬取完毕
-                log.info(f"[{name}]所有区域当日文件爬取完成，共获取: {category_count}个")
+        # 并发获取各分类/区域的列表页
+        streams = self._build_list_streams()
+        list_start = time.perf_counter()
+        self._list_streams(streams, today, earliest_date)
+        log.info(
+            f"列表页获取完成，{len(streams)}个分类/区域共发现 "
+            f"{sum(len(stream['candidates']) for stream in streams)} 个新项目，"
+            f"耗时 {time.perf_counter() - list_start:.1f} 秒"
+        )
 
+        # 持久化的会话对象（共享连接池，按主机令牌桶限速）
+        session = http_client.session(headers=self.headers, cookies=self.cookies)
+        
+        def iter_candidates():
+            """按预算规划的顺序产出候选项目"""
+            for project_data in self._plan_candidates(streams):
+                project_id = project_data["project_id"]
+                if project_id in processed_project_ids:
+                    continue
+                # 添加到本地已处理集合
+                processed_project_ids.add(project_id)
+                yield project_data
+        
+        # 列表发现与文件下载解耦：候选项目交给下载线程池并发下载，保存仍在主线程中进行
+        projects = self._run_pipeline(
+            iter_candidates(),
+            lambda project_data: self._download_document(
+                project_data["project_id"], project_data["project_name"], session
+            ),
+        )
+        total_count = len(projects)
+        
+        category_of = {
+            project_data["project_id"]: stream["category_name"]
+            for stream in streams for project_data in stream["candidates"]
+        }
+        category_counts = {category["name"]: 0 for category in self.category_codes}
+        for project in projects:
+            category_counts[category_of[project.project_id]] += 1
+        for name, category_count in category_counts.items():
             log.info(f"[{name}]分类爬取完成，实际获取: {category_count}个")
 
         # 关闭会话和数据库连接
         session.close()
+        self._commit_watermarks()
         self.db.close()
         log.info(f"浙江省招标网爬取完成，总获取: {total_count}个项目")
         # 确保crawled_count与total_count一致
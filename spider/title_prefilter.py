@@ -0,0 +1,255 @@
+"""列表阶段的标题相关性预筛
+
+原先所有新项目都先下载、解析，之后才由服务类判断（is_service_project，调用大模型）或
+资质关键词检查排除，其中相当一部分从标题就能看出是服务类或不在业务范围内的公告
+（物业管理、保洁、审计、结果公告等），白白花费带宽、解析时间和大模型调用。
+预筛在列表阶段（去重之后、下载之前）对标题和列表元数据打分：
+- 排除词、保留词各编译成一个多模式匹配自动机（Aho-Corasick），一次扫描找出所有命中的关键词；
+- 命中保留词（设备、货物、施工等）的项目一律保留，保留词优先于排除词，宁可多下载也不漏爬；
+- 命中排除词（服务类、不在业务范围内的公告类型）的项目跳过；
+- 配置了本地文本分类模型（joblib 保存的 scikit-learn 模型，如 TF-IDF + 逻辑回归）时，
+  未命中关键词的项目再由模型打分，不相关概率不低于阈值的跳过；模型加载或打分失败时不跳过。
+被跳过的项目以「已排除」状态入库（error_msg 记录预筛原因，与服务类判断的处理方式一致），
+之后的运行按ID去重直接跳过，误判的项目也可以在库中查到。
+"""
+
+import os
+import threading
+
+from utils.log import log
+from config import SPIDER_CONFIG
+
+try:
+    import joblib
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    joblib = None
+    JOBLIB_AVAILABLE = False
+
+# 预筛排除的项目在 error_msg 中的前缀
+PREFILTER_PREFIX = "标题预筛"
+
+
+class KeywordAutomaton:
+    """多关键词匹配自动机（Aho-Corasick），匹配时间与文本长度成正比，与关键词数量无关"""
+
+    def __init__(self, keywords):
+        """
+        Args:
+            keywords: 关键词列表（不区分大小写，空字符串忽略）
+        """
+        self.keywords = sorted({keyword.strip().lower() for keyword in keywords or [] if keyword and keyword.strip()})
+        # 字典树：_goto[状态][字符] -> 状态，_output[状态] 为以该状态结尾的关键词
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(keyword)
+        # 按层次遍历计算失败指针，并合并失败指针指向状态的输出
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+                queue.append(child)
+
+    def __bool__(self):
+        return bool(self.keywords)
+
+    def find(self, text):
+        """
+        查找文本中出现的所有关键词
+
+        Returns:
+            list: 命中的关键词（按首次出现的位置排序，不重复）
+        """
+        found = []
+        state = 0
+        for char in (text or "").lower():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword in self._output[state]:
+                if keyword not in found:
+                    found.append(keyword)
+        return found
+
+
+class TitlePrefilter:
+    """标题相关性预筛（线程安全，模型在首次使用时加载）"""
+
+    def __init__(self, config=None):
+        """
+        Args:
+            config: 预筛配置（None时使用 SPIDER_CONFIG["title_prefilter"]）
+        """
+        config = SPIDER_CONFIG.get("title_prefilter", {}) if config is None else config
+        self.enabled = config.get("enabled", False)
+        self.fields = config.get("fields") or ["project_name"]
+        self.include = KeywordAutomaton(config.get("include_keywords"))
+        self.service = KeywordAutomaton(config.get("service_keywords"))
+        self.exclude = KeywordAutomaton(config.get("exclude_keywords"))
+        self.model_path = config.get("model_path")
+        self.threshold = config.get("threshold", 0.9)
+        self.irrelevant_label = config.get("irrelevant_label", 1)
+        self._model = None
+        self._model_loaded = False
+        self._lock = threading.Lock()
+
+    def _text(self, project_data):
+        """参与打分的文本：标题和列表元数据（缺少的字段忽略）"""
+        return " ".join(str(project_data[field]) for field in self.fields if project_data.get(field))
+
+    @property
+    def model(self):
+        """本地文本分类模型（未配置、依赖缺失或加载失败时为 None）"""
+        with self._lock:
+            if not self._model_loaded:
+                self._model_loaded = True
+                if not self.model_path or not os.path.exists(self.model_path):
+                    log.debug(f"未配置标题预筛分类模型或文件不存在（只使用关键词预筛）: {self.model_path}")
+                elif not JOBLIB_AVAILABLE:
+                    log.warning("未安装 joblib，标题预筛不使用文本分类模型")
+                else:
+                    try:
+                        self._model = joblib.load(self.model_path)
+                        log.info(f"已加载标题预筛分类模型: {self.model_path}")
+                    except Exception as e:
+                        log.warning(f"标题预筛分类模型加载失败（只使用关键词预筛）: {str(e)}")
+            return self._model
+
+    def _irrelevant_probability(self, texts):
+        """模型判断的不相关概率（模型不可用时返回 None）"""
+        model = self.model
+        if model is None or not texts:
+            return None
+        try:
+            classes = list(model.classes_)
+            column = classes.index(self.irrelevant_label)
+            return [row[column] for row in model.predict_proba(texts)]
+        except Exception as e:
+            log.warning(f"标题预筛模型打分失败（本页只使用关键词预筛）: {str(e)}")
+            return None
+
+    def check(self, project_data):
+        """
+        判断单个项目是否需要下载
+
+        Returns:
+            tuple: (keep: bool, reason: str) 跳过时 reason 为排除原因
+        """
+        kept, skipped = self.split([project_data])
+        if kept:
+            return True, ""
+        return False, skipped[0][1]
+
+    def split(self, page_projects):
+        """
+        将一个列表页的项目分为需要下载的和预筛跳过的
+
+        Args:
+            page_projects: 项目数据列表
+
+        Returns:
+            tuple: (kept: list, skipped: list[(project_data, reason)])，保持原有顺序
+        """
+        if not self.enabled or not page_projects:
+            return list(page_projects or []), []
+        decisions = {}
+        undecided = []
+        for index, project_data in enumerate(page_projects):
+            text = self._text(project_data)
+            if self.include.find(text):
+                decisions[index] = None
+                continue
+            service_hits = self.service.find(text)
+            exclude_hits = self.exclude.find(text)
+            if service_hits:
+                decisions[index] = f"服务类项目（{'、'.join(service_hits)}）"
+            elif exclude_hits:
+                decisions[index] = f"不在业务范围内（{'、'.join(exclude_hits)}）"
+            else:
+                undecided.append((index, text))
+        # 关键词未能判断的项目一次批量交给模型打分
+        probabilities = self._irrelevant_probability([text for _, text in undecided])
+        for position, (index, _) in enumerate(undecided):
+            probability = probabilities[position] if probabilities else None
+            if probability is not None and probability >= self.threshold:
+                decisions[index] = f"分类模型判断不相关（{probability:.0%}）"
+            else:
+                decisions[index] = None
+        kept, skipped = [], []
+        for index, project_data in enumerate(page_projects):
+            reason = decisions[index]
+            if reason is None:
+                kept.append(project_data)
+            else:
+                skipped.append((project_data, reason))
+        return kept, skipped
+
+
+def train_classifier(output_path=None, db=None):
+    """
+    用历史判定结果训练标题分类模型（需要 scikit-learn 和 joblib）
+
+    不相关样本为服务类判断排除的项目（error_msg 以「服务类项目」开头），相关样本为已完成
+    判定的项目；预筛排除的项目不参与训练，避免模型强化自己的误判。
+
+    Args:
+        output_path: 模型保存路径（None时使用配置的 model_path）
+        db: 数据库会话（None时新建并在查询后关闭）
+
+    Returns:
+        str: 模型保存路径
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from utils.db import get_db, TenderProject, ProjectStatus
+
+    config = SPIDER_CONFIG.get("title_prefilter", {})
+    output_path = output_path or config.get("model_path")
+    if not output_path:
+        raise ValueError("未指定模型保存路径（title_prefilter.model_path）")
+    own_session = db is None
+    if own_session:
+        db = next(get_db())
+    try:
+        irrelevant = [row[0] for row in db.query(TenderProject.project_name).filter(
+            TenderProject.status == ProjectStatus.EXCLUDED,
+            TenderProject.error_msg.like("服务类项目%"),
+        )]
+        relevant = [row[0] for row in db.query(TenderProject.project_name).filter(
+            TenderProject.final_decision.isnot(None),
+            TenderProject.final_decision != "未判定",
+        )]
+    finally:
+        if own_session:
+            db.close()
+    if not irrelevant or not relevant:
+        raise ValueError(f"训练样本不足：不相关 {len(irrelevant)} 个，相关 {len(relevant)} 个")
+    # 中文标题不分词，使用字符 n-gram
+    model = make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(1, 3), min_df=2),
+        LogisticRegression(max_iter=1000, class_weight="balanced"),
+    )
+    model.fit(irrelevant + relevant, [1] * len(irrelevant) + [0] * len(relevant))
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    joblib.dump(model, output_path)
+    log.info(f"标题预筛分类模型已保存: {output_path}（不相关 {len(irrelevant)} 个，相关 {len(relevant)} 个）")
+    return output_path
+
+
+# 全局标题预筛（所有平台共用）
+title_prefilter = TitlePrefilter()
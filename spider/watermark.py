@@ -0,0 +1,192 @@
+"""增量爬取水位
+
+每个列表流（平台 × 分类 × 区域）持久化一个高水位：已处理项目中最新的发布时间戳，
+以及该时间戳下已处理的项目ID。列表按发布时间倒序翻页，一旦连续遇到水位以下
+（已处理过）的项目即可停止翻页，每日爬取量从「时间窗口内的全部项目」降为「新增项目」。
+
+水位只在列表流完整走到已处理区域（或时间范围边界）后才推进，
+并且不会越过本次未成功入库的项目，保证这些项目下次仍会被重新列出。
+
+列表流经常在走到已处理区域之前就停止（达到 daily_limit 后关闭候选生成器、达到最大页数），
+此时保存一个临时水位：列表顶部连续处理完的时间范围 (oldest, newest]。下次爬取时该范围内的
+项目直接跳过但不停止翻页，继续列出范围以下、水位以上尚未处理的项目；列表流完整走完后
+临时水位并入正式水位。
+"""
+
+NEW = "new"
+SEEN = "seen"
+STOP = "stop"
+
+
+def project_timestamp(project_data):
+    """
+    获取项目发布时间戳（毫秒）
+
+    优先使用 publish_timestamp，没有时由 publish_time（datetime）换算
+
+    Returns:
+        int 或 None: 毫秒时间戳，无法获取时返回None
+    """
+    timestamp = project_data.get("publish_timestamp")
+    if timestamp is None:
+        publish_time = project_data.get("publish_time")
+        if publish_time is None or not hasattr(publish_time, "timestamp"):
+            return None
+        timestamp = publish_time.timestamp() * 1000
+    return int(timestamp)
+
+
+class StreamWatermark:
+    """单个列表流的爬取水位
+
+    使用示例（在列表生成器中）:
+        watermark = self._get_watermark(category, district)
+        for item in records:
+            project_data = self._parse_project(item, ...)
+            status = watermark.check(project_data)
+            if status == STOP:
+                break  # 已进入已处理区域，停止翻页
+            if status == SEEN:
+                continue
+            ...  # 去重
+            watermark.track(project_data)
+            yield project_data
+        watermark.finish()
+    """
+
+    def __init__(self, stream_key="", timestamp=None, seen_ids=None, stop_after=3, partial=None):
+        """
+        初始化水位
+
+        Args:
+            stream_key: 列表流标识（"分类:区域"，单列表平台为空字符串）
+            timestamp: 已持久化的水位时间戳（毫秒，None表示首次爬取）
+            seen_ids: 水位时间戳下已处理的项目ID集合
+            stop_after: 连续遇到多少个已处理项目后停止翻页（容忍列表排序的轻微抖动）
+            partial: 临时水位 (最新时间戳, 最早时间戳, 最新时间戳下已处理的项目ID集合)，
+                (最早, 最新] 范围内的项目已处理；None表示没有
+        """
+        self.stream_key = stream_key
+        self.timestamp = timestamp
+        self.seen_ids = set(seen_ids or ())
+        self.stop_after = max(int(stop_after), 1)
+        self.partial = None
+        if partial is not None:
+            newest, oldest, partial_ids = partial
+            self.partial = (newest, oldest, set(partial_ids or ()))
+        # 本次列出的项目 [(时间戳, 项目ID)]
+        self._tracked = []
+        self._seen_streak = 0
+        self._aborted = False
+        # 本次是否列到了临时水位范围（顶部新项目与临时水位范围相连）
+        self._reached_partial = False
+        # 列表流是否完整走到了已处理区域或时间范围边界
+        self.complete = False
+
+    def check(self, project_data):
+        """
+        判断项目是否在水位以上
+
+        Returns:
+            str: NEW（新项目）/ SEEN（已处理，跳过）/ STOP（已进入已处理区域，停止翻页）
+        """
+        timestamp = project_timestamp(project_data)
+        if timestamp is None:
+            return NEW
+        project_id = str(project_data.get("project_id"))
+        if self.partial is not None:
+            newest, oldest, partial_ids = self.partial
+            if timestamp <= newest:
+                self._reached_partial = True
+            if oldest < timestamp < newest or (timestamp == newest and project_id in partial_ids):
+                # 临时水位范围内已处理：跳过，继续翻页到范围以下
+                self._seen_streak = 0
+                return SEEN
+        if self.timestamp is None:
+            return NEW
+        if timestamp > self.timestamp or (timestamp == self.timestamp and project_id not in self.seen_ids):
+            self._seen_streak = 0
+            return NEW
+        self._seen_streak += 1
+        if self._seen_streak >= self.stop_after:
+            self.complete = True
+            return STOP
+        return SEEN
+
+    def track(self, project_data):
+        """记录本次列出、将要下载的新项目（用于计算新水位，应在去重之后调用）"""
+        timestamp = project_timestamp(project_data)
+        if timestamp is not None:
+            self._tracked.append((timestamp, str(project_data.get("project_id"))))
+
+    def abort(self):
+        """列表请求失败：本次不推进水位"""
+        self._aborted = True
+
+    def finish(self):
+        """列表流正常结束（无更多数据或到达时间范围边界）"""
+        if not self._aborted:
+            self.complete = True
+
+    def advance(self, saved_ids=()):
+        """
+        计算新水位
+
+        本次列出但未成功入库（下载/保存失败、超出数量限制）的项目视为失败项目，
+        新水位取严格早于最早失败项目的最新时间戳，即水位不会越过任何失败项目；
+        水位只前进不后退。列表流未完整走完时只更新临时水位（见 _advance_partial）。
+
+        Args:
+            saved_ids: 本次成功入库的项目ID集合
+
+        Returns:
+            tuple 或 None: (时间戳, 已处理ID集合, 临时水位)，无需更新时返回None
+        """
+        if self._aborted:
+            return None
+        saved_ids = {str(project_id) for project_id in saved_ids}
+        failed_timestamps = [ts for ts, project_id in self._tracked if project_id not in saved_ids]
+        if not self.complete:
+            return self._advance_partial(failed_timestamps)
+        limit = min(failed_timestamps) if failed_timestamps else None
+        candidates = [ts for ts, _ in self._tracked if limit is None or ts < limit]
+        # 临时水位范围已处理，且与本次列出的项目相连：范围整体低于失败项目时可并入正式水位
+        partial_merged = self.partial is not None and (limit is None or self.partial[0] < limit)
+        if partial_merged:
+            candidates.append(self.partial[0])
+        if not candidates:
+            return None
+        timestamp = max(candidates)
+        if self.timestamp is not None and timestamp < self.timestamp:
+            return None
+        seen_ids = {project_id for ts, project_id in self._tracked if ts == timestamp}
+        if timestamp == self.timestamp:
+            seen_ids |= self.seen_ids
+        if partial_merged and timestamp == self.partial[0]:
+            seen_ids |= self.partial[2]
+        partial = self.partial if self.partial is not None and self.partial[0] > timestamp else None
+        return timestamp, seen_ids, partial
+
+    def _advance_partial(self, failed_timestamps):
+        """
+        列表流中途停止：正式水位不变，临时水位记录列表顶部连续处理完的范围
+
+        范围下界不低于本次最晚的失败项目，失败项目和未列到的更早项目下次仍会被列出。
+        本次列到了原临时水位范围时，两段范围合并。
+        """
+        if not self._tracked:
+            return None
+        newest = max(ts for ts, _ in self._tracked)
+        oldest = min(ts for ts, _ in self._tracked)
+        partial_ids = set()
+        if self.partial is not None and self._reached_partial:
+            newest = max(newest, self.partial[0])
+            oldest = min(oldest, self.partial[1])
+            if newest == self.partial[0]:
+                partial_ids |= self.partial[2]
+        if failed_timestamps:
+            oldest = max(oldest, max(failed_timestamps))
+        if oldest >= newest:
+            return None
+        partial_ids |= {project_id for ts, project_id in self._tracked if ts == newest}
+        return self.timestamp, self.seen_ids, (newest, oldest, partial_ids)
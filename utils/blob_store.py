@@ -0,0 +1,123 @@
+"""
+内容寻址的标书文件存储
+同一份招标文件经常同时发布在省平台和市级平台上，按内容 SHA-256 存储后只保留一份：
+- 文件保存为 <blob_dir>/<哈希前两位>/<sha256>.<扩展名>，TenderProject.file_path 指向该文件；
+- 内容相同的项目共用同一文件，并通过 content_hash 复用解析结果和AI提取结果；
+- 哈希优先使用下载时边下载边计算的结果（见 record_hash），避免再次读取大文件。
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from typing import Optional, Tuple
+
+from utils.log import log
+from config import STORAGE_CONFIG
+
+_CHUNK_SIZE = 1024 * 1024
+# 下载时计算好的哈希：{绝对路径: (文件大小, 修改时间, sha256)}
+_known_hashes = {}
+_known_hashes_limit = 1024
+_lock = threading.Lock()
+
+
+def _config() -> dict:
+    return STORAGE_CONFIG.get("blob_store", {})
+
+
+def blob_dir() -> str:
+    """内容寻址存储的根目录"""
+    return os.path.abspath(_config().get("blob_dir", "blobs"))
+
+
+def hash_file(file_path: str) -> str:
+    """计算文件的 SHA-256（十六进制）"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def record_hash(file_path: str, sha256: str):
+    """记录下载过程中计算出的文件哈希，供 put() 直接使用（文件大小或修改时间变化后失效）"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return
+    with _lock:
+        if len(_known_hashes) >= _known_hashes_limit:
+            # 丢弃最早记录的一条（未被使用的记录通常对应已删除的文件）
+            _known_hashes.pop(next(iter(_known_hashes)))
+        _known_hashes[os.path.abspath(file_path)] = (stat.st_size, stat.st_mtime_ns, sha256)
+
+
+def _pop_known_hash(file_path: str) -> Optional[str]:
+    with _lock:
+        known = _known_hashes.pop(os.path.abspath(file_path), None)
+    if known is None:
+        return None
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    size, mtime_ns, sha256 = known
+    return sha256 if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns) else None
+
+
+def is_blob(file_path: str) -> bool:
+    """判断路径是否位于内容寻址存储中（这类文件可能被多个项目共用，不能随单个项目删除或改动）"""
+    if not file_path:
+        return False
+    root = blob_dir()
+    try:
+        return os.path.commonpath([os.path.abspath(file_path), root]) == root
+    except ValueError:
+        # Windows 下不同盘符的路径
+        return False
+
+
+def blob_path(sha256: str, ext: str = "") -> str:
+    """内容哈希对应的存储路径"""
+    ext = ext.lower().lstrip(".")
+    filename = f"{sha256}.{ext}" if ext else sha256
+    return os.path.join(blob_dir(), sha256[:2], filename)
+
+
+def put(file_path: str, sha256: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    将下载好的文件移入内容寻址存储
+
+    已存在相同内容的文件时删除新下载的副本，直接复用已有文件。
+    未启用存储或 file_path 不是普通文件时，保留原路径，仍返回内容哈希（无法计算时为None）。
+
+    Args:
+        file_path: 下载完成的文件路径
+        sha256: 已知的内容哈希（None时优先使用 record_hash 记录的值，否则读取文件计算）
+
+    Returns:
+        (存储后的文件路径, sha256)
+    """
+    if not file_path or not os.path.isfile(file_path):
+        return file_path, None
+    sha256 = sha256 or _pop_known_hash(file_path) or hash_file(file_path)
+    if not _config().get("enabled", True) or is_blob(file_path):
+        return file_path, sha256
+
+    target = blob_path(sha256, os.path.splitext(file_path)[1])
+    if os.path.exists(target):
+        # 更新修改时间，避免按修改时间清理旧文件时删除仍在使用的文件
+        os.utime(target, None)
+        os.remove(file_path)
+        log.info(f"文件内容与已有文件相同，复用: {target}")
+        return target, sha256
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.replace(file_path, target)
+    except OSError:
+        # 跨文件系统时无法直接重命名
+        shutil.move(file_path, target)
+    log.debug(f"文件已存入内容寻址存储: {target}")
+    return target, sha256
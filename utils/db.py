@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Text, DateTime, Enum, extract
+from sqlalchemy import create_engine, Column, Integer, BigInteger, Float, String, Text, DateTime, Enum, extract, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import enum
+import json
 from config import DB_CONFIG, A_CERTIFICATE_CONFIG, B_RULE_CONFIG
 from utils.log import log
 import os
@@ -24,7 +25,8 @@ if DB_CONFIG["db_type"] == "sqlite":
         pool_size=5,  # 连接池大小
         max_overflow=10,  # 最大溢出连接数
         pool_pre_ping=True,  # 连接前检查连接是否有效
-        connect_args={"check_same_thread": False}  # SQLite允许多线程
+        # SQLite允许多线程；多个平台并发写入时等待写锁，而不是立即报 database is locked
+        connect_args={"check_same_thread": False, "timeout": 30}
     )
 else:
     # PostgreSQL连接池配置
@@ -79,6 +81,8 @@ class TenderProject(Base):
     review_result = Column(String(32), default="未确认", comment="复核结果：确认推荐、复核不推荐")
     review_reason = Column(Text, comment="复核原因")
     review_time = Column(DateTime, comment="复核时间")
+    content_hash = Column(String(64), comment="文件内容SHA-256（内容相同的项目共用文件和解析结果）")
+    crawl_source = Column(String(128), comment="爬取来源（平台代码或 平台代码:列表流，用于按来源统计推荐率）")
 
 # 公司资质表模型
 class CompanyQualification(Base):
@@ -119,14 +123,74 @@ class ClassBRule(Base):
     create_time = Column(DateTime, default=datetime.now, comment="创建时间")
     update_time = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment="更新时间")
 
+# 增量爬取水位表模型
+class CrawlWatermark(Base):
+    __tablename__ = "crawl_watermarks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    platform_code = Column(String(64), nullable=False, comment="平台代码")
+    stream_key = Column(String(128), nullable=False, default="", comment="列表流标识（分类:区域，单列表平台为空）")
+    newest_timestamp = Column(BigInteger, nullable=False, comment="已处理的最新发布时间戳（毫秒，0表示尚无完整水位）")
+    seen_ids = Column(Text, comment="最新时间戳下已处理的项目ID（JSON数组）")
+    partial_newest = Column(BigInteger, comment="临时水位：列表流中途停止时顶部已处理范围的最新时间戳（毫秒）")
+    partial_oldest = Column(BigInteger, comment="临时水位：已处理范围的下界（不含，毫秒）")
+    partial_seen_ids = Column(Text, comment="临时水位最新时间戳下已处理的项目ID（JSON数组）")
+    update_time = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment="更新时间")
+
+    __table_args__ = (UniqueConstraint("platform_code", "stream_key", name="uq_watermark_stream"),)
+
+# 公告相似签名表：跨平台近似重复检测（同一采购在省级、市级平台以略有不同的标题发布）
+class NoticeSignature(Base):
+    __tablename__ = "notice_signatures"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(String(128), nullable=False, comment="平台项目唯一标识")
+    platform = Column(String(128), nullable=False, comment="来源平台（site_name 中的平台名称）")
+    tender_project_id = Column(Integer, comment="已入库项目的 tender_projects.id（疑似重复公告为空）")
+    duplicate_of = Column(Integer, comment="疑似重复公告关联的已有 tender_projects.id")
+    title_norm = Column(String(512), comment="规范化后的标题")
+    purchaser = Column(String(256), comment="规范化后的采购人")
+    budget = Column(Float, comment="预算金额（元）")
+    publish_date = Column(DateTime, comment="发布时间")
+    simhash = Column(BigInteger, comment="标题 SimHash（64位，按有符号整数保存）")
+    minhash = Column(Text, comment="标题 MinHash 签名（十六进制）")
+    create_time = Column(DateTime, default=datetime.now, comment="创建时间")
+
+    __table_args__ = (
+        Index("idx_signature_publish_date", "publish_date"),
+        Index("idx_signature_project_id", "project_id"),
+        Index("idx_signature_tender_project_id", "tender_project_id"),
+    )
+
 # 初始化数据库
 def init_db():
     try:
         Base.metadata.create_all(bind=engine)
         
         # 性能优化：创建常用查询字段的索引
-        from sqlalchemy import Index, inspect
+        from sqlalchemy import inspect, text
         inspector = inspect(engine)
+        
+        # create_all 不会为已有表添加新列，这里补齐
+        if 'tender_projects' in inspector.get_table_names():
+            existing_columns = [column['name'] for column in inspector.get_columns('tender_projects')]
+            if 'content_hash' not in existing_columns:
+                with engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE tender_projects ADD COLUMN content_hash VARCHAR(64)"))
+                log.info("添加字段成功：tender_projects.content_hash")
+            if 'crawl_source' not in existing_columns:
+                with engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE tender_projects ADD COLUMN crawl_source VARCHAR(128)"))
+                log.info("添加字段成功：tender_projects.crawl_source")
+        if 'crawl_watermarks' in inspector.get_table_names():
+            existing_columns = [column['name'] for column in inspector.get_columns('crawl_watermarks')]
+            for column_name, column_type in (('partial_newest', 'BIGINT'), ('partial_oldest', 'BIGINT'),
+                                             ('partial_seen_ids', 'TEXT')):
+                if column_name not in existing_columns:
+                    with engine.begin() as conn:
+                        conn.execute(text(f"ALTER TABLE crawl_watermarks ADD COLUMN {column_name} {column_type}"))
+                    log.info(f"添加字段成功：crawl_watermarks.{column_name}")
+        
         existing_indexes = [idx['name'] for idx in inspector.get_indexes('tender_projects')] if 'tender_projects' in inspector.get_table_names() else []
         
         # 为常用查询字段创建索引（如果不存在）
@@ -136,6 +200,8 @@ def init_db():
             ('idx_publish_time', TenderProject.publish_time),
             ('idx_final_decision', TenderProject.final_decision),
             ('idx_region', TenderProject.region),
+            ('idx_content_hash', TenderProject.content_hash),
+            ('idx_crawl_source', TenderProject.crawl_source),
         ]
         
         for index_name, column in indexes_to_create:
@@ -242,6 +308,71 @@ def save_project(db, project_data):
         log.error(f"项目保存失败：{str(e)}")
         raise
 
+# 批量保存项目数据
+def save_projects_bulk(db, projects_data):
+    """
+    批量保存项目：一条 INSERT ... ON CONFLICT(project_id) DO NOTHING RETURNING，一次提交
+    
+    与逐条调用 save_project（每个项目一次 SELECT、INSERT、COMMIT、REFRESH）相比，
+    下载并发时 SQLite 的提交开销大幅减少。project_id 已存在的项目不插入，也不返回。
+    批量插入失败（如某条数据缺少必填字段）时退回逐条保存，只跳过有问题的项目。
+    
+    Args:
+        projects_data: 项目数据字典列表（非 TenderProject 字段的键会被忽略）
+    
+    Returns:
+        list: 新插入的项目（TenderProject，按 projects_data 的顺序；
+            project_id 列为字符串，传入整数 project_id 时返回的是对应的字符串）
+    """
+    if not projects_data:
+        return []
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    columns = set(TenderProject.__table__.columns.keys())
+    rows = [{key: value for key, value in data.items() if key in columns} for data in projects_data]
+    # executemany 要求每行字段相同；字段不同的行分组插入（缺少的字段仍使用列默认值）
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    stmt = (
+        insert(TenderProject)
+        .on_conflict_do_nothing(index_elements=[TenderProject.project_id])
+        .returning(TenderProject.id)
+    )
+    try:
+        inserted_ids = []
+        for group in groups.values():
+            inserted_ids.extend(row[0] for row in db.execute(stmt, group))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        log.warning(f"批量保存项目失败，改为逐条保存：{str(e)}")
+        saved = []
+        for data in projects_data:
+            project_id = data.get("project_id")
+            if project_id and db.query(TenderProject.id).filter_by(project_id=project_id).first():
+                continue
+            try:
+                saved.append(save_project(db, data))
+            except Exception:
+                continue
+        return saved
+    
+    if not inserted_ids:
+        log.info(f"批量保存项目：{len(rows)} 个项目均已存在，跳过")
+        return []
+    projects = db.query(TenderProject).filter(TenderProject.id.in_(inserted_ids)).all()
+    # 按字段分组插入后 id 顺序与输入不一致，按 projects_data 中的位置排序
+    position = {}
+    for index, data in enumerate(projects_data):
+        position.setdefault(str(data.get("project_id")), index)
+    projects.sort(key=lambda project: position.get(str(project.project_id), len(projects_data)))
+    log.info(f"批量保存项目：新增 {len(projects)} 个，已存在 {len(rows) - len(projects)} 个")
+    return projects
+
 # 更新项目数据
 def update_project(db, project_id, update_data):
     try:
@@ -258,6 +389,87 @@ def update_project(db, project_id, update_data):
         log.error(f"项目更新失败：ID={project_id}，错误：{str(e)}")
         raise
 
+def find_same_content_project(db, project, field):
+    """
+    查找文件内容相同、且指定字段已有结果的其他项目（用于复用解析结果和AI提取结果）
+    
+    Args:
+        project: 当前项目（TenderProject）
+        field: 需要已有结果的字段名（如 "evaluation_content"、"project_requirements"）
+    
+    Returns:
+        TenderProject 或 None
+    """
+    if not project.content_hash:
+        return None
+    column = getattr(TenderProject, field)
+    return db.query(TenderProject).filter(
+        TenderProject.content_hash == project.content_hash,
+        TenderProject.id != project.id,
+        column.isnot(None),
+        column != "",
+    ).order_by(TenderProject.id).first()
+
+def get_reusable_requirements(db, project):
+    """
+    获取文件内容相同的项目已提取的资质要求（两者解析内容一致时才复用，避免重复调用AI）
+    
+    Returns:
+        str 或 None: 可复用的资质要求，没有时返回None
+    """
+    donor = find_same_content_project(db, project, "project_requirements")
+    if donor is None or donor.evaluation_content != project.evaluation_content:
+        return None
+    log.info(f"项目 {project.id} 与项目 {donor.id} 文件内容相同，复用已提取的资质要求")
+    return donor.project_requirements
+
+# 增量爬取水位管理函数
+
+def get_crawl_watermarks(db, platform_code):
+    """
+    获取平台所有列表流的爬取水位
+    
+    Returns:
+        dict: {stream_key: (newest_timestamp, set(seen_ids), partial)}，
+            newest_timestamp 为None表示尚无完整水位；
+            partial 为临时水位 (partial_newest, partial_oldest, set(partial_seen_ids))，没有时为None
+    """
+    rows = db.query(CrawlWatermark).filter(CrawlWatermark.platform_code == platform_code).all()
+    watermarks = {}
+    for row in rows:
+        partial = None
+        if row.partial_newest is not None and row.partial_oldest is not None:
+            partial = (row.partial_newest, row.partial_oldest, set(json.loads(row.partial_seen_ids or "[]")))
+        watermarks[row.stream_key] = (row.newest_timestamp or None, set(json.loads(row.seen_ids or "[]")), partial)
+    return watermarks
+
+def save_crawl_watermark(db, platform_code, stream_key, newest_timestamp, seen_ids, partial=None):
+    """
+    保存（新增或更新）列表流的爬取水位
+    
+    Args:
+        newest_timestamp: 水位时间戳（None表示尚无完整水位，只有临时水位）
+        partial: 临时水位 (partial_newest, partial_oldest, partial_seen_ids)，None表示清除
+    """
+    try:
+        row = db.query(CrawlWatermark).filter_by(platform_code=platform_code, stream_key=stream_key).first()
+        if row is None:
+            row = CrawlWatermark(platform_code=platform_code, stream_key=stream_key)
+            db.add(row)
+        row.newest_timestamp = newest_timestamp or 0
+        row.seen_ids = json.dumps(sorted(str(i) for i in seen_ids), ensure_ascii=False)
+        if partial is None:
+            row.partial_newest = row.partial_oldest = row.partial_seen_ids = None
+        else:
+            row.partial_newest, row.partial_oldest, partial_ids = partial
+            row.partial_seen_ids = json.dumps(sorted(str(i) for i in partial_ids), ensure_ascii=False)
+        db.commit()
+        log.debug(f"爬取水位已更新：{platform_code}[{stream_key}] -> {newest_timestamp}")
+    except Exception as e:
+        db.rollback()
+        log.error(f"爬取水位保存失败：{platform_code}[{stream_key}]，错误：{str(e)}")
+        raise
+
 # 公司资质管理函数
 
 def get_company_qualifications(db):
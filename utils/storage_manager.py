@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple
 from utils.log import log
+from utils.blob_store import is_blob
 from config import FILES_DIR, REPORT_DIR, LOG_DIR, BASE_DIR
 
 
@@ -220,7 +221,22 @@ class StorageManager:
             
             stats["projects_processed"] = len(projects)
             
+            # 内容寻址存储中的文件可能被多个项目共用，仍被其他状态的项目引用时不删除
+            cleaned_ids = [project.id for project in projects]
+            blob_paths = {project.file_path for project in projects if is_blob(project.file_path)}
+            shared_paths = set()
+            if blob_paths:
+                shared_paths = {
+                    row[0] for row in db.query(TenderProject.file_path).filter(
+                        TenderProject.file_path.in_(blob_paths),
+                        ~TenderProject.id.in_(cleaned_ids)
+                    ).distinct()
+                }
+            
             for project in projects:
+                if project.file_path in shared_paths:
+                    log.debug(f"文件仍被其他项目使用，跳过删除: {project.file_path} (项目ID: {project.id})")
+                    continue
                 if project.file_path:
                     file_path = project.file_path
                     